@@ -0,0 +1,36 @@
+"""Custom model fields."""
+from django.db import models
+
+from apps.core.packing import pack_integers, unpack_integers
+
+
+class IntegerArrayField(models.BinaryField):
+    """
+    Ordered list of non-negative integers stored as packed varints.
+
+    Serializes to a plain list of integers, so fixtures can use lists.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("default", list)
+        super().__init__(*args, **kwargs)
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return unpack_integers(value)
+
+    def to_python(self, value):
+        if value is None or isinstance(value, list):
+            return value
+        if isinstance(value, tuple):
+            return list(value)
+        return unpack_integers(super().to_python(value))
+
+    def get_prep_value(self, value):
+        if value is None:
+            return value
+        return pack_integers(value)
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
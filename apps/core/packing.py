@@ -0,0 +1,56 @@
+"""Compact binary encodings of integer collections."""
+
+
+def pack_integers(values):
+    """Pack non-negative integers into bytes as LEB128 varints."""
+
+    packed = bytearray()
+    for value in values:
+        if value < 0:
+            raise ValueError(f"Can't pack negative integer {value}.")
+        while value > 0x7F:
+            packed.append(value & 0x7F | 0x80)
+            value >>= 7
+        packed.append(value)
+    return bytes(packed)
+
+
+def unpack_integers(data):
+    """Return a list of integers packed by pack_integers."""
+
+    values = []
+    value = shift = 0
+    for byte in bytes(data):
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+        else:
+            values.append(value)
+            value = shift = 0
+    return values
+
+
+def pack_bits(positions):
+    """Pack a set of non-negative positions into a little-endian bitset."""
+
+    positions = set(positions)
+    if not positions:
+        return b""
+    if min(positions) < 0:
+        raise ValueError(f"Can't pack negative position {min(positions)}.")
+
+    packed = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        packed[position // 8] |= 1 << position % 8
+    return bytes(packed)
+
+
+def unpack_bits(data):
+    """Return sorted positions of set bits packed by pack_bits."""
+
+    return [
+        index * 8 + bit
+        for index, byte in enumerate(bytes(data or b""))
+        for bit in range(8)
+        if byte >> bit & 1
+    ]
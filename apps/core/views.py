@@ -0,0 +1,97 @@
+"""Async API view support."""
+import asyncio
+import json
+from functools import update_wrapper
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import Http404, JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+
+
+@sync_to_async
+def _authenticated_user(request):
+    """Return the user of request, or None for anonymous requests."""
+
+    return request.user if request.user.is_authenticated else None
+
+
+class AsyncAPIView(View):
+    """
+    Base class of async JSON API views.
+
+    Handlers are coroutines taking the request, which comes with an
+    authenticated `user` and parsed `data`, and return JsonResponses.
+    Database work runs in sync_to_async blocks. Errors are rendered the
+    way DRF views render them, so async views can stand in for their
+    sync counterparts.
+    """
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+
+        async def async_view(request, *args, **kwargs):
+            return await view(request, *args, **kwargs)
+
+        update_wrapper(async_view, view)
+        return async_view
+
+    async def dispatch(self, request, *args, **kwargs):
+        user = await _authenticated_user(request)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."},
+                status=403,
+            )
+        request.user = user
+
+        try:
+            request.data = self.parse_data(request)
+        except ValueError:
+            return JsonResponse({"detail": "Malformed request."}, status=400)
+
+        handler = self.http_method_not_allowed
+        if request.method.lower() in self.http_method_names:
+            handler = getattr(self, request.method.lower(), handler)
+        try:
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+            return response
+        except Http404:
+            return JsonResponse({"detail": "Not found."}, status=404)
+        except ValidationError as error:
+            return JsonResponse(error.messages, status=400, safe=False)
+        except PermissionDenied:
+            return JsonResponse(
+                {
+                    "detail": (
+                        "You do not have permission to perform this action."
+                    )
+                },
+                status=403,
+            )
+
+    @staticmethod
+    def parse_data(request):
+        """Return the JSON or form data of request."""
+
+        if request.content_type == "application/json":
+            return json.loads(request.body or b"{}")
+        return request.POST
+
+
+def select_view(name, sync_view, async_view):
+    """
+    Return the view of a URL named name.
+
+    URLs listed in the ASYNC_VIEWS setting are served by async_view,
+    others by sync_view.
+    """
+
+    if name in settings.ASYNC_VIEWS:
+        return async_view.as_view()
+    return sync_view.as_view()
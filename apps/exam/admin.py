@@ -1,8 +1,19 @@
 from django.contrib import admin
 
-from apps.exam.models import AnswerAttempt, Exam, ExamAttempt, Subject
+from apps.exam.models import (
+    AnswerAttempt,
+    AnswerSubmission,
+    AttemptSummary,
+    Exam,
+    ExamAttempt,
+    GradingJob,
+    Subject,
+)
 
 admin.site.register(AnswerAttempt)
+admin.site.register(AnswerSubmission)
+admin.site.register(AttemptSummary)
 admin.site.register(Exam)
 admin.site.register(ExamAttempt)
+admin.site.register(GradingJob)
 admin.site.register(Subject)
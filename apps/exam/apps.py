@@ -6,3 +6,8 @@ class ExamConfig(AppConfig):
     """Exam app configuration."""
 
     name = "apps.exam"
+
+    def ready(self):
+        """Connect signal handlers."""
+
+        from apps.exam import signals  # noqa: F401
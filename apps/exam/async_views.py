@@ -0,0 +1,59 @@
+"""Async counterparts of exam API views."""
+from asgiref.sync import sync_to_async
+from django.http import Http404, JsonResponse
+
+from apps.core.views import AsyncAPIView
+from apps.exam.models import ExamAttempt
+from apps.exam.services import attempt_data, get_attempt
+from apps.question.models import Question
+
+
+def _get_attempt(attempt_id, user):
+    try:
+        return get_attempt(attempt_id, user.id)
+    except ExamAttempt.DoesNotExist:
+        raise Http404
+
+
+@sync_to_async
+def _serialized_attempt(attempt_id, user):
+    return attempt_data(_get_attempt(attempt_id, user))
+
+
+@sync_to_async
+def _toggle_flag(attempt_id, user, question_id):
+    """Flag or unflag a question of attempt, return its new state."""
+
+    attempt = _get_attempt(attempt_id, user)
+    try:
+        flagged = attempt.toggle_flag(question_id)
+    except Question.DoesNotExist:
+        raise Http404
+
+    return {
+        "question_id": question_id,
+        "flagged": flagged,
+        "version": attempt.version,
+    }
+
+
+class AsyncAttemptView(AsyncAPIView):
+    """Exam attempt view, see AttemptView."""
+
+    async def get(self, request, attempt_id):
+        """Returns exam attempt."""
+
+        return JsonResponse(
+            await _serialized_attempt(attempt_id, request.user)
+        )
+
+
+class AsyncQuestionFlag(AsyncAPIView):
+    """Question flagging view, see QuestionFlag."""
+
+    async def post(self, request, attempt_id, question_id):
+        """Add or remove the flag of a question, return its new state."""
+
+        return JsonResponse(
+            await _toggle_flag(attempt_id, request.user, question_id)
+        )
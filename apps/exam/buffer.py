@@ -0,0 +1,261 @@
+"""Write-behind buffer of exam mode answers."""
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_SUFFIX = ".journal"
+
+# Seconds written answers are remembered for, so an older answer to the
+# same question buffered by another process doesn't overwrite them.
+WRITTEN_TIMEOUT = 60 * 60 * 24
+
+
+def _key(attempt_id, question_id):
+    return f"answer_buffer:{attempt_id}:{question_id}"
+
+
+def read_journal(path):
+    """
+    Return the entries of a journal file.
+
+    Entries are (attempt id, question id, sequence, answer ids) tuples.
+    A line cut short by a crash is skipped.
+    """
+
+    entries = []
+    with open(path, "rb") as journal:
+        for line in journal:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            entries.append(
+                (
+                    entry["attempt"],
+                    entry["question"],
+                    entry["seq"],
+                    entry["answer_ids"],
+                )
+            )
+    return entries
+
+
+def journal_pid(path):
+    """Return the id of the process writing a journal of this host."""
+
+    host, _, pid = Path(path).stem.rpartition("-")
+    if host != socket.gethostname() or not pid.isdigit():
+        return None
+    return int(pid)
+
+
+def latest_entries(entries):
+    """
+    Return the latest answers of every question in entries.
+
+    Return a dict of attempt id to a dict of question id to (sequence,
+    answer ids). Answer ids are None when the latest answer has already
+    been written.
+    """
+
+    latest = defaultdict(dict)
+    for attempt_id, question_id, seq, answer_ids in entries:
+        current = latest[attempt_id].get(question_id)
+        if current is None or current[0] < seq:
+            latest[attempt_id][question_id] = (seq, answer_ids)
+    return latest
+
+
+class AnswerBuffer:
+    """
+    Answers accepted by this process and not yet written to the database.
+
+    Every answer is appended to a journal file of the process before it's
+    accepted, and mirrored to the Django cache, where reads and flushes of
+    other processes see it. Answers are identified by a sequence number,
+    the latest one of a question wins wherever it was buffered.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._journal = None
+        self._pid = None
+        self._flusher = None
+        self._wakeup = threading.Event()
+
+    def _journal_path(self):
+        return Path(settings.EXAM_ANSWER_JOURNAL_DIR) / (
+            f"{socket.gethostname()}-{os.getpid()}{JOURNAL_SUFFIX}"
+        )
+
+    def _append(self, line):
+        if self._pid != os.getpid():
+            # A forked process starts with a journal and buffer of its own.
+            self._entries.clear()
+            self._journal = None
+            self._flusher = None
+            self._pid = os.getpid()
+        if self._journal is None:
+            path = self._journal_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = os.open(
+                path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600
+            )
+        os.write(self._journal, line)
+        if settings.EXAM_ANSWER_JOURNAL_FSYNC:
+            os.fsync(self._journal)
+
+    def add(self, attempt_id, question_id, answer_ids):
+        """Buffer answer ids picked for a question of an attempt."""
+
+        entry = (time.time_ns(), list(answer_ids))
+        line = json.dumps(
+            {
+                "attempt": attempt_id,
+                "question": question_id,
+                "seq": entry[0],
+                "answer_ids": entry[1],
+            }
+        )
+        with self._lock:
+            self._append(f"{line}\n".encode())
+            self._entries[(attempt_id, question_id)] = entry
+            full = len(self._entries) >= settings.EXAM_ANSWER_FLUSH_BATCH_SIZE
+        cache.set(_key(attempt_id, question_id), entry, timeout=None)
+        if full:
+            self._wakeup.set()
+
+    def pending(self, attempt_id, question_ids):
+        """Return buffered answer ids of questions of an attempt."""
+
+        keys = {
+            _key(attempt_id, question_id): question_id
+            for question_id in question_ids
+        }
+        return {
+            keys[key]: answer_ids
+            for key, (seq, answer_ids) in cache.get_many(keys).items()
+            if answer_ids is not None
+        }
+
+    def entries(self, questions=None):
+        """
+        Return buffered answers to write to the database.
+
+        questions maps attempt ids to their question ids, answers of those
+        attempts are returned wherever they were buffered. Otherwise the
+        answers buffered by this process are returned. Return a dict of
+        attempt id to a dict of question id to (sequence, answer ids).
+        """
+
+        with self._lock:
+            local = list(self._entries.items())
+        if questions is None:
+            questions = defaultdict(list)
+            for (attempt_id, question_id), entry in local:
+                questions[attempt_id].append(question_id)
+
+        keys = {
+            _key(attempt_id, question_id): (attempt_id, question_id)
+            for attempt_id, question_ids in questions.items()
+            for question_id in question_ids
+        }
+        found = [
+            (*keys[key], *entry) for key, entry in cache.get_many(keys).items()
+        ]
+        found.extend(
+            (attempt_id, question_id, *entry)
+            for (attempt_id, question_id), entry in local
+            if attempt_id in questions
+        )
+        return latest_entries(found)
+
+    def discard(self, entries):
+        """
+        Forget answers written to the database.
+
+        Answers buffered again since entries were read are kept. The cache
+        keeps the sequence of written answers for WRITTEN_TIMEOUT seconds.
+        The journal is emptied once this process has nothing left to
+        write.
+        """
+
+        written = {
+            _key(attempt_id, question_id): seq
+            for attempt_id, answers in entries.items()
+            for question_id, (seq, _) in answers.items()
+        }
+        current = cache.get_many(written)
+        cache.set_many(
+            {
+                key: (seq, None)
+                for key, seq in written.items()
+                if key not in current or current[key][0] <= seq
+            },
+            timeout=WRITTEN_TIMEOUT,
+        )
+
+        with self._lock:
+            for attempt_id, answers in entries.items():
+                for question_id, (seq, _) in answers.items():
+                    entry = self._entries.get((attempt_id, question_id))
+                    if entry is not None and entry[0] <= seq:
+                        del self._entries[(attempt_id, question_id)]
+            if not self._entries and self._journal is not None:
+                os.ftruncate(self._journal, 0)
+
+    def close(self):
+        """Close the journal, the next answer opens it again."""
+
+        with self._lock:
+            if self._journal is not None and self._pid == os.getpid():
+                os.close(self._journal)
+            self._journal = None
+
+    def start_flusher(self, flush):
+        """
+        Call flush every EXAM_ANSWER_FLUSH_SECONDS in a thread.
+
+        The thread is woken up early when EXAM_ANSWER_FLUSH_BATCH_SIZE
+        answers are waiting. A zero interval leaves flushes to callers.
+        """
+
+        interval = settings.EXAM_ANSWER_FLUSH_SECONDS
+        with self._lock:
+            if not interval or (
+                self._flusher is not None and self._flusher.is_alive()
+            ):
+                return
+            self._flusher = threading.Thread(
+                target=self._run_flusher,
+                args=(flush, interval),
+                name="answer-flusher",
+                daemon=True,
+            )
+            self._flusher.start()
+
+    def _run_flusher(self, flush, interval):
+        while True:
+            self._wakeup.wait(interval)
+            self._wakeup.clear()
+            try:
+                flush()
+            except Exception:
+                logger.exception("Flushing buffered answers failed.")
+            finally:
+                close_old_connections()
+
+
+answer_buffer = AnswerBuffer()
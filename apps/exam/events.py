@@ -0,0 +1,96 @@
+"""In-process publish/subscribe of exam attempt events."""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+EVENT_DEADLINE = "deadline"
+EVENT_FINISHED = "finished"
+
+
+def deadline_data(attempt):
+    """
+    Return the data of a deadline event of attempt.
+
+    Clients count down from the time left rather than from ends_at, so
+    their clocks don't have to be right.
+    """
+
+    return {
+        "ends_at": attempt.deadline.isoformat(),
+        "duration_minutes": attempt.duration_minutes,
+        "time_left_seconds": attempt.time_left_seconds,
+    }
+
+
+class AttemptEvents:
+    """
+    Broker of attempt events between writers and event streams.
+
+    Streams subscribe with an asyncio queue on their event loop, writers
+    publish from any thread. Events only reach streams served by the same
+    process, streams of other processes poll for changes instead, see
+    attempt_stream().
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, attempt_id):
+        """Return a queue receiving events of an attempt."""
+
+        queue = asyncio.Queue(self.maxsize)
+        with self._lock:
+            self._subscribers[attempt_id].add(
+                (asyncio.get_running_loop(), queue)
+            )
+        return queue
+
+    def unsubscribe(self, attempt_id, queue):
+        """Stop delivering events of an attempt to queue."""
+
+        with self._lock:
+            subscribers = self._subscribers.get(attempt_id, set())
+            subscribers.discard((asyncio.get_running_loop(), queue))
+            if not subscribers:
+                self._subscribers.pop(attempt_id, None)
+
+    def subscriber_count(self, attempt_id=None):
+        """Return the number of streams of an attempt, or of all of them."""
+
+        with self._lock:
+            if attempt_id is not None:
+                return len(self._subscribers.get(attempt_id, ()))
+            return sum(map(len, self._subscribers.values()))
+
+    def publish(self, attempt_id, event, data):
+        """
+        Deliver an event to every stream of an attempt.
+
+        A stream that doesn't keep up loses the event instead of blocking
+        the writer.
+        """
+
+        with self._lock:
+            subscribers = list(self._subscribers.get(attempt_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._put, queue, (event, data))
+
+    @staticmethod
+    def _put(queue, message):
+        try:
+            queue.put_nowait(message)
+        except asyncio.QueueFull:
+            pass
+
+    def publish_on_commit(self, attempt_id, event, data):
+        """Publish an event once the current transaction commits."""
+
+        transaction.on_commit(lambda: self.publish(attempt_id, event, data))
+
+
+attempt_events = AttemptEvents(settings.EXAM_EVENTS_QUEUE_SIZE)
@@ -0,0 +1,161 @@
+"""Database-backed queue of attempt grading jobs."""
+import uuid
+from datetime import timedelta
+
+import django
+from django.db import transaction
+from django.db.models import Count, F, Q, Subquery
+from django.utils import timezone
+
+from apps.exam.models import (
+    AnswerAttempt,
+    AttemptSummary,
+    ExamAttempt,
+    GradingJob,
+)
+from apps.exam.state import invalidate_attempt_state
+
+
+def lease_jobs(count, lease_seconds):
+    """
+    Lease up to count jobs that are due or whose lease has run out.
+
+    Jobs are claimed by a single UPDATE with a fresh lease token, so two
+    workers never lease the same job. Return the leased jobs.
+    """
+
+    now = timezone.now()
+    token = uuid.uuid4().hex
+    due = GradingJob.objects.filter(
+        Q(status=GradingJob.STATUS_PENDING, available_at__lte=now)
+        | Q(status=GradingJob.STATUS_RUNNING, leased_until__lt=now)
+    ).order_by("available_at")
+    GradingJob.objects.filter(
+        pk__in=Subquery(due.values("pk")[:count])
+    ).update(
+        status=GradingJob.STATUS_RUNNING,
+        lease_token=token,
+        leased_until=now + timedelta(seconds=lease_seconds),
+    )
+    return list(GradingJob.objects.filter(lease_token=token))
+
+
+def grade_attempt(attempt_id):
+    """
+    Grade an attempt from its answers with two queries.
+
+    Runs in worker processes, so it only takes and returns plain values.
+    Correct answers are read from the database, worker processes don't
+    keep answer key caches.
+    """
+
+    answer_attempts = AnswerAttempt.objects.filter(attempt=attempt_id)
+    return answer_attempts.score(answer_attempts.correct_answers()).grade
+
+
+def init_worker():
+    """Set Django up in a worker process started without fork."""
+
+    django.setup()
+
+
+def complete_job(job, grade):
+    """
+    Store the grade of a job's attempt and mark the job done.
+
+    The summary of the attempt gets the grade too.
+    """
+
+    now = timezone.now()
+    with transaction.atomic():
+        updated = GradingJob.objects.filter(
+            pk=job.pk, lease_token=job.lease_token
+        ).update(
+            status=GradingJob.STATUS_DONE,
+            tries=job.tries + 1,
+            finished_at=now,
+            error="",
+        )
+        if updated:
+            ExamAttempt.objects.filter(pk=job.attempt_id).update(
+                grade=grade, graded_at=now, version=F("version") + 1
+            )
+            invalidate_attempt_state(job.attempt_id)
+            passing_grade = (
+                ExamAttempt.objects.filter(pk=job.attempt_id)
+                .values_list("passing_grade", flat=True)
+                .get()
+            )
+            AttemptSummary.objects.filter(attempt=job.attempt_id).update(
+                grade=grade, passed=grade >= (passing_grade or 0)
+            )
+    return bool(updated)
+
+
+def fail_job(job, error, max_tries):
+    """
+    Record a failed try of a job.
+
+    The job is retried with exponential backoff until it's been tried
+    max_tries times, then it's marked failed.
+    """
+
+    tries = job.tries + 1
+    if tries < max_tries:
+        changes = {
+            "status": GradingJob.STATUS_PENDING,
+            "available_at": timezone.now() + timedelta(seconds=2**tries),
+        }
+    else:
+        changes = {
+            "status": GradingJob.STATUS_FAILED,
+            "finished_at": timezone.now(),
+        }
+
+    GradingJob.objects.filter(pk=job.pk, lease_token=job.lease_token).update(
+        tries=tries, lease_token="", leased_until=None, error=error, **changes
+    )
+
+
+def queue_stats(sample_size=1000):
+    """
+    Return queue depth and latency of recent jobs.
+
+    Latency is the time from enqueueing to completion of the last
+    sample_size done jobs, in seconds.
+    """
+
+    now = timezone.now()
+    stats = dict.fromkeys((status for status, label in GradingJob.STATUSES), 0)
+    stats.update(
+        GradingJob.objects.order_by()
+        .values_list("status")
+        .annotate(count=Count("*"))
+    )
+
+    oldest = (
+        GradingJob.objects.filter(status=GradingJob.STATUS_PENDING)
+        .order_by("created")
+        .values_list("created", flat=True)
+        .first()
+    )
+    stats["oldest_pending_seconds"] = (
+        (now - oldest).total_seconds() if oldest else 0
+    )
+
+    latencies = sorted(
+        (finished_at - created).total_seconds()
+        for created, finished_at in GradingJob.objects.filter(
+            status=GradingJob.STATUS_DONE
+        )
+        .order_by("-finished_at")
+        .values_list("created", "finished_at")[:sample_size]
+    )
+    if latencies:
+        stats["latency_mean_seconds"] = sum(latencies) / len(latencies)
+        stats["latency_p95_seconds"] = latencies[
+            min(int(len(latencies) * 0.95), len(latencies) - 1)
+        ]
+    else:
+        stats["latency_mean_seconds"] = stats["latency_p95_seconds"] = 0
+    return stats
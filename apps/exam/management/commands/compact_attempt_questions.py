@@ -0,0 +1,87 @@
+"""Move question sets of finished attempts out of the questions table."""
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.exam.models import ExamAttempt
+from apps.exam.state import invalidate_attempt_state
+
+
+class Command(BaseCommand):
+    help = (
+        "Replace question rows of finished attempts with the list of "
+        "question ids kept on the attempt."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="number of attempts converted in one transaction",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="only report how many attempts can be converted",
+        )
+
+    def handle(self, *args, **options):
+        compacted = 0
+        last_id = 0
+
+        while True:
+            attempts = list(
+                ExamAttempt.objects.filter(
+                    id__gt=last_id,
+                    status=ExamAttempt.STATUS_FINISHED,
+                    virtual_questions=False,
+                )
+                .order_by("id")
+                .only("id", "question_order")[: options["batch_size"]]
+            )
+            if not attempts:
+                break
+            last_id = attempts[-1].id
+
+            compacted += self.compact(attempts, options["dry_run"])
+
+        self.stdout.write(f"Compacted {compacted} attempts.")
+
+    def compact(self, attempts, dry_run):
+        """
+        Convert attempts to virtual ones that keep their question ids.
+
+        Attempts delivered in a stored order already keep their question
+        ids, others get them in the order of the questions table.
+        """
+
+        if dry_run:
+            return len(attempts)
+
+        question_ids = defaultdict(list)
+        for attempt_id, question_id in (
+            ExamAttempt.questions.through.objects.filter(
+                examattempt__in=attempts
+            )
+            .order_by("question")
+            .values_list("examattempt", "question")
+        ):
+            question_ids[attempt_id].append(question_id)
+
+        with transaction.atomic():
+            for attempt in attempts:
+                order = attempt.question_order or question_ids[attempt.id]
+                ExamAttempt.objects.filter(id=attempt.id).update(
+                    question_count=len(order),
+                    question_order=order,
+                    virtual_questions=True,
+                )
+            attempt_ids = [attempt.id for attempt in attempts]
+            ExamAttempt.questions.through.objects.filter(
+                examattempt__in=attempt_ids
+            ).delete()
+            invalidate_attempt_state(*attempt_ids)
+
+        return len(attempts)
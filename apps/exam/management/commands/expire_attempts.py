@@ -0,0 +1,51 @@
+"""Finish exam mode attempts whose time is up."""
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.exam.services import finish_expired_attempts
+
+
+class Command(BaseCommand):
+    help = (
+        "Grade and finish exam mode attempts past their deadline, in "
+        "batches of short transactions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="number of attempts finished in one transaction",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="keep sweeping instead of exiting when nothing is left",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60,
+            help="seconds to wait between sweeps with --loop",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            finished = self.sweep(options["batch_size"])
+            if options["verbosity"]:
+                self.stdout.write(f"Finished {finished} expired attempts.")
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+    def sweep(self, batch_size):
+        """Finish expired attempts batch by batch until none are left."""
+
+        finished = 0
+        while True:
+            batch = finish_expired_attempts(batch_size)
+            finished += batch
+            if batch < batch_size:
+                return finished
@@ -0,0 +1,22 @@
+"""Report depth and latency of the grading queue."""
+from django.core.management.base import BaseCommand
+
+from apps.exam.grading import queue_stats
+
+
+class Command(BaseCommand):
+    help = "Print grading job counts by status and recent job latency."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sample-size",
+            type=int,
+            default=1000,
+            help="number of recent done jobs latency is measured on",
+        )
+
+    def handle(self, *args, **options):
+        for name, value in queue_stats(options["sample_size"]).items():
+            if isinstance(value, float):
+                value = f"{value:.2f}"
+            self.stdout.write(f"{name}: {value}")
@@ -0,0 +1,116 @@
+"""Grade finished attempts queued for background grading."""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from apps.exam.grading import (
+    complete_job,
+    fail_job,
+    grade_attempt,
+    init_worker,
+    lease_jobs,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Lease grading jobs and grade their attempts with a pool of "
+        "processes. Jobs are retried with backoff when grading fails."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count(),
+            help="number of grading processes, 0 grades in this process",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="number of jobs leased at once",
+        )
+        parser.add_argument(
+            "--lease-seconds",
+            type=int,
+            default=300,
+            help="seconds before a job leased by a dead worker is retried",
+        )
+        parser.add_argument(
+            "--max-tries",
+            type=int,
+            default=5,
+            help="number of tries before a job is marked failed",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1,
+            help="seconds to wait when the queue is empty",
+        )
+        parser.add_argument(
+            "--burst",
+            action="store_true",
+            help="exit once the queue is empty",
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        pool = None
+        if options["processes"]:
+            pool = ProcessPoolExecutor(
+                max_workers=options["processes"], initializer=init_worker
+            )
+
+        try:
+            while True:
+                jobs = lease_jobs(
+                    options["batch_size"], options["lease_seconds"]
+                )
+                if not jobs:
+                    if options["burst"]:
+                        break
+                    time.sleep(options["interval"])
+                    continue
+
+                self.grade(pool, jobs, options["max_tries"])
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def grade(self, pool, jobs, max_tries):
+        """Grade leased jobs in the pool and record the results."""
+
+        if pool is None:
+            results = [self.run(grade_attempt, job.attempt_id) for job in jobs]
+        else:
+            # Processes forked by the pool mustn't inherit connections.
+            connections.close_all()
+            futures = [
+                pool.submit(grade_attempt, job.attempt_id) for job in jobs
+            ]
+            results = [self.run(future.result) for future in futures]
+
+        done = failed = 0
+        for job, (grade, error) in zip(jobs, results):
+            if error is not None:
+                fail_job(job, repr(error), max_tries)
+                failed += 1
+            else:
+                done += complete_job(job, grade)
+
+        if self.verbosity:
+            self.stdout.write(f"Graded {done} attempts, {failed} failed.")
+
+    @staticmethod
+    def run(func, *args):
+        """Return the result of func and the exception it raised."""
+
+        try:
+            return func(*args), None
+        except Exception as error:
+            return None, error
@@ -0,0 +1,59 @@
+"""Rebuild summaries of finished exam attempts."""
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.exam.models import AttemptSummary, ExamAttempt
+
+
+class Command(BaseCommand):
+    help = (
+        "Write summaries of finished exam attempts shown in profile "
+        "history, replacing existing ones."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="number of attempts summarized in one transaction",
+        )
+
+    def handle(self, *args, **options):
+        rebuilt = 0
+        last_id = 0
+
+        while True:
+            attempts = list(
+                ExamAttempt.objects.filter(
+                    id__gt=last_id, status=ExamAttempt.STATUS_FINISHED
+                ).order_by("id")[: options["batch_size"]]
+            )
+            if not attempts:
+                break
+            last_id = attempts[-1].id
+
+            rebuilt += self.rebuild(attempts)
+
+        self.stdout.write(f"Rebuilt {rebuilt} attempt summaries.")
+
+    def rebuild(self, attempts):
+        """Replace summaries of attempts, return how many were written."""
+
+        exams = defaultdict(list)
+        for attempt_exam in (
+            ExamAttempt.exams.through.objects.filter(examattempt__in=attempts)
+            .select_related("exam__subject")
+            .order_by("exam")
+        ):
+            exams[attempt_exam.examattempt_id].append(attempt_exam.exam)
+
+        with transaction.atomic():
+            AttemptSummary.objects.filter(attempt__in=attempts).delete()
+            AttemptSummary.objects.bulk_create(
+                AttemptSummary.for_attempt(attempt, exams[attempt.id])
+                for attempt in attempts
+            )
+        return len(attempts)
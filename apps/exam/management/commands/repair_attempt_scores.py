@@ -0,0 +1,87 @@
+"""Recompute score counters of exam attempts from their answers."""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.exam.models import AnswerAttempt, ExamAttempt, GradeResult
+from apps.exam.state import invalidate_attempt_state
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute answer correctness and score counters of exam attempts. "
+        "Answers written while a batch is repaired may be overwritten, run "
+        "it when attempts aren't being answered."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="number of attempts repaired in one transaction",
+        )
+
+    def handle(self, *args, **options):
+        repaired = 0
+        last_id = 0
+
+        while True:
+            attempt_ids = list(
+                ExamAttempt.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[: options["batch_size"]]
+            )
+            if not attempt_ids:
+                break
+            last_id = attempt_ids[-1]
+
+            repaired += self.repair(attempt_ids)
+
+        self.stdout.write(f"Repaired {repaired} attempts.")
+
+    def repair(self, attempt_ids):
+        """Recompute counters of attempts, return how many were off."""
+
+        answer_attempts = AnswerAttempt.objects.filter(attempt__in=attempt_ids)
+        empty = GradeResult(0, 0, 0, 0)
+
+        with transaction.atomic():
+            correct_answers = answer_attempts.correct_answers()
+            scores = answer_attempts.scores(correct_answers)
+
+            flipped = []
+            for answer_attempt in answer_attempts.only(
+                "question", "answer_ids", "is_correct"
+            ):
+                is_correct = set(answer_attempt.answer_ids) == (
+                    correct_answers.get(answer_attempt.question_id)
+                )
+                if answer_attempt.is_correct != is_correct:
+                    answer_attempt.is_correct = is_correct
+                    flipped.append(answer_attempt)
+            AnswerAttempt.objects.bulk_update(flipped, ("is_correct",))
+
+            attempts = []
+            for attempt in ExamAttempt.objects.filter(id__in=attempt_ids):
+                if attempt.score == scores.get(attempt.id, empty):
+                    continue
+                (
+                    attempt.answered_count,
+                    attempt.correct_count,
+                    attempt.answered_weight,
+                    attempt.weighted_score,
+                ) = scores.get(attempt.id, empty)
+                attempts.append(attempt)
+
+            ExamAttempt.objects.bulk_update(
+                attempts,
+                (
+                    "answered_count",
+                    "correct_count",
+                    "answered_weight",
+                    "weighted_score",
+                ),
+            )
+            invalidate_attempt_state(*attempt_ids)
+
+        return len(attempts)
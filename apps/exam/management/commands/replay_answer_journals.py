@@ -0,0 +1,55 @@
+"""Write answers left in journals of dead processes."""
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.exam.buffer import JOURNAL_SUFFIX, journal_pid
+from apps.exam.services import replay_answer_journals
+
+
+def is_running(pid):
+    """Check if a process with pid runs on this host."""
+
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class Command(BaseCommand):
+    help = (
+        "Write buffered exam answers journaled by processes that are no "
+        "longer running, e.g. after a crash. Run it before starting workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help=(
+                "replay every journal, including ones of running processes "
+                "and other hosts"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(settings.EXAM_ANSWER_JOURNAL_DIR)
+        paths = sorted(directory.glob(f"*{JOURNAL_SUFFIX}"))
+        if not options["all"]:
+            paths = [
+                path
+                for path in paths
+                if (pid := journal_pid(path)) is not None
+                and not is_running(pid)
+            ]
+
+        written = replay_answer_journals(paths) if paths else 0
+        if options["verbosity"]:
+            self.stdout.write(
+                f"Wrote {written} answers from {len(paths)} journals."
+            )
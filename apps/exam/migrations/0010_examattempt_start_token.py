@@ -0,0 +1,26 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "exam",
+            "0009_alter_answerattempt_options_alter_exam_options_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="start_token",
+            field=models.UUIDField(
+                editable=False,
+                null=True,
+                unique=True,
+                verbose_name="start token",
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:15
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_questions(apps, schema_editor):
+    """Store number of questions of existing attempts."""
+
+    ExamAttempt = apps.get_model("exam", "ExamAttempt")
+    ExamAttempt.objects.update(
+        question_count=Coalesce(
+            Subquery(
+                ExamAttempt.questions.through.objects.filter(
+                    examattempt=OuterRef("pk")
+                )
+                .order_by()
+                .values("examattempt")
+                .annotate(count=Count("*"))
+                .values("count")
+            ),
+            0,
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0010_examattempt_start_token"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="question_count",
+            field=models.IntegerField(
+                default=0, verbose_name="question count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="question_pool_version",
+            field=models.BigIntegerField(
+                editable=False, null=True, verbose_name="question pool version"
+            ),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="question_seed",
+            field=models.IntegerField(
+                editable=False, null=True, verbose_name="question seed"
+            ),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="virtual_questions",
+            field=models.BooleanField(
+                default=False, editable=False, verbose_name="virtual questions"
+            ),
+        ),
+        migrations.RunPython(count_questions, migrations.RunPython.noop),
+    ]
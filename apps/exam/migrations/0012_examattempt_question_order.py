@@ -0,0 +1,29 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:17
+
+from django.db import migrations, models
+
+import apps.core.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0011_examattempt_virtual_questions"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="question_cursor",
+            field=models.IntegerField(
+                default=0, verbose_name="question cursor"
+            ),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="question_order",
+            field=apps.core.fields.IntegerArrayField(
+                default=list, verbose_name="question order"
+            ),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0012_examattempt_question_order"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnswerSubmission",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=64, verbose_name="key")),
+                (
+                    "created",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="created",
+                    ),
+                ),
+                (
+                    "attempt",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="exam.examattempt",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "answer submission",
+                "verbose_name_plural": "answer submissions",
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="answersubmission",
+            constraint=models.UniqueConstraint(
+                fields=("attempt", "key"), name="unique_answer_submission"
+            ),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def count_answers(apps, schema_editor):
+    """
+    Store number and weight of answered questions of existing attempts.
+
+    Correctness needs the answer keys, repair_attempt_scores fills it in.
+    """
+
+    AnswerAttempt = apps.get_model("exam", "AnswerAttempt")
+    ExamAttempt = apps.get_model("exam", "ExamAttempt")
+    answers = (
+        AnswerAttempt.objects.filter(attempt=OuterRef("pk"))
+        .order_by()
+        .values("attempt")
+    )
+    ExamAttempt.objects.update(
+        answered_count=Coalesce(
+            Subquery(answers.annotate(count=Count("*")).values("count")), 0
+        ),
+        answered_weight=Coalesce(
+            Subquery(
+                answers.annotate(weight=Sum("question__weight")).values(
+                    "weight"
+                )
+            ),
+            0,
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0013_answersubmission"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answerattempt",
+            name="is_correct",
+            field=models.BooleanField(
+                default=False, verbose_name="is correct"
+            ),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="answered_count",
+            field=models.IntegerField(
+                default=0, verbose_name="answered count"
+            ),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="answered_weight",
+            field=models.IntegerField(
+                default=0, verbose_name="answered weight"
+            ),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="correct_count",
+            field=models.IntegerField(default=0, verbose_name="correct count"),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="weighted_score",
+            field=models.IntegerField(
+                default=0, verbose_name="weighted score"
+            ),
+        ),
+        migrations.RunPython(count_answers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:26
+
+from django.db import migrations, models
+from django.db.models import Avg, OuterRef, Subquery
+
+
+def snapshot_finished(apps, schema_editor):
+    """Snapshot passing grade and names of already finished attempts."""
+
+    ExamAttempt = apps.get_model("exam", "ExamAttempt")
+    exams = ExamAttempt.exams.through.objects.filter(
+        examattempt=OuterRef("pk")
+    ).order_by("exam")
+    ExamAttempt.objects.filter(status="finished").update(
+        passing_grade=Subquery(
+            exams.order_by()
+            .values("examattempt")
+            .annotate(passing_grade=Avg("exam__passing_grade"))
+            .values("passing_grade")
+        ),
+        subject_name=Subquery(exams.values("exam__subject__name")[:1]),
+        exam_name=Subquery(exams.values("exam__name")[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0014_examattempt_score"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="exam_name",
+            field=models.CharField(
+                blank=True, max_length=1000, verbose_name="exam name"
+            ),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="finished_at",
+            field=models.DateTimeField(
+                editable=False, null=True, verbose_name="finished at"
+            ),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="passing_grade",
+            field=models.FloatField(
+                editable=False, null=True, verbose_name="passing grade"
+            ),
+        ),
+        migrations.AddField(
+            model_name="examattempt",
+            name="subject_name",
+            field=models.CharField(
+                blank=True, max_length=1000, verbose_name="subject name"
+            ),
+        ),
+        migrations.RunPython(snapshot_finished, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:27
+
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def set_ends_at(apps, schema_editor):
+    """Store deadlines of existing attempts in batches."""
+
+    ExamAttempt = apps.get_model("exam", "ExamAttempt")
+    attempts = ExamAttempt.objects.order_by("id").only(
+        "id", "created", "duration_minutes"
+    )
+    last_id = 0
+    while True:
+        batch = list(attempts.filter(id__gt=last_id)[:1000])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for attempt in batch:
+            attempt.ends_at = attempt.created + timedelta(
+                minutes=attempt.duration_minutes
+            )
+        ExamAttempt.objects.bulk_update(batch, ["ends_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0015_examattempt_finish_snapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="ends_at",
+            field=models.DateTimeField(
+                editable=False, null=True, verbose_name="ends at"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="examattempt",
+            index=models.Index(
+                fields=["status", "ends_at"],
+                name="exam_attempt_status_ends_at",
+            ),
+        ),
+        migrations.RunPython(set_ends_at, migrations.RunPython.noop),
+    ]
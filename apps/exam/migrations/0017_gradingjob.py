@@ -0,0 +1,118 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:29
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+
+
+def mark_graded(apps, schema_editor):
+    """Mark attempts finished so far as graded."""
+
+    ExamAttempt = apps.get_model("exam", "ExamAttempt")
+    ExamAttempt.objects.filter(status="finished").update(
+        graded_at=Coalesce(F("finished_at"), F("created"))
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0016_examattempt_ends_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="graded_at",
+            field=models.DateTimeField(
+                editable=False, null=True, verbose_name="graded at"
+            ),
+        ),
+        migrations.CreateModel(
+            name="GradingJob",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pending"),
+                            ("running", "Running"),
+                            ("done", "Done"),
+                            ("failed", "Failed"),
+                        ],
+                        default="pending",
+                        max_length=25,
+                        verbose_name="status",
+                    ),
+                ),
+                (
+                    "tries",
+                    models.IntegerField(default=0, verbose_name="tries"),
+                ),
+                (
+                    "available_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        verbose_name="available at",
+                    ),
+                ),
+                (
+                    "lease_token",
+                    models.CharField(
+                        blank=True, max_length=32, verbose_name="lease token"
+                    ),
+                ),
+                (
+                    "leased_until",
+                    models.DateTimeField(
+                        null=True, verbose_name="leased until"
+                    ),
+                ),
+                (
+                    "created",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now,
+                        editable=False,
+                        verbose_name="created",
+                    ),
+                ),
+                (
+                    "finished_at",
+                    models.DateTimeField(
+                        null=True, verbose_name="finished at"
+                    ),
+                ),
+                ("error", models.TextField(blank=True, verbose_name="error")),
+                (
+                    "attempt",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="exam.examattempt",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "grading job",
+                "verbose_name_plural": "grading jobs",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="gradingjob",
+            index=models.Index(
+                fields=["status", "available_at"],
+                name="grading_job_status_available",
+            ),
+        ),
+        migrations.RunPython(mark_graded, migrations.RunPython.noop),
+    ]
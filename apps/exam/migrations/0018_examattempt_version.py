@@ -0,0 +1,20 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0017_gradingjob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="version",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="version"
+            ),
+        ),
+    ]
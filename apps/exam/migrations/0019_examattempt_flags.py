@@ -0,0 +1,78 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:39
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def pack_bits(positions):
+    """Pack a set of non-negative positions into a little-endian bitset."""
+
+    positions = set(positions)
+    if not positions:
+        return b""
+
+    packed = bytearray(max(positions) // 8 + 1)
+    for position in positions:
+        packed[position // 8] |= 1 << position % 8
+    return bytes(packed)
+
+
+def question_ids(attempt):
+    """Return question ids of attempt the way ExamAttempt does."""
+
+    if attempt.question_order:
+        return list(attempt.question_order)
+    return list(attempt.questions.values_list("id", flat=True))
+
+
+def pack_flags(apps, schema_editor):
+    """Turn flagged question rows into flag bitsets of attempts."""
+
+    ExamAttempt = apps.get_model("exam", "ExamAttempt")
+    flagged = defaultdict(set)
+    for (
+        attempt_id,
+        question_id,
+    ) in ExamAttempt.flagged_questions.through.objects.values_list(
+        "examattempt_id", "question_id"
+    ):
+        flagged[attempt_id].add(question_id)
+
+    attempts = []
+    for attempt in ExamAttempt.objects.filter(id__in=flagged):
+        positions = {
+            question_id: position
+            for position, question_id in enumerate(
+                sorted(question_ids(attempt))
+            )
+        }
+        attempt.flags = pack_bits(
+            positions[question_id]
+            for question_id in flagged[attempt.id]
+            if question_id in positions
+        )
+        attempts.append(attempt)
+    ExamAttempt.objects.bulk_update(attempts, ["flags"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0018_examattempt_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="flags",
+            field=models.BinaryField(
+                default=bytes, editable=False, verbose_name="flags"
+            ),
+        ),
+        migrations.RunPython(pack_flags, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="examattempt",
+            name="flagged_questions",
+        ),
+    ]
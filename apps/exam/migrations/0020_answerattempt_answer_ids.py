@@ -0,0 +1,92 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:41
+
+from collections import defaultdict
+
+from django.db import migrations
+
+import apps.core.fields
+
+BATCH_SIZE = 10000
+
+
+def answer_attempt_batches(AnswerAttempt):
+    """Yield (first id, last id) ranges of answer attempts."""
+
+    last_id = 0
+    while True:
+        ids = list(
+            AnswerAttempt.objects.filter(id__gt=last_id)
+            .order_by("id")
+            .values_list("id", flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            break
+        yield ids[0], ids[-1]
+        last_id = ids[-1]
+
+
+def pack_answers(apps, schema_editor):
+    """Copy picked answers into answer_ids in batches."""
+
+    AnswerAttempt = apps.get_model("exam", "AnswerAttempt")
+    Picked = AnswerAttempt.answers.through
+    for first_id, last_id in answer_attempt_batches(AnswerAttempt):
+        picked = defaultdict(list)
+        for answer_attempt_id, answer_id in (
+            Picked.objects.filter(
+                answerattempt_id__gte=first_id, answerattempt_id__lte=last_id
+            )
+            .order_by("answerattempt_id", "answer_id")
+            .values_list("answerattempt_id", "answer_id")
+        ):
+            picked[answer_attempt_id].append(answer_id)
+
+        answer_attempts = list(
+            AnswerAttempt.objects.filter(id__in=picked).only("id")
+        )
+        for answer_attempt in answer_attempts:
+            answer_attempt.answer_ids = picked[answer_attempt.id]
+        AnswerAttempt.objects.bulk_update(
+            answer_attempts, ["answer_ids"], batch_size=1000
+        )
+
+
+def unpack_answers(apps, schema_editor):
+    """Copy answer_ids back into the picked answers table in batches."""
+
+    AnswerAttempt = apps.get_model("exam", "AnswerAttempt")
+    Picked = AnswerAttempt.answers.through
+    for first_id, last_id in answer_attempt_batches(AnswerAttempt):
+        answer_attempts = AnswerAttempt.objects.filter(
+            id__gte=first_id, id__lte=last_id
+        ).values_list("id", "answer_ids")
+        Picked.objects.bulk_create(
+            (
+                Picked(answerattempt_id=answer_attempt_id, answer_id=answer_id)
+                for answer_attempt_id, answer_ids in answer_attempts
+                for answer_id in answer_ids
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0019_examattempt_flags"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="answerattempt",
+            name="answer_ids",
+            field=apps.core.fields.IntegerArrayField(
+                default=list, verbose_name="answer ids"
+            ),
+        ),
+        migrations.RunPython(pack_answers, unpack_answers),
+        migrations.RemoveField(
+            model_name="answerattempt",
+            name="answers",
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:48
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+from django.db.models.functions import Coalesce
+
+BATCH_SIZE = 1000
+
+
+def drop_duplicates(apps, schema_editor):
+    """
+    Keep the latest answer attempt of every question in an attempt.
+
+    Duplicates were counted in score counters of their attempts, so the
+    counters of those attempts are recomputed from the remaining answers.
+    """
+
+    AnswerAttempt = apps.get_model("exam", "AnswerAttempt")
+    ExamAttempt = apps.get_model("exam", "ExamAttempt")
+
+    duplicates = list(
+        AnswerAttempt.objects.values("attempt", "question")
+        .annotate(count=Count("id"), last_id=Max("id"))
+        .filter(count__gt=1)
+        .values_list("attempt", "question", "last_id")
+    )
+    while duplicates:
+        batch, duplicates = duplicates[:BATCH_SIZE], duplicates[BATCH_SIZE:]
+        stale = Q()
+        for attempt_id, question_id, last_id in batch:
+            stale |= Q(attempt=attempt_id, question=question_id) & ~Q(
+                id=last_id
+            )
+        AnswerAttempt.objects.filter(stale).delete()
+
+        attempt_ids = {attempt_id for attempt_id, _, _ in batch}
+        scores = {
+            row.pop("attempt"): row
+            for row in AnswerAttempt.objects.filter(attempt__in=attempt_ids)
+            .order_by()
+            .values("attempt")
+            .annotate(
+                answered_count=Count("id"),
+                correct_count=Count("id", filter=Q(is_correct=True)),
+                answered_weight=Coalesce(Sum("question__weight"), 0),
+                weighted_score=Coalesce(
+                    Sum("question__weight", filter=Q(is_correct=True)), 0
+                ),
+            )
+        }
+        for attempt_id, score in scores.items():
+            ExamAttempt.objects.filter(id=attempt_id).update(**score)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0020_answerattempt_answer_ids"),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="answerattempt",
+            constraint=models.UniqueConstraint(
+                fields=("attempt", "question"), name="unique_answer_attempt"
+            ),
+        ),
+    ]
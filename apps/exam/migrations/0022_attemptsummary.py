@@ -0,0 +1,89 @@
+# Generated by Django 4.0.1 on 2026-10-18 08:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+import apps.core.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("exam", "0021_unique_answer_attempt"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AttemptSummary",
+            fields=[
+                (
+                    "attempt",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="exam.examattempt",
+                    ),
+                ),
+                ("created", models.DateTimeField(verbose_name="created")),
+                (
+                    "mode",
+                    models.CharField(
+                        choices=[
+                            ("practice", "Practice mode"),
+                            ("exam", "Exam mode"),
+                        ],
+                        max_length=30,
+                        verbose_name="mode",
+                    ),
+                ),
+                (
+                    "subject_name",
+                    models.CharField(
+                        blank=True,
+                        max_length=1000,
+                        verbose_name="subject name",
+                    ),
+                ),
+                (
+                    "exam_ids",
+                    apps.core.fields.IntegerArrayField(
+                        default=list, verbose_name="exam ids"
+                    ),
+                ),
+                (
+                    "exam_names",
+                    models.TextField(blank=True, verbose_name="exam names"),
+                ),
+                (
+                    "grade",
+                    models.IntegerField(default=0, verbose_name="grade"),
+                ),
+                (
+                    "passed",
+                    models.BooleanField(default=False, verbose_name="passed"),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "attempt summary",
+                "verbose_name_plural": "attempt summaries",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="attemptsummary",
+            index=models.Index(
+                fields=["user", "mode", "-created"],
+                name="attempt_summary_history",
+            ),
+        ),
+    ]
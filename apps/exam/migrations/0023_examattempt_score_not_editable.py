@@ -0,0 +1,41 @@
+# Generated by Django 4.0.1 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0022_attemptsummary"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="examattempt",
+            name="answered_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="answered count"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="examattempt",
+            name="answered_weight",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="answered weight"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="examattempt",
+            name="correct_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="correct count"
+            ),
+        ),
+        migrations.AlterField(
+            model_name="examattempt",
+            name="weighted_score",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="weighted score"
+            ),
+        ),
+    ]
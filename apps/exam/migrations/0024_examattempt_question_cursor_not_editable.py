@@ -0,0 +1,20 @@
+# Generated by Django 4.0.1 on 2026-10-18 08:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0023_examattempt_score_not_editable"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="examattempt",
+            name="question_cursor",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="question cursor"
+            ),
+        ),
+    ]
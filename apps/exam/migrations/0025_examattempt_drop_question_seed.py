@@ -0,0 +1,102 @@
+# Generated by Django 4.0.1 on 2026-10-18 08:38
+
+from django.db import migrations, models
+from django.db.models import Count, F, IntegerField, Value
+
+# Sampling of virtual question sets as of this migration. Attempts that
+# were compacted before their question ids were kept get them stored once,
+# before the seed and pool version they were regenerated from are dropped.
+SAMPLE_MODULUS = 2147483647
+SAMPLE_MULTIPLIER = 48271
+
+
+def allocate(sizes, count):
+    """Split count between exams with the largest remainder method."""
+
+    total = sum(sizes.values())
+    if count >= total:
+        return dict(sizes)
+
+    allocation = {}
+    remainders = []
+    for exam_id, size in sizes.items():
+        allocation[exam_id], remainder = divmod(count * size, total)
+        remainders.append((-remainder, exam_id))
+
+    for _, exam_id in sorted(remainders)[: count - sum(allocation.values())]:
+        allocation[exam_id] += 1
+
+    return allocation
+
+
+def sample(Question, exam_ids, count, seed, pool_version):
+    """Return question ids of a seeded sample in sample order."""
+
+    pool = Question.objects.filter(exam_id__in=exam_ids)
+    if pool_version is not None:
+        pool = pool.filter(id__lte=pool_version)
+    sizes = dict(
+        pool.order_by().values_list("exam").annotate(size=Count("id"))
+    )
+
+    seed = Value(seed, output_field=IntegerField())
+    mixed = (F("id") * SAMPLE_MULTIPLIER + seed) % SAMPLE_MODULUS
+    key = (mixed * mixed + seed) % SAMPLE_MODULUS
+    picked = []
+    for exam_id, size in allocate(sizes, count).items():
+        if size:
+            picked.extend(
+                pool.filter(exam_id=exam_id)
+                .annotate(sample_key=key)
+                .order_by("sample_key", "id")
+                .values_list("sample_key", "id")[:size]
+            )
+    return [question_id for _, question_id in sorted(picked)]
+
+
+def store_question_order(apps, schema_editor):
+    """Store question ids of virtual attempts kept only as a seed."""
+
+    ExamAttempt = apps.get_model("exam", "ExamAttempt")
+    Question = apps.get_model("question", "Question")
+    for attempt in ExamAttempt.objects.filter(
+        virtual_questions=True, question_order=[]
+    ).iterator():
+        attempt.question_order = sample(
+            Question,
+            sorted(attempt.exams.values_list("id", flat=True)),
+            attempt.question_count,
+            attempt.question_seed or 0,
+            attempt.question_pool_version,
+        )
+        attempt.save(update_fields=["question_order"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("exam", "0024_examattempt_question_cursor_not_editable"),
+        (
+            "question",
+            "0005_alter_answer_options_alter_question_options_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.RunPython(store_question_order, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="examattempt",
+            name="question_pool_version",
+        ),
+        migrations.RemoveField(
+            model_name="examattempt",
+            name="question_seed",
+        ),
+        migrations.AlterField(
+            model_name="examattempt",
+            name="question_count",
+            field=models.IntegerField(
+                default=0, editable=False, verbose_name="question count"
+            ),
+        ),
+    ]
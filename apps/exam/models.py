@@ -1,11 +1,22 @@
 """Exam models."""
+import random
+from collections import namedtuple
 from datetime import timedelta
+from itertools import takewhile
 
 from django.conf import settings
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from apps.core.fields import IntegerArrayField
+from apps.core.packing import pack_bits, unpack_bits
+from apps.exam.events import EVENT_FINISHED, attempt_events
+from apps.exam.state import invalidate_attempt_state
+from apps.question.cache import answer_keys
+from apps.question.models import Question
+
 
 class Subject(models.Model):
     """Subject model."""
@@ -88,11 +99,60 @@ class ExamAttempt(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL, on_delete=models.CASCADE
     )
+    start_token = models.UUIDField(
+        verbose_name=_("start token"),
+        null=True,
+        unique=True,
+        editable=False,
+    )
     exams = models.ManyToManyField(Exam)
 
+    question_count = models.IntegerField(
+        verbose_name=_("question count"), default=0, editable=False
+    )
+    virtual_questions = models.BooleanField(
+        verbose_name=_("virtual questions"), default=False, editable=False
+    )
+    question_order = IntegerArrayField(verbose_name=_("question order"))
+    question_cursor = models.IntegerField(
+        verbose_name=_("question cursor"), default=0, editable=False
+    )
+    version = models.IntegerField(
+        verbose_name=_("version"), default=0, editable=False
+    )
+    answered_count = models.IntegerField(
+        verbose_name=_("answered count"), default=0, editable=False
+    )
+    correct_count = models.IntegerField(
+        verbose_name=_("correct count"), default=0, editable=False
+    )
+    answered_weight = models.IntegerField(
+        verbose_name=_("answered weight"), default=0, editable=False
+    )
+    weighted_score = models.IntegerField(
+        verbose_name=_("weighted score"), default=0, editable=False
+    )
+    ends_at = models.DateTimeField(
+        verbose_name=_("ends at"), null=True, editable=False
+    )
+    finished_at = models.DateTimeField(
+        verbose_name=_("finished at"), null=True, editable=False
+    )
+    graded_at = models.DateTimeField(
+        verbose_name=_("graded at"), null=True, editable=False
+    )
+    passing_grade = models.FloatField(
+        verbose_name=_("passing grade"), null=True, editable=False
+    )
+    subject_name = models.CharField(
+        verbose_name=_("subject name"), max_length=1000, blank=True
+    )
+    exam_name = models.CharField(
+        verbose_name=_("exam name"), max_length=1000, blank=True
+    )
     questions = models.ManyToManyField("question.Question")
-    flagged_questions = models.ManyToManyField(
-        "question.Question", related_name="flagged_questions"
+    flags = models.BinaryField(
+        verbose_name=_("flags"), default=bytes, editable=False
     )
 
     class Meta:
@@ -100,6 +160,12 @@ class ExamAttempt(models.Model):
 
         verbose_name = _("exam attempt")
         verbose_name_plural = _("exam attempts")
+        indexes = [
+            models.Index(
+                fields=("status", "ends_at"),
+                name="exam_attempt_status_ends_at",
+            )
+        ]
 
     def __str__(self):
         return _("<ExamAttempt>: id# {id}").format(id=self.id)
@@ -108,19 +174,182 @@ class ExamAttempt(models.Model):
     def all_questions_answered(self):
         """Check if user answered all questions in current exam attempt."""
 
-        return (
-            AnswerAttempt.objects.filter(attempt=self.id).count()
-            == self.questions.count()
-        )
+        return self.answered_count >= self.question_count
 
     @property
     def answered_question_ids(self):
         """Return all answered question ids for attempt."""
+        return list(
+            AnswerAttempt.objects.filter(attempt=self.id)
+            .order_by("id")
+            .values_list("question_id", flat=True)
+        )
+
+    def question_ids(self):
+        """
+        Return ids of questions in current exam attempt.
+
+        They come from the delivery order when the attempt has one,
+        otherwise from the questions table.
+        """
+
+        if self.question_order:
+            return list(self.question_order)
+
+        return list(self.questions.order_by("id").values_list("id", flat=True))
+
+    def question_positions(self):
+        """
+        Return a dict of question id to its position in the attempt.
+
+        Positions follow question ids rather than the delivery order,
+        which is only stored once questions start being delivered.
+        """
+
+        return {
+            question_id: position
+            for position, question_id in enumerate(sorted(self.question_ids()))
+        }
+
+    @property
+    def flagged_question_ids(self):
+        """Return ids of flagged questions."""
+
+        question_ids = sorted(self.question_ids())
         return [
-            answer_attempt.question.id
-            for answer_attempt in AnswerAttempt.objects.filter(attempt=self.id)
+            question_ids[position]
+            for position in unpack_bits(self.flags)
+            if position < len(question_ids)
         ]
 
+    def toggle_flag(self, question_id):
+        """
+        Flag a question of the attempt or remove its flag.
+
+        The flag bitset is written with a compare-and-set on version, a
+        concurrent change of the attempt makes it retry on fresh flags.
+        Return whether the question is flagged now, raise
+        Question.DoesNotExist for questions not in the attempt.
+        """
+
+        position = self.question_positions().get(question_id)
+        if position is None:
+            raise Question.DoesNotExist
+
+        while True:
+            positions = set(unpack_bits(self.flags))
+            flagged = position not in positions
+            positions.symmetric_difference_update({position})
+            flags = pack_bits(positions)
+            if ExamAttempt.objects.filter(
+                pk=self.pk, version=self.version
+            ).update(flags=flags, version=F("version") + 1):
+                invalidate_attempt_state(self.pk)
+                self.flags = flags
+                self.version += 1
+                return flagged
+            self.refresh_from_db(fields=["flags", "version"])
+
+    def get_questions(self):
+        """Return a queryset of questions in current exam attempt."""
+
+        if self.virtual_questions:
+            return Question.objects.filter(id__in=self.question_ids())
+
+        return self.questions.all()
+
+    def ensure_question_order(self):
+        """
+        Store a delivery order for attempts created without one.
+
+        Already answered questions come first, in the order they were
+        answered, followed by the rest shuffled.
+        """
+
+        if self.question_order:
+            return
+
+        question_ids = self.question_ids()
+        answered = [
+            question_id
+            for question_id in dict.fromkeys(self.answered_question_ids)
+            if question_id in question_ids
+        ]
+        unanswered = list(set(question_ids).difference(answered))
+        random.shuffle(unanswered)
+
+        self.question_order = answered + unanswered
+        self.question_cursor = len(answered)
+        ExamAttempt.objects.filter(pk=self.pk).update(
+            question_order=self.question_order,
+            question_cursor=self.question_cursor,
+            version=F("version") + 1,
+        )
+        invalidate_attempt_state(self.pk)
+        self.version += 1
+
+    def next_question_id(self):
+        """
+        Return id of the next question to deliver.
+
+        Return None when every question has been delivered.
+        """
+
+        self.ensure_question_order()
+        if self.question_cursor < len(self.question_order):
+            return self.question_order[self.question_cursor]
+        return None
+
+    def advance_cursor(self, question_id):
+        """Move the cursor past question_id if it's being delivered."""
+
+        cursor = self.question_cursor
+        if self.next_question_id() != question_id:
+            return
+
+        if ExamAttempt.objects.filter(
+            pk=self.pk, question_cursor=cursor
+        ).update(question_cursor=cursor + 1, version=F("version") + 1):
+            invalidate_attempt_state(self.pk)
+            self.question_cursor = cursor + 1
+            self.version += 1
+
+    def skip_deleted_questions(self):
+        """
+        Move the cursor past questions deleted since the attempt started.
+
+        Return ids of deleted questions still to deliver, those behind
+        questions left at the cursor are skipped when they're reached.
+        """
+
+        self.ensure_question_order()
+        cursor = self.question_cursor
+        remaining = self.question_order[cursor:]
+        deleted = set(remaining).difference(
+            Question.objects.filter(id__in=remaining).values_list(
+                "id", flat=True
+            )
+        )
+        skipped = len(list(takewhile(deleted.__contains__, remaining)))
+
+        if skipped and ExamAttempt.objects.filter(
+            pk=self.pk, question_cursor=cursor
+        ).update(question_cursor=cursor + skipped, version=F("version") + 1):
+            invalidate_attempt_state(self.pk)
+            self.question_cursor = cursor + skipped
+            self.version += 1
+        return deleted
+
+    @property
+    def is_finished(self):
+        """Check if exam attempt is finished."""
+        return self.status == self.STATUS_FINISHED
+
+    @property
+    def is_grading_pending(self):
+        """Check if finished attempt waits for a grading job."""
+        return self.is_finished and self.graded_at is None
+
     @property
     def is_in_exam_mode(self):
         """Check if exam attempt mode is exam."""
@@ -145,61 +374,262 @@ class ExamAttempt(models.Model):
     def passed(self):
         """Check if user passed exam."""
 
-        passing_grade = (
-            sum([exam.passing_grade for exam in self.exams.all()])
-            / self.exams.count()
-        )
+        passing_grade = self.passing_grade
+        if passing_grade is None:
+            passing_grade = (
+                sum([exam.passing_grade for exam in self.exams.all()])
+                / self.exams.count()
+            )
         return self.grade >= passing_grade
 
+    @property
+    def deadline(self):
+        """Return the time exam attempt ends at."""
+
+        return self.ends_at or self.created + timedelta(
+            minutes=self.duration_minutes
+        )
+
     @property
     def time_left_seconds(self):
         """Calculate how much time left in exam attempt until the end."""
 
-        end_time = self.created + timedelta(minutes=self.duration_minutes)
-        time_left = end_time - timezone.now()
+        time_left = self.deadline - timezone.now()
         return max(int(time_left.total_seconds()), 0)
 
-    def calculate_grade(self):
-        """Calculate the grade for an attempt."""
+    @property
+    def score(self):
+        """Return the score kept up to date by answer writes."""
+
+        return GradeResult(
+            self.answered_count,
+            self.correct_count,
+            self.answered_weight,
+            self.weighted_score,
+        )
 
-        correct_answer_count = 0
-        grade = 0
-        answer_attempts = AnswerAttempt.objects.filter(attempt=self.id)
-        question_ids = [a.question.id for a in answer_attempts]
+    def add_to_score(
+        self, answered=0, correct=0, answered_weight=0, weighted_score=0
+    ):
+        """Atomically add deltas to the score counters and bump version."""
+
+        ExamAttempt.objects.filter(pk=self.pk).update(
+            version=F("version") + 1,
+            answered_count=F("answered_count") + answered,
+            correct_count=F("correct_count") + correct,
+            answered_weight=F("answered_weight") + answered_weight,
+            weighted_score=F("weighted_score") + weighted_score,
+        )
+        invalidate_attempt_state(self.pk)
+        self.version += 1
+        self.answered_count += answered
+        self.correct_count += correct
+        self.answered_weight += answered_weight
+        self.weighted_score += weighted_score
+
+    def finish_result(self, exams, score):
+        """
+        Return field values of the attempt finished with score.
 
-        for answer_attempt in (
-            AnswerAttempt.objects.filter(
-                question_id__in=question_ids, attempt=self.id
-            )
-            .select_related("question")
-            .prefetch_related("answers")
-        ):
+        With EXAM_BACKGROUND_GRADING the attempt is left for a grading
+        job, which sets graded_at.
+        """
 
-            if set((a.id for a in answer_attempt.answers.all())) == set(
-                answer_attempt.question.correct_answer_ids()
-            ):
-                correct_answer_count += 1
+        now = timezone.now()
+        background = settings.EXAM_BACKGROUND_GRADING
+        return {
+            "status": self.STATUS_FINISHED,
+            "finished_at": now,
+            "graded_at": None if background else now,
+            "grade": 0 if background else score.grade,
+            "passing_grade": (
+                sum(exam.passing_grade for exam in exams) / len(exams)
+                if exams
+                else 0
+            ),
+            "subject_name": exams[0].subject.name if exams else "",
+            "exam_name": exams[0].name if exams else "",
+        }
+
+    def finish(self):
+        """
+        Move the attempt from in progress to finished.
 
-            answer_attempt_count = answer_attempts.count()
-            if answer_attempt_count:
-                grade = round(
-                    correct_answer_count / answer_attempt_count * 100
-                )
+        The grade comes from the score counters, the passing grade and
+        exam names are snapshotted, so the result never changes after
+        finishing. The transition is a compare-and-set on status, only
+        one of concurrent calls performs it and writes the summary of
+        the attempt. Return True if this call finished the attempt.
+        """
 
-        self.grade = grade
-        self.save()
-        return grade
+        if self.is_finished:
+            return False
+
+        exams = list(self.exams.select_related("subject").order_by("pk"))
+        counters = (
+            ExamAttempt.objects.filter(pk=self.pk)
+            .values_list(
+                "answered_count",
+                "correct_count",
+                "answered_weight",
+                "weighted_score",
+            )
+            .get()
+        )
+        result = self.finish_result(exams, GradeResult(*counters))
+
+        with transaction.atomic():
+            finished = ExamAttempt.objects.filter(
+                pk=self.pk, status=self.STATUS_IN_PROGRESS
+            ).update(version=F("version") + 1, **result)
+            if finished:
+                invalidate_attempt_state(self.pk)
+                attempt_events.publish_on_commit(self.id, EVENT_FINISHED, {})
+                for field, value in result.items():
+                    setattr(self, field, value)
+                self.version += 1
+                AttemptSummary.for_attempt(self, exams).save(force_insert=True)
+            if finished and result["graded_at"] is None:
+                GradingJob.objects.create(attempt=self)
+        if not finished:
+            self.refresh_from_db(fields=[*result, "version"])
+        return bool(finished)
+
+    def calculate_grade(self):
+        """Calculate the grade for an attempt from its answers."""
+
+        self.grade = (
+            AnswerAttempt.objects.filter(attempt=self.id).score().grade
+        )
+        self.save(update_fields=["grade"])
+        return self.grade
 
     def save(self, *args, **kwargs):
         """
         Add user required extra time to attempt duration
         and save attempt.
+
+        Saving an existing attempt bumps its version like other changes,
+        e.g. extending the deadline or writing the grade.
         """
 
-        if not self.id:
+        version = self.version
+        existing = bool(self.id)
+        if not existing:
             self.duration_minutes += self.user.required_extra_time
+        else:
+            self.version = F("version") + 1
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                update_fields = {*update_fields, "version"}
+                if "duration_minutes" in update_fields:
+                    update_fields.add("ends_at")
+                kwargs["update_fields"] = update_fields
+        self.ends_at = self.created + timedelta(minutes=self.duration_minutes)
 
         super().save(*args, **kwargs)
+        invalidate_attempt_state(self.pk)
+        if existing:
+            self.version = version + 1
+
+
+class GradeResult(
+    namedtuple(
+        "GradeResult",
+        ("answered", "correct", "answered_weight", "correct_weight"),
+    )
+):
+    """Aggregated score of answer attempts."""
+
+    @property
+    def grade(self):
+        """Return weighted percentage of correctly answered questions."""
+
+        if not self.answered_weight:
+            return 0
+        return round(self.correct_weight / self.answered_weight * 100)
+
+
+class AnswerAttemptQuerySet(models.QuerySet):
+    """Answer attempt queryset with grading against answer keys."""
+
+    def correct_answers(self):
+        """
+        Return correct answer ids of the answered questions.
+
+        They're read from the database with a single query, for callers
+        that can't rely on the answer key cache. Return a dict of question
+        id to a frozenset of answer ids.
+        """
+
+        correct = {}
+        for question_id, answer_id, is_correct in Question.objects.filter(
+            id__in=self.values("question")
+        ).values_list("id", "options__answer", "options__is_correct"):
+            correct.setdefault(question_id, set())
+            if is_correct:
+                correct[question_id].add(answer_id)
+        return {
+            question_id: frozenset(answer_ids)
+            for question_id, answer_ids in correct.items()
+        }
+
+    def scores(self, correct_answers=None):
+        """
+        Grade answer attempts of many exam attempts.
+
+        Picked answers are read with one query, correct ones come from
+        correct_answers, a dict of question id to correct answer ids, or
+        from the answer key cache. Return a dict of exam attempt id to
+        GradeResult.
+        """
+
+        scores = {}
+        for (
+            attempt_id,
+            question_id,
+            exam_id,
+            weight,
+            answer_ids,
+        ) in self.order_by().values_list(
+            "attempt",
+            "question",
+            "question__exam",
+            "question__weight",
+            "answer_ids",
+        ):
+            if correct_answers is None:
+                correct = answer_keys.get(exam_id).get(question_id)
+            else:
+                correct = correct_answers.get(question_id)
+            is_correct = set(answer_ids) == correct
+
+            answered, right, answered_weight, right_weight = scores.get(
+                attempt_id, (0, 0, 0, 0)
+            )
+            scores[attempt_id] = (
+                answered + 1,
+                right + is_correct,
+                answered_weight + weight,
+                right_weight + is_correct * weight,
+            )
+
+        return {
+            attempt_id: GradeResult(*score)
+            for attempt_id, score in scores.items()
+        }
+
+    def score(self, correct_answers=None):
+        """Grade answer attempts as a whole, see scores()."""
+
+        return GradeResult(
+            *(
+                sum(values)
+                for values in zip(
+                    (0, 0, 0, 0), *self.scores(correct_answers).values()
+                )
+            )
+        )
 
 
 class AnswerAttempt(models.Model):
@@ -208,13 +638,167 @@ class AnswerAttempt(models.Model):
     attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE)
     question = models.ForeignKey("question.Question", on_delete=models.CASCADE)
 
-    answers = models.ManyToManyField("question.Answer")
+    answer_ids = IntegerArrayField(verbose_name=_("answer ids"))
+    is_correct = models.BooleanField(
+        verbose_name=_("is correct"), default=False
+    )
+
+    objects = AnswerAttemptQuerySet.as_manager()
 
     class Meta:
         """Meta class for Answer Attempt model."""
 
         verbose_name = _("answer attempt")
         verbose_name_plural = _("answer attempts")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("attempt", "question"), name="unique_answer_attempt"
+            )
+        ]
 
     def __str__(self):
         return _("<AnswerAttempt>: id# {id}").format(id=self.id)
+
+
+class AnswerSubmission(models.Model):
+    """Idempotency key of answers submitted to an exam attempt."""
+
+    attempt = models.ForeignKey(ExamAttempt, on_delete=models.CASCADE)
+    key = models.CharField(verbose_name=_("key"), max_length=64)
+    created = models.DateTimeField(
+        verbose_name=_("created"), default=timezone.now, editable=False
+    )
+
+    class Meta:
+        """Meta class for Answer Submission model."""
+
+        verbose_name = _("answer submission")
+        verbose_name_plural = _("answer submissions")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("attempt", "key"), name="unique_answer_submission"
+            )
+        ]
+
+    def __str__(self):
+        return _("<AnswerSubmission>: {key}").format(key=self.key)
+
+
+class GradingJob(models.Model):
+    """Job grading a finished exam attempt in the background."""
+
+    STATUS_PENDING = "pending"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATUSES = (
+        (STATUS_PENDING, _("Pending")),
+        (STATUS_RUNNING, _("Running")),
+        (STATUS_DONE, _("Done")),
+        (STATUS_FAILED, _("Failed")),
+    )
+
+    attempt = models.OneToOneField(ExamAttempt, on_delete=models.CASCADE)
+    status = models.CharField(
+        verbose_name=_("status"),
+        max_length=25,
+        default=STATUS_PENDING,
+        choices=STATUSES,
+    )
+    tries = models.IntegerField(verbose_name=_("tries"), default=0)
+    available_at = models.DateTimeField(
+        verbose_name=_("available at"), default=timezone.now
+    )
+    lease_token = models.CharField(
+        verbose_name=_("lease token"), max_length=32, blank=True
+    )
+    leased_until = models.DateTimeField(
+        verbose_name=_("leased until"), null=True
+    )
+    created = models.DateTimeField(
+        verbose_name=_("created"), default=timezone.now, editable=False
+    )
+    finished_at = models.DateTimeField(
+        verbose_name=_("finished at"), null=True
+    )
+    error = models.TextField(verbose_name=_("error"), blank=True)
+
+    class Meta:
+        """Meta class for Grading Job model."""
+
+        verbose_name = _("grading job")
+        verbose_name_plural = _("grading jobs")
+        indexes = [
+            models.Index(
+                fields=("status", "available_at"),
+                name="grading_job_status_available",
+            )
+        ]
+
+    def __str__(self):
+        return _("<GradingJob>: id# {id}").format(id=self.id)
+
+
+class AttemptSummary(models.Model):
+    """
+    Header of a finished exam attempt for history pages.
+
+    Summaries copy what lists of attempts show, so a page of them is read
+    with a single query. They're written when attempts finish, see the
+    rebuild_attempt_summaries command for older attempts.
+    """
+
+    attempt = models.OneToOneField(
+        ExamAttempt,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="summary",
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE
+    )
+    created = models.DateTimeField(verbose_name=_("created"))
+    mode = models.CharField(
+        verbose_name=_("mode"),
+        max_length=30,
+        choices=ExamAttempt.EXAM_MODES,
+    )
+    subject_name = models.CharField(
+        verbose_name=_("subject name"), max_length=1000, blank=True
+    )
+    exam_ids = IntegerArrayField(verbose_name=_("exam ids"))
+    exam_names = models.TextField(verbose_name=_("exam names"), blank=True)
+    grade = models.IntegerField(verbose_name=_("grade"), default=0)
+    passed = models.BooleanField(verbose_name=_("passed"), default=False)
+
+    class Meta:
+        """Meta class for Attempt Summary model."""
+
+        verbose_name = _("attempt summary")
+        verbose_name_plural = _("attempt summaries")
+        indexes = [
+            models.Index(
+                fields=("user", "mode", "-created"),
+                name="attempt_summary_history",
+            )
+        ]
+
+    def __str__(self):
+        return _("<AttemptSummary>: id# {id}").format(id=self.attempt_id)
+
+    @classmethod
+    def for_attempt(cls, attempt, exams):
+        """Return an unsaved summary of a finished attempt of exams."""
+
+        return cls(
+            attempt_id=attempt.id,
+            user_id=attempt.user_id,
+            created=attempt.created,
+            mode=attempt.mode,
+            subject_name=exams[0].subject.name if exams else "",
+            exam_ids=[exam.id for exam in exams],
+            exam_names=", ".join(exam.name for exam in exams),
+            grade=attempt.grade,
+            passed=attempt.grade >= (attempt.passing_grade or 0),
+        )
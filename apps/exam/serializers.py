@@ -33,14 +33,21 @@ class ExamAttemptSerializer(serializers.ModelSerializer):
 
     answer_attempts = serializers.SerializerMethodField()
     attempt_duration_minutes = serializers.SerializerMethodField()
+    flagged_questions = serializers.SerializerMethodField()
     mode = serializers.SerializerMethodField()
     question_count = serializers.SerializerMethodField()
+    questions = serializers.SerializerMethodField()
     time_left_seconds = serializers.SerializerMethodField()
 
     def get_question_count(self, obj):
         """Return number of questions in current exam attempt."""
 
-        return obj.questions.count()
+        return obj.question_count
+
+    def get_questions(self, obj):
+        """Return question ids in current exam attempt."""
+
+        return obj.question_ids()
 
     def get_time_left_seconds(self, obj):
         """Return time left in seconds for current exam attempt."""
@@ -60,6 +67,11 @@ class ExamAttemptSerializer(serializers.ModelSerializer):
             for obj in obj.answerattempt_set.all()
         ]
 
+    def get_flagged_questions(self, obj):
+        """Return ids of flagged questions in current exam attempt."""
+
+        return obj.flagged_question_ids
+
     def get_mode(self, obj):
         return obj.mode
 
@@ -76,3 +88,61 @@ class ExamAttemptSerializer(serializers.ModelSerializer):
             "question_count",
             "user",
         )
+
+
+class ExamAttemptSnapshotSerializer(serializers.ModelSerializer):
+    """
+    Compact ExamAttempt Serializer.
+
+    Related objects are plain lists of ids. Pass `fields` to serialize
+    only some of the fields.
+    """
+
+    answered_questions = serializers.SerializerMethodField()
+    ends_at = serializers.SerializerMethodField()
+    flagged_questions = serializers.SerializerMethodField()
+    questions = serializers.SerializerMethodField()
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def get_answered_questions(self, obj):
+        """Return ids of answered questions in answering order."""
+
+        return obj.answered_question_ids
+
+    def get_ends_at(self, obj):
+        """Return the time exam attempt ends at."""
+
+        return serializers.DateTimeField().to_representation(obj.deadline)
+
+    def get_flagged_questions(self, obj):
+        """Return ids of flagged questions."""
+
+        return obj.flagged_question_ids
+
+    def get_questions(self, obj):
+        """Return question ids in delivery order."""
+
+        return obj.question_ids()
+
+    class Meta:
+        model = ExamAttempt
+        fields = (
+            "id",
+            "version",
+            "mode",
+            "status",
+            "grade",
+            "duration_minutes",
+            "ends_at",
+            "question_count",
+            "answered_count",
+            "questions",
+            "answered_questions",
+            "exams",
+            "flagged_questions",
+        )
@@ -0,0 +1,694 @@
+"""Exam attempt services."""
+import os
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import F, prefetch_related_objects
+from django.utils import timezone
+
+from apps.exam.buffer import answer_buffer, latest_entries, read_journal
+from apps.exam.events import EVENT_FINISHED, attempt_events
+from apps.exam.models import (
+    AnswerAttempt,
+    AnswerSubmission,
+    AttemptSummary,
+    ExamAttempt,
+    GradingJob,
+)
+from apps.exam.serializers import (
+    ExamAttemptSerializer,
+    ExamAttemptSnapshotSerializer,
+)
+from apps.exam.state import (
+    get_state,
+    invalidate_attempt_state,
+    set_state,
+    state_version,
+)
+from apps.question.cache import answer_keys
+from apps.question.models import Question
+from apps.question.payloads import question_payload
+from apps.question.sampling import new_seed, sample_questions
+
+
+def provision_attempt(user, mode, exams, question_count, start_token=None):
+    """
+    Create an exam attempt with questions sampled from exams.
+
+    The attempt row and the through tables are written in a single
+    transaction, starting with the INSERT so SQLite takes the write lock
+    right away instead of upgrading a read lock. A repeated start token
+    returns the attempt created for it instead of a duplicate, other
+    integrity errors are raised.
+
+    Questions are delivered in sample order, which is already a seeded
+    shuffle, and the order is kept on the attempt. With
+    EXAM_VIRTUAL_QUESTION_SETS enabled the order is the only record of its
+    questions and no question rows are written.
+    """
+
+    if start_token is not None:
+        attempt = ExamAttempt.objects.filter(
+            user=user, start_token=start_token
+        ).first()
+        if attempt is not None:
+            return attempt
+
+    exam_ids = [exam.id for exam in exams]
+    question_ids = sample_questions(exam_ids, question_count, new_seed())
+    virtual_questions = settings.EXAM_VIRTUAL_QUESTION_SETS
+
+    try:
+        with transaction.atomic():
+            attempt = ExamAttempt.objects.create(
+                user=user,
+                mode=mode,
+                start_token=start_token,
+                question_count=len(question_ids),
+                question_order=question_ids,
+                virtual_questions=virtual_questions,
+            )
+            ExamAttempt.exams.through.objects.bulk_create(
+                ExamAttempt.exams.through(examattempt=attempt, exam_id=exam_id)
+                for exam_id in exam_ids
+            )
+            if not virtual_questions:
+                ExamAttempt.questions.through.objects.bulk_create(
+                    ExamAttempt.questions.through(
+                        examattempt=attempt, question_id=question_id
+                    )
+                    for question_id in question_ids
+                )
+    except IntegrityError:
+        if start_token is None:
+            raise
+        # Only a concurrent start with the same token is resolved here.
+        attempt = ExamAttempt.objects.filter(
+            user=user, start_token=start_token
+        ).first()
+        if attempt is None:
+            raise
+
+    return attempt
+
+
+def _validate_answers(attempt, answers):
+    """Check that questions belong to attempt and answers to questions."""
+
+    question_ids = set(attempt.question_ids())
+    unknown = set(answers) - question_ids
+    if unknown:
+        raise ValidationError(
+            "Questions %(ids)s aren't in this attempt.",
+            params={"ids": sorted(unknown)},
+        )
+
+    for question_id, answer_ids in answers.items():
+        try:
+            _validate_options(question_id, answer_ids)
+        except Question.DoesNotExist:
+            raise ValidationError(
+                "Invalid answers for question %(id)s.",
+                params={"id": question_id},
+            )
+
+
+def _validate_options(question_id, answer_ids):
+    """
+    Check that answer ids are offered by question.
+
+    Options come from the answer key cache. Raise Question.DoesNotExist
+    for unknown questions.
+    """
+
+    if not answer_ids or not answer_ids <= answer_keys.option_ids(question_id):
+        raise ValidationError(
+            "Invalid answers for question %(id)s.",
+            params={"id": question_id},
+        )
+
+
+def record_answers(attempt, submissions, retry=True):
+    """
+    Save many answers of an exam attempt at once.
+
+    submissions is a list of dicts with `question_id`, `answer_ids` and an
+    optional idempotency `key`. Submissions with a key already recorded
+    for the attempt are skipped, so replaying a batch is free. The rest
+    are validated against the attempt and the cached question options,
+    then answer attempts are upserted with bulk queries in one
+    transaction. A later submission for the same question wins.
+    A batch conflicting with a concurrent one is retried once. Answers to
+    the same questions buffered before the batch are dropped.
+
+    Return a dict with the number of `saved` and `replayed` submissions.
+    """
+
+    keys = {
+        submission["key"]
+        for submission in submissions
+        if submission.get("key")
+    }
+    replayed = set()
+    if keys:
+        replayed = set(
+            AnswerSubmission.objects.filter(
+                attempt=attempt, key__in=keys
+            ).values_list("key", flat=True)
+        )
+
+    answers = {}
+    for submission in submissions:
+        if submission.get("key") in replayed:
+            continue
+        answers[submission["question_id"]] = set(submission["answer_ids"])
+
+    replayed_count = sum(
+        submission.get("key") in replayed for submission in submissions
+    )
+    result = {
+        "saved": len(submissions) - replayed_count,
+        "replayed": replayed_count,
+    }
+    if not answers:
+        return result
+
+    _validate_answers(attempt, answers)
+    buffered = _buffered_entries(attempt, answers)
+
+    try:
+        with transaction.atomic():
+            # Keys go first, a concurrent replay of the same batch fails
+            # here before writing any answers.
+            AnswerSubmission.objects.bulk_create(
+                AnswerSubmission(attempt=attempt, key=key)
+                for key in keys - replayed
+            )
+            _upsert_answers(attempt, answers)
+    except IntegrityError:
+        if not retry:
+            raise
+        return record_answers(attempt, submissions, retry=False)
+
+    # Answers buffered before the batch would overwrite it when flushed.
+    if buffered:
+        answer_buffer.discard(buffered)
+    _catch_up_cursor(attempt, answers)
+    return result
+
+
+def _buffered_entries(attempt, question_ids):
+    """
+    Return entries of answers to question ids buffered for attempt.
+
+    The result can be passed to answer_buffer.discard() once newer
+    answers to the questions are written.
+    """
+
+    if not write_behind(attempt):
+        return {}
+    entries = answer_buffer.entries({attempt.id: list(question_ids)})
+    buffered = {
+        question_id: entry
+        for question_id, entry in entries.get(attempt.id, {}).items()
+        if question_id in question_ids
+    }
+    return {attempt.id: buffered} if buffered else {}
+
+
+def _upsert_answers(attempt, answers):
+    """
+    Write answers of attempt and update its score counters.
+
+    answers maps question ids to sets of answer ids. Existing answer
+    attempts are updated and missing ones inserted, a concurrent insert
+    of the same question fails on the (attempt, question) constraint.
+    Existing ones are locked until the transaction ends and only updated
+    while they're graded as read, so the score deltas can't drift; a
+    concurrent regrade fails with IntegrityError too. Must be called in
+    a transaction. Return the list of question ids answered for the
+    first time.
+    """
+
+    existing = {
+        answer_attempt.question_id: answer_attempt
+        for answer_attempt in AnswerAttempt.objects.select_for_update()
+        .filter(attempt=attempt, question_id__in=answers)
+        .only("question", "is_correct", "answer_ids")
+    }
+
+    score = dict.fromkeys(
+        ("answered", "correct", "answered_weight", "weighted_score"), 0
+    )
+    graded = {
+        question_id: grade_answer(question_id, answer_ids)
+        for question_id, answer_ids in answers.items()
+    }
+
+    changed = {False: [], True: []}
+    for question_id, answer_attempt in existing.items():
+        if set(answer_attempt.answer_ids) == answers[question_id]:
+            continue
+        is_correct, weight = graded[question_id]
+        was_correct = answer_attempt.is_correct
+        score["correct"] += is_correct - was_correct
+        score["weighted_score"] += (is_correct - was_correct) * weight
+        answer_attempt.answer_ids = sorted(answers[question_id])
+        answer_attempt.is_correct = is_correct
+        changed[was_correct].append(answer_attempt)
+    for was_correct, answer_attempts in changed.items():
+        if not answer_attempts:
+            continue
+        updated = AnswerAttempt.objects.filter(
+            is_correct=was_correct
+        ).bulk_update(answer_attempts, ("answer_ids", "is_correct"))
+        if updated != len(answer_attempts):
+            raise IntegrityError("Answer attempts were changed concurrently.")
+    changed = changed[False] + changed[True]
+
+    created = [
+        question_id for question_id in answers if question_id not in existing
+    ]
+    AnswerAttempt.objects.bulk_create(
+        AnswerAttempt(
+            attempt=attempt,
+            question_id=question_id,
+            answer_ids=sorted(answers[question_id]),
+            is_correct=graded[question_id][0],
+        )
+        for question_id in created
+    )
+    for question_id in created:
+        is_correct, weight = graded[question_id]
+        score["answered"] += 1
+        score["answered_weight"] += weight
+        score["correct"] += is_correct
+        score["weighted_score"] += is_correct * weight
+
+    if changed or created:
+        attempt.add_to_score(**score)
+
+    return created
+
+
+def grade_answer(question_id, answer_ids):
+    """
+    Return whether answer ids are correct for question and its weight.
+
+    Both come from the answer key cache.
+    """
+
+    return (
+        set(answer_ids) == answer_keys.correct_answer_ids(question_id),
+        answer_keys.question_weight(question_id),
+    )
+
+
+def save_answer(attempt, question_id, answer_ids):
+    """
+    Save answers to a single question of attempt.
+
+    The question must belong to attempt and answers must be offered by
+    it. They replace the previously picked ones and the score counters of
+    the attempt are updated. When a concurrent request creates the answer
+    attempt first, this one updates it. Return True when the question is
+    answered for the first time.
+    """
+
+    answers = {question_id: set(answer_ids)}
+    _validate_answers(attempt, answers)
+    try:
+        with transaction.atomic():
+            created = _upsert_answers(attempt, answers)
+    except IntegrityError:
+        with transaction.atomic():
+            created = _upsert_answers(attempt, answers)
+
+    _catch_up_cursor(attempt, answers)
+    return bool(created)
+
+
+# Serializes flushes of a process, SQLite would fail all but one of them.
+_flush_lock = threading.Lock()
+
+
+def write_behind(attempt):
+    """Check if answers of attempt are buffered before they're written."""
+
+    return settings.EXAM_ANSWER_WRITE_BEHIND and attempt.is_in_exam_mode
+
+
+def buffer_answer(attempt, question_id, answer_ids):
+    """
+    Accept answers to a question of attempt and write them later.
+
+    Answers are checked like in save_answer(), then journaled and
+    buffered until flush_answers() writes them with other answers.
+    """
+
+    answer_ids = set(answer_ids)
+    _validate_answers(attempt, {question_id: answer_ids})
+    answer_buffer.add(attempt.id, question_id, sorted(answer_ids))
+    answer_buffer.start_flusher(flush_answers)
+
+
+def next_question_id(attempt, skipped=()):
+    """
+    Return the id of the next question to deliver in attempt.
+
+    Questions with buffered answers are skipped, the cursor of the
+    attempt catches up when the answers are written. So are question
+    ids in skipped.
+    """
+
+    question_id = attempt.next_question_id()
+    if question_id is None or not write_behind(attempt):
+        return question_id
+
+    cursor = attempt.question_cursor
+    remaining = attempt.question_order[cursor:]
+    buffered = answer_buffer.pending(attempt.id, remaining)
+    for question_id in remaining:
+        if question_id not in buffered and question_id not in skipped:
+            return question_id
+    return None
+
+
+def next_question_payload(attempt):
+    """
+    Return the payload of the next question to deliver in attempt.
+
+    Questions deleted since the attempt started are skipped. Return None
+    when every question has been delivered.
+    """
+
+    question_id = next_question_id(attempt)
+    if question_id is None:
+        return None
+    try:
+        return question_payload(question_id, attempt.id)
+    except Question.DoesNotExist:
+        deleted = attempt.skip_deleted_questions()
+
+    question_id = next_question_id(attempt, deleted)
+    if question_id is None:
+        return None
+    return question_payload(question_id, attempt.id)
+
+
+def picked_answer_ids(attempt, question_id):
+    """
+    Return ids of answers picked for a question of attempt.
+
+    Buffered answers win over written ones. Raise AnswerAttempt.DoesNotExist
+    when the question hasn't been answered.
+    """
+
+    if write_behind(attempt):
+        buffered = answer_buffer.pending(attempt.id, [question_id])
+        if question_id in buffered:
+            return buffered[question_id]
+
+    return AnswerAttempt.objects.values_list("answer_ids", flat=True).get(
+        attempt=attempt.id, question=question_id
+    )
+
+
+def flush_answers(attempts=None):
+    """
+    Write buffered answers to the database.
+
+    With attempts, answers buffered for them by any process are written,
+    which has to happen before attempts are finished. Otherwise answers
+    buffered by this process are written. Return the number of answers
+    written.
+    """
+
+    if not settings.EXAM_ANSWER_WRITE_BEHIND:
+        return 0
+
+    if attempts is None:
+        entries = answer_buffer.entries()
+        attempts = ExamAttempt.objects.filter(id__in=entries)
+    else:
+        attempts = [attempt for attempt in attempts if write_behind(attempt)]
+        entries = answer_buffer.entries(
+            {attempt.id: attempt.question_ids() for attempt in attempts}
+        )
+    return _write_buffered(attempts, entries)
+
+
+def _write_buffered(attempts, entries):
+    """
+    Write buffered entries of attempts with group commits.
+
+    Every transaction writes answers of whole attempts, up to about
+    EXAM_ANSWER_FLUSH_BATCH_SIZE answers. Answers to finished attempts
+    are dropped.
+    """
+
+    batches = [[]]
+    size = 0
+    for attempt in attempts:
+        buffered = entries.get(attempt.id)
+        if not buffered:
+            continue
+        answers = {
+            question_id: set(answer_ids)
+            for question_id, (seq, answer_ids) in buffered.items()
+            if answer_ids is not None and not attempt.is_finished
+        }
+        batches[-1].append((attempt, answers))
+        size += len(answers)
+        if size >= settings.EXAM_ANSWER_FLUSH_BATCH_SIZE:
+            batches.append([])
+            size = 0
+
+    written = 0
+    for batch in batches:
+        with _flush_lock:
+            try:
+                written += _write_batch(batch)
+            except IntegrityError:
+                # A flush of another process inserted some of the answers
+                # first, they are updated on the second try.
+                for attempt, _ in batch:
+                    attempt.refresh_from_db()
+                written += _write_batch(batch)
+        answer_buffer.discard(
+            {attempt.id: entries[attempt.id] for attempt, _ in batch}
+        )
+    return written
+
+
+def _write_batch(batch):
+    written = 0
+    with transaction.atomic():
+        for attempt, answers in batch:
+            if not answers:
+                continue
+            _upsert_answers(attempt, answers)
+            _catch_up_cursor(attempt, answers)
+            written += len(answers)
+    return written
+
+
+def _catch_up_cursor(attempt, question_ids):
+    """
+    Move the cursor of attempt past answered questions.
+
+    Answers may be written out of delivery order, e.g. by batches or by
+    flushes of different processes. The cursor only moves once the
+    question being delivered is among question_ids, just written.
+    """
+
+    if attempt.next_question_id() not in question_ids:
+        return
+
+    answered = set(attempt.answered_question_ids)
+    cursor = attempt.question_cursor
+    for question_id in attempt.question_order[cursor:]:
+        if question_id not in answered:
+            break
+        attempt.advance_cursor(question_id)
+
+
+def replay_answer_journals(paths):
+    """
+    Write answers left in journals of processes that died.
+
+    Answers superseded by ones buffered or written since are skipped.
+    Journals are removed once their answers are written. Return the
+    number of answers written.
+    """
+
+    journaled = latest_entries(
+        entry for path in paths for entry in read_journal(path)
+    )
+    current = answer_buffer.entries(
+        {
+            attempt_id: list(answers)
+            for attempt_id, answers in journaled.items()
+        }
+    )
+    entries = latest_entries(
+        (attempt_id, question_id, seq, answer_ids)
+        for buffered in (journaled, current)
+        for attempt_id, answers in buffered.items()
+        for question_id, (seq, answer_ids) in answers.items()
+    )
+    written = _write_buffered(
+        ExamAttempt.objects.filter(id__in=entries), entries
+    )
+    for path in paths:
+        os.remove(path)
+    return written
+
+
+def finish_expired_attempts(batch_size=500, now=None):
+    """
+    Finish a batch of exam mode attempts whose time is up.
+
+    Expired attempts are found by a range scan of the (status, ends_at)
+    index. Answers aren't accepted after the deadline, so once buffered
+    answers are written grades are read from the score counters loaded
+    with the batch. Only the writes run in a transaction, which keeps the
+    SQLite write lock short. Return the number of attempts finished.
+    """
+
+    now = now or timezone.now()
+    attempts = list(
+        ExamAttempt.objects.filter(
+            status=ExamAttempt.STATUS_IN_PROGRESS,
+            ends_at__lte=now,
+            mode=ExamAttempt.EXAM_MODE,
+        ).order_by("ends_at")[:batch_size]
+    )
+    if not attempts:
+        return 0
+    flush_answers(attempts)
+
+    exams = defaultdict(list)
+    for attempt_exam in (
+        ExamAttempt.exams.through.objects.filter(examattempt__in=attempts)
+        .select_related("exam__subject")
+        .order_by("exam")
+    ):
+        exams[attempt_exam.examattempt_id].append(attempt_exam.exam)
+
+    finished = []
+    with transaction.atomic():
+        for attempt in attempts:
+            result = attempt.finish_result(exams[attempt.id], attempt.score)
+            if ExamAttempt.objects.filter(
+                pk=attempt.pk, status=ExamAttempt.STATUS_IN_PROGRESS
+            ).update(version=F("version") + 1, **result):
+                for field, value in result.items():
+                    setattr(attempt, field, value)
+                finished.append(attempt)
+                invalidate_attempt_state(attempt.id)
+                attempt_events.publish_on_commit(
+                    attempt.id, EVENT_FINISHED, {}
+                )
+        AttemptSummary.objects.bulk_create(
+            AttemptSummary.for_attempt(attempt, exams[attempt.id])
+            for attempt in finished
+        )
+        if settings.EXAM_BACKGROUND_GRADING:
+            GradingJob.objects.bulk_create(
+                GradingJob(attempt=attempt) for attempt in finished
+            )
+
+    return len(finished)
+
+
+def get_attempt(attempt_id, user_id):
+    """
+    Return an attempt of user from the attempt state cache.
+
+    A cached attempt costs no queries, a missing one is loaded and cached
+    under the current state version of the attempt. Raise
+    ExamAttempt.DoesNotExist for attempts of other users.
+    """
+
+    version = state_version(attempt_id)
+    attempt = get_state(attempt_id, version)
+    if attempt is None:
+        attempt = ExamAttempt.objects.get(id=attempt_id)
+        set_state(attempt, version)
+    attempt.state_version = version
+
+    if attempt.user_id != user_id:
+        raise ExamAttempt.DoesNotExist
+    return attempt
+
+
+def _data_key(attempt_id, version):
+    return f"attempt_data:{attempt_id}:{version}"
+
+
+def attempt_data(attempt):
+    """
+    Return attempt serialized by ExamAttemptSerializer.
+
+    attempt comes from get_attempt(), data is cached by its state version
+    and only the time left is computed for every call.
+    """
+
+    key = _data_key(attempt.id, attempt.state_version)
+    data = cache.get(key)
+    if data is None:
+        data = ExamAttemptSerializer(attempt).data
+        cache.set(key, data, timeout=settings.EXAM_ATTEMPT_STATE_CACHE_TIMEOUT)
+    data["time_left_seconds"] = attempt.time_left_seconds
+    return data
+
+
+def _bootstrap_key(attempt_id, version):
+    return f"attempt_bootstrap:{attempt_id}:{version}"
+
+
+def attempt_bootstrap(attempt):
+    """
+    Return the initial state of the exam page of attempt.
+
+    It's the attempt snapshot and the payload of the next question, or
+    None when every question has been delivered. Buffered answers are
+    written first. Documents are cached by attempt version, so any change
+    to the attempt builds a new one. Only the time left, which the page
+    counts down from regardless of the client clock, is computed for
+    every call.
+    """
+
+    flush_answers([attempt])
+    # Storing a missing order bumps the version the document is cached by.
+    attempt.ensure_question_order()
+    key = _bootstrap_key(attempt.id, attempt.version)
+    bootstrap = cache.get(key)
+    if bootstrap is None:
+        bootstrap = _build_bootstrap(attempt)
+        cache.set(
+            key, bootstrap, timeout=settings.EXAM_BOOTSTRAP_CACHE_TIMEOUT
+        )
+
+    bootstrap["attempt"]["time_left_seconds"] = attempt.time_left_seconds
+    return bootstrap
+
+
+def _build_bootstrap(attempt):
+    """Return a bootstrap document of attempt to be cached."""
+
+    prefetch_related_objects([attempt], "exams")
+    try:
+        question = next_question_payload(attempt)
+    except Question.DoesNotExist:
+        question = None
+
+    return {
+        "attempt": ExamAttemptSnapshotSerializer(attempt).data,
+        "question": question,
+    }
@@ -0,0 +1,32 @@
+"""Exam app signal handlers."""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.exam.events import EVENT_DEADLINE, attempt_events, deadline_data
+from apps.exam.models import ExamAttempt
+from apps.exam.state import invalidate_attempt_state
+
+DEADLINE_FIELDS = {"created", "duration_minutes", "ends_at"}
+
+
+@receiver(post_save, sender=ExamAttempt)
+def publish_attempt_deadline(
+    sender, instance, created, raw, update_fields, **kwargs
+):
+    """Let event streams know the deadline of a saved attempt."""
+
+    if created or raw or instance.is_finished:
+        return
+    if update_fields is not None and not DEADLINE_FIELDS & update_fields:
+        return
+
+    attempt_events.publish_on_commit(
+        instance.id, EVENT_DEADLINE, deadline_data(instance)
+    )
+
+
+@receiver(post_delete, sender=ExamAttempt)
+def invalidate_deleted_attempt(sender, instance, **kwargs):
+    """Drop the cached state of a deleted attempt."""
+
+    invalidate_attempt_state(instance.id)
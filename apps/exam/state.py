@@ -0,0 +1,59 @@
+"""Cached state of exam attempts."""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(attempt_id):
+    return f"attempt_state_version:{attempt_id}"
+
+
+def _state_key(attempt_id, version):
+    return f"attempt_state:{attempt_id}:{version}"
+
+
+def state_version(attempt_id):
+    """
+    Return the current state version of an attempt.
+
+    A missing version gets a fresh random one, so a version evicted from
+    the cache never matches a state cached before.
+    """
+
+    key = _version_key(attempt_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_state(attempt_id, version):
+    """Return the attempt cached with version, or None."""
+
+    return cache.get(_state_key(attempt_id, version))
+
+
+def set_state(attempt, version):
+    """Cache attempt as its state with version."""
+
+    cache.set(
+        _state_key(attempt.id, version),
+        attempt,
+        timeout=settings.EXAM_ATTEMPT_STATE_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_attempt_state(*attempt_ids):
+    """
+    Mark cached states of attempts as outdated.
+
+    Versions are dropped right away and once more on commit, so a state
+    loaded from not yet committed data doesn't outlive the change.
+    """
+
+    keys = [_version_key(attempt_id) for attempt_id in attempt_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
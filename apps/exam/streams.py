@@ -0,0 +1,214 @@
+"""Server-sent event streams of exam attempts."""
+import asyncio
+import json
+import re
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+from django.db import close_old_connections
+from django.http.cookie import parse_cookie
+from django.utils.module_loading import import_module
+
+from apps.exam.events import (
+    EVENT_DEADLINE,
+    EVENT_FINISHED,
+    attempt_events,
+    deadline_data,
+)
+from apps.exam.models import ExamAttempt
+from apps.exam.state import state_version
+
+STREAM_PATH = re.compile(r"^/events/attempt/(?P<attempt_id>\d+)/$")
+
+
+def format_event(event, data):
+    """Return an event encoded for a stream."""
+
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
+
+
+@sync_to_async
+def _load_attempt(cookies, attempt_id):
+    """
+    Return the attempt if it belongs to the user of the session.
+
+    The attempt gets the state version read before it's loaded.
+    """
+
+    close_old_connections()
+    try:
+        engine = import_module(settings.SESSION_ENGINE)
+        request = SimpleNamespace(
+            session=engine.SessionStore(
+                cookies.get(settings.SESSION_COOKIE_NAME)
+            )
+        )
+        user = get_user(request)
+        if not user.is_authenticated:
+            return None
+        version = state_version(attempt_id)
+        attempt = ExamAttempt.objects.filter(id=attempt_id, user=user).first()
+        if attempt is not None:
+            attempt.state_version = version
+        return attempt
+    finally:
+        close_old_connections()
+
+
+@sync_to_async
+def _reload_attempt(attempt):
+    """
+    Return attempt loaded again if its state version changed, or None.
+
+    Versions live in the shared cache, so changes made by any process
+    are seen.
+    """
+
+    version = state_version(attempt.id)
+    if version == attempt.state_version:
+        return None
+
+    close_old_connections()
+    try:
+        reloaded = ExamAttempt.objects.filter(id=attempt.id).first()
+    finally:
+        close_old_connections()
+    if reloaded is not None:
+        reloaded.state_version = version
+    return reloaded
+
+
+async def _send_response(send, status, body=b""):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+async def attempt_stream(scope, receive, send):
+    """
+    ASGI application streaming events of an exam attempt.
+
+    The stream starts with the current deadline, then forwards deadline
+    changes and the finish of the attempt, and ends after it. Events
+    published by this process arrive right away, changes made by other
+    processes are found by polling the attempt state version every
+    EXAM_EVENTS_POLL_SECONDS. Idle streams only cost a task, a queue and
+    a cache read per poll, comments are sent every
+    EXAM_EVENTS_KEEPALIVE_SECONDS to keep proxies from closing them.
+    """
+
+    match = STREAM_PATH.match(scope["path"])
+    if match is None:
+        await _send_response(send, 404, b"Not Found")
+        return
+
+    headers = dict(scope["headers"])
+    attempt = await _load_attempt(
+        parse_cookie(headers.get(b"cookie", b"").decode("latin-1")),
+        int(match["attempt_id"]),
+    )
+    if attempt is None:
+        await _send_response(send, 404, b"Not Found")
+        return
+
+    queue = attempt_events.subscribe(attempt.id)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        ends_at = None
+
+        async def poll():
+            nonlocal attempt
+            reloaded = await _reload_attempt(attempt)
+            if reloaded is None:
+                return None
+            attempt = reloaded
+            return _attempt_message(attempt)
+
+        message = _attempt_message(attempt)
+        while message is not None:
+            event, data = message
+            # Changes seen by a poll may be published here as well.
+            if event == EVENT_FINISHED or data["ends_at"] != ends_at:
+                await send(
+                    {
+                        "type": "http.response.body",
+                        "body": format_event(event, data),
+                        "more_body": event != EVENT_FINISHED,
+                    }
+                )
+            if event == EVENT_FINISHED:
+                return
+            ends_at = data["ends_at"]
+            message = await _next_message(queue, disconnected, send, poll)
+    finally:
+        disconnected.cancel()
+        attempt_events.unsubscribe(attempt.id, queue)
+
+
+def _attempt_message(attempt):
+    """Return the event telling the current state of attempt."""
+
+    if attempt.is_finished:
+        return (EVENT_FINISHED, {})
+    return (EVENT_DEADLINE, deadline_data(attempt))
+
+
+async def _wait_for_disconnect(receive):
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def _next_message(queue, disconnected, send, poll):
+    """
+    Wait for the next event and keep the stream alive meanwhile.
+
+    poll() is awaited whenever no event arrived for
+    EXAM_EVENTS_POLL_SECONDS and returns an event or None. Return None
+    when the client has disconnected.
+    """
+
+    idle = 0
+    while True:
+        received = asyncio.ensure_future(queue.get())
+        done, _ = await asyncio.wait(
+            (received, disconnected),
+            timeout=settings.EXAM_EVENTS_POLL_SECONDS,
+            return_when=asyncio.FIRST_COMPLETED,
+        )
+        if received in done:
+            return received.result()
+        received.cancel()
+        if disconnected in done:
+            return None
+        message = await poll()
+        if message is not None:
+            return message
+        idle += settings.EXAM_EVENTS_POLL_SECONDS
+        if idle < settings.EXAM_EVENTS_KEEPALIVE_SECONDS:
+            continue
+        idle = 0
+        await send(
+            {
+                "type": "http.response.body",
+                "body": b": keepalive\n\n",
+                "more_body": True,
+            }
+        )
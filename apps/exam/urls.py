@@ -3,7 +3,10 @@
 from django.urls import path
 from django.views.generic import TemplateView
 
+from apps.core.views import select_view
+from apps.exam.async_views import AsyncAttemptView, AsyncQuestionFlag
 from apps.exam.views import (
+    AttemptSnapshotView,
     AttemptView,
     ExamFinishView,
     ExamIntro,
@@ -40,11 +43,18 @@ urlpatterns = [
         name="exam_finish",
     ),
     path(
-        "api/attempt/<attempt_id>/", AttemptView.as_view(), name="get_attempt"
+        "api/attempt/<attempt_id>/",
+        select_view("get_attempt", AttemptView, AsyncAttemptView),
+        name="get_attempt",
+    ),
+    path(
+        "api/v2/attempt/<int:attempt_id>/",
+        AttemptSnapshotView.as_view(),
+        name="attempt_snapshot",
     ),
     path(
         "api/attempt/<int:attempt_id>/<int:question_id>/flag",
-        QuestionFlag.as_view(),
+        select_view("question_toggle_flag", QuestionFlag, AsyncQuestionFlag),
         name="question_toggle_flag",
     ),
 ]
@@ -1,23 +1,33 @@
 """Exam views methods."""
 
-import random
+import uuid
 
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.http import Http404
 from django.shortcuts import get_object_or_404, redirect
 from django.urls import reverse
+from django.utils.http import parse_etags, quote_etag
 from django.utils.translation import gettext as _
 from django.views.generic import TemplateView
+from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apps.exam.models import Exam, ExamAttempt, Subject
 from apps.exam.serializers import (
-    ExamAttemptSerializer,
+    ExamAttemptSnapshotSerializer,
     ExamSerializer,
     SubjectSerializer,
 )
+from apps.exam.services import (
+    attempt_bootstrap,
+    attempt_data,
+    flush_answers,
+    get_attempt,
+    provision_attempt,
+)
 from apps.question.models import Question
 
 
@@ -68,13 +78,14 @@ class ExamIntro(LoginRequiredMixin, TemplateView):
                 id=self.kwargs["subject_id"]
             )
             exams = Exam.objects.filter(subject_id=self.kwargs["subject_id"])
-            context["subject_question_count"] = 50
+            context["subject_question_count"] = settings.SUBJECT_QUESTION_COUNT
 
         context["attempt_duration"] = int(
             sum([exam.duration_minutes for exam in exams]) / len(exams)
             + self.request.user.required_extra_time
         )
         context["exam_mode"] = self.kwargs["exam_mode"]
+        context["start_token"] = uuid.uuid4()
 
         return context
 
@@ -84,38 +95,20 @@ class ExamIntro(LoginRequiredMixin, TemplateView):
         Pre-populate attempt_questions table with questions from this exam.
         """
         if subject_id:
-            exams = Exam.objects.filter(subject_id=subject_id)
-            current_attempt = ExamAttempt.objects.create(
-                user=request.user, mode=exam_mode
-            )
-            current_attempt.exams.set(exams)
-            question_pool_ids = []
-            for exam in exams:
-                question_pool_ids.extend(
-                    Question.objects.filter(exam=exam).values_list(
-                        "id", flat=True
-                    )
-                )
-            if len(question_pool_ids) > 50:
-                question_pool_ids = random.sample(question_pool_ids, 50)
+            exams = list(Exam.objects.filter(subject_id=subject_id))
+            question_count = settings.SUBJECT_QUESTION_COUNT
 
         elif exam_id:
-            exam = Exam.objects.get(id=exam_id)
-            current_attempt = ExamAttempt.objects.create(
-                user=request.user, mode=exam_mode
-            )
-            current_attempt.exams.set(Exam.objects.filter(id=exam_id))
-
-            question_pool_ids = [
-                question.id for question in exam.questions.all()
-            ]
-            if exam.questions.count() > exam.question_count:
-                question_pool_ids = random.sample(
-                    question_pool_ids, exam.question_count
-                )
+            exams = [get_object_or_404(Exam, id=exam_id)]
+            question_count = exams[0].question_count
+
+        try:
+            start_token = uuid.UUID(request.POST.get("start_token", ""))
+        except ValueError:
+            start_token = None
 
-        current_attempt.questions.set(
-            Question.objects.filter(id__in=question_pool_ids)
+        current_attempt = provision_attempt(
+            request.user, exam_mode, exams, question_count, start_token
         )
 
         return redirect(reverse("exam_page", args=[current_attempt.id]))
@@ -126,12 +119,26 @@ class ExamPageView(TemplateView, LoginRequiredMixin):
     template_name = "exam/exam_attempt.html"
 
     def get_context_data(self, **kwargs):
-        """Render page with actual questions."""
+        """
+        Render page with actual questions.
+
+        The page embeds the initial state of the attempt for its owner,
+        so the first question is shown without waiting for API requests.
+        """
 
         context = super().get_context_data(**kwargs)
-        context["attempt"] = ExamAttempt.objects.get(
-            id=self.kwargs["attempt_id"]
-        )
+        try:
+            attempt = get_attempt(
+                self.kwargs["attempt_id"], self.request.user.id
+            )
+        except ExamAttempt.DoesNotExist:
+            context["attempt"] = ExamAttempt.objects.get(
+                id=self.kwargs["attempt_id"]
+            )
+            context["bootstrap"] = None
+        else:
+            context["attempt"] = attempt
+            context["bootstrap"] = attempt_bootstrap(attempt)
         return context
 
 
@@ -151,28 +158,35 @@ class ExamFinishView(TemplateView, LoginRequiredMixin):
         except ExamAttempt.DoesNotExist:
             raise Http404
 
-        if not current_attempt.all_questions_answered:
-            raise Http404
-
-        current_attempt.status = ExamAttempt.STATUS_FINISHED
-        current_attempt.save()
-        exam = current_attempt.exams.first()
+        if not current_attempt.is_finished:
+            flush_answers([current_attempt])
+            if not current_attempt.all_questions_answered:
+                raise Http404
+            current_attempt.finish()
 
         context = super().get_context_data(**kwargs)
 
-        context["grade"] = current_attempt.calculate_grade()
-        context["passing_grade"] = int(
-            sum([exam.passing_grade for exam in current_attempt.exams.all()])
-            / current_attempt.exams.count()
-        )
+        context["passing_grade"] = int(current_attempt.passing_grade or 0)
+        if current_attempt.is_grading_pending:
+            context["pending"] = True
+            context["status"] = _(
+                "Your answers in {subject_name} {exam_name} are being "
+                "graded. This page will refresh when your grade is ready."
+            ).format(
+                subject_name=current_attempt.subject_name,
+                exam_name=current_attempt.exam_name,
+            )
+            return context
+
+        context["grade"] = current_attempt.grade
         if current_attempt.passed:
             context["status"] = _(
                 "Congratulations! You've finished {mode} in "
                 "{subject_name} {exam_name}! Your grade is {grade}%."
             ).format(
                 mode=current_attempt.get_mode_display().lower(),
-                subject_name=exam.subject.name,
-                exam_name=exam.name,
+                subject_name=current_attempt.subject_name,
+                exam_name=current_attempt.exam_name,
                 grade=current_attempt.grade,
             )
         else:
@@ -180,8 +194,8 @@ class ExamFinishView(TemplateView, LoginRequiredMixin):
                 "Sorry, you haven't passed the {subject_name} "
                 "{exam_name} {mode}. Your grade is {grade}%."
             ).format(
-                subject_name=exam.subject.name,
-                exam_name=exam.name,
+                subject_name=current_attempt.subject_name,
+                exam_name=current_attempt.exam_name,
                 mode=current_attempt.get_mode_display().lower(),
                 grade=current_attempt.grade,
             )
@@ -198,29 +212,93 @@ class AttemptView(APIView):
 
         try:
             return Response(
-                ExamAttemptSerializer(
-                    ExamAttempt.objects.get(id=attempt_id)
-                ).data
+                attempt_data(get_attempt(attempt_id, request.user.id))
             )
 
         except ExamAttempt.DoesNotExist:
             raise Http404
 
 
+class AttemptSnapshotView(APIView):
+    """Compact exam attempt representation."""
+
+    permission_classes = (IsAuthenticated,)
+    prefetched_fields = ("exams",)
+
+    def get(self, request, attempt_id):
+        """
+        Returns exam attempt, or only fields listed in `?fields=`.
+
+        The ETag is made of the attempt version and the selected fields,
+        an unchanged snapshot costs a single query and a 304.
+        """
+
+        field_names = ExamAttemptSnapshotSerializer.Meta.fields
+        fields = None
+        if request.query_params.get("fields"):
+            fields = sorted(set(request.query_params["fields"].split(",")))
+            unknown = set(fields) - set(field_names)
+            if unknown:
+                raise serializers.ValidationError(
+                    {
+                        "fields": [
+                            f"Unknown fields: {', '.join(sorted(unknown))}."
+                        ]
+                    }
+                )
+
+        attempts = ExamAttempt.objects.filter(
+            id=attempt_id, user=request.user.id
+        )
+        version = attempts.values_list("version", flat=True).first()
+        if version is None:
+            raise Http404
+
+        etag = self.etag(attempt_id, version, fields)
+        if etag in parse_etags(request.headers.get("If-None-Match", "")):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+            )
+
+        attempt = attempts.prefetch_related(
+            *(
+                field
+                for field in self.prefetched_fields
+                if fields is None or field in fields
+            )
+        ).get()
+        return Response(
+            ExamAttemptSnapshotSerializer(attempt, fields=fields).data,
+            headers={
+                "ETag": self.etag(attempt_id, attempt.version, fields),
+                "Cache-Control": "private, no-cache",
+            },
+        )
+
+    @staticmethod
+    def etag(attempt_id, version, fields):
+        # Field names are joined without commas, which separate ETags in
+        # If-None-Match.
+        fields = "+".join(fields) if fields else "*"
+        return quote_etag(f"{attempt_id}-{version}-{fields}")
+
+
 class QuestionFlag(APIView):
     """Question flagging view."""
 
     def post(self, request, **kwargs):
-        """Add or remove question id from flagged_questions."""
+        """Add or remove the flag of a question, return its new state."""
 
-        attempt = get_object_or_404(
-            ExamAttempt, id=self.kwargs["attempt_id"], user=request.user.id
-        )
-        question = get_object_or_404(Question, id=self.kwargs["question_id"])
-
-        if attempt.flagged_questions.filter(id=question.id).exists():
-            attempt.flagged_questions.remove(question)
-        else:
-            attempt.flagged_questions.add(question)
+        try:
+            attempt = get_attempt(self.kwargs["attempt_id"], request.user.id)
+            flagged = attempt.toggle_flag(self.kwargs["question_id"])
+        except (ExamAttempt.DoesNotExist, Question.DoesNotExist):
+            raise Http404
 
-        return Response(ExamAttemptSerializer(attempt).data)
+        return Response(
+            {
+                "question_id": self.kwargs["question_id"],
+                "flagged": flagged,
+                "version": attempt.version,
+            }
+        )
@@ -1,7 +1,22 @@
 from django.contrib import admin
 
-from apps.question.models import Answer, Question, QuestionCategory
+from apps.question.models import (
+    Answer,
+    Question,
+    QuestionCategory,
+    QuestionOption,
+)
+
+
+class QuestionOptionInline(admin.TabularInline):
+    model = QuestionOption
+    extra = 0
+
+
+class QuestionAdmin(admin.ModelAdmin):
+    inlines = (QuestionOptionInline,)
+
 
 admin.site.register(Answer)
-admin.site.register(Question)
+admin.site.register(Question, QuestionAdmin)
 admin.site.register(QuestionCategory)
@@ -1,5 +1,13 @@
+"""Question app."""
 from django.apps import AppConfig
 
 
 class QuestionConfig(AppConfig):
+    """Question app configuration."""
+
     name = "apps.question"
+
+    def ready(self):
+        """Connect signal handlers."""
+
+        from apps.question import signals  # noqa: F401
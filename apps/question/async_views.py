@@ -0,0 +1,117 @@
+"""Async counterparts of question API views."""
+from asgiref.sync import sync_to_async
+from django.http import Http404, HttpResponse, JsonResponse
+
+from apps.core.views import AsyncAPIView
+from apps.exam.models import AnswerAttempt, ExamAttempt
+from apps.exam.services import (
+    buffer_answer,
+    get_attempt,
+    next_question_payload,
+    picked_answer_ids,
+    save_answer,
+    write_behind,
+)
+from apps.question.models import Question
+from apps.question.payloads import question_payload
+
+
+def _get_attempt(attempt_id, user):
+    try:
+        return get_attempt(attempt_id, user.id)
+    except ExamAttempt.DoesNotExist:
+        raise Http404
+
+
+@sync_to_async
+def _next_question(attempt_id, user):
+    """Return the payload of the next question of attempt, or None."""
+
+    attempt = _get_attempt(attempt_id, user)
+    try:
+        return next_question_payload(attempt)
+    except Question.DoesNotExist:
+        raise Http404
+
+
+@sync_to_async
+def _save_answer(attempt_id, user, data):
+    """
+    Save answers posted to attempt and return the response status.
+
+    It's 201 for new answers, 202 for buffered ones and 200 otherwise.
+    """
+
+    attempt = _get_attempt(attempt_id, user)
+    if hasattr(data, "getlist"):
+        answer_ids = data.getlist("answers")
+    else:
+        answer_ids = data.get("answers")
+    if attempt.is_in_exam_mode and not attempt.time_left_seconds:
+        raise Http404
+
+    if not data or not answer_ids or "question_id" not in data:
+        raise Http404
+
+    save = buffer_answer if write_behind(attempt) else save_answer
+    try:
+        created = save(
+            attempt,
+            int(data["question_id"]),
+            [int(answer_id) for answer_id in answer_ids],
+        )
+    except Question.DoesNotExist:
+        raise Http404
+
+    if save is buffer_answer:
+        return 202
+    if created:
+        return 201
+    return 200
+
+
+@sync_to_async
+def _answered_question(attempt_id, user, question_id):
+    """Return picked answers and the payload of an answered question."""
+
+    attempt = _get_attempt(attempt_id, user)
+    if question_id not in attempt.question_ids():
+        raise Http404
+
+    try:
+        answer_ids = picked_answer_ids(attempt, question_id)
+        payload = question_payload(question_id, attempt.id)
+    except (AnswerAttempt.DoesNotExist, Question.DoesNotExist):
+        raise Http404
+
+    return {"answer_ids": answer_ids, "question": payload}
+
+
+class AsyncQuestionView(AsyncAPIView):
+    """Question object view, see QuestionView."""
+
+    async def get(self, request, attempt_id):
+        """Send a question object to frontend."""
+
+        payload = await _next_question(attempt_id, request.user)
+        if payload is None:
+            return HttpResponse(status=200)
+        return JsonResponse(payload)
+
+    async def post(self, request, attempt_id):
+        """Save answers to AnswerAttempt."""
+
+        return HttpResponse(
+            status=await _save_answer(attempt_id, request.user, request.data)
+        )
+
+
+class AsyncQuestionAnswerView(AsyncAPIView):
+    """Question and Answer objects view, see QuestionAnswerView."""
+
+    async def get(self, request, attempt_id, question_id):
+        """Returns answered question and picked answers from AttemptAnswer."""
+
+        return JsonResponse(
+            await _answered_question(attempt_id, request.user, question_id)
+        )
@@ -0,0 +1,174 @@
+"""In-memory cache of question answer keys."""
+import threading
+import uuid
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from apps.question.models import Question
+
+ExamAnswerKey = namedtuple(
+    "ExamAnswerKey", ("version", "ids", "texts", "weights", "options")
+)
+
+
+class AnswerKeyCache:
+    """
+    Per-exam LRU cache of correct answers.
+
+    Every exam entry maps question ids to a frozenset of correct answer
+    ids, to the texts of those answers, to question weights and to a
+    frozenset of every answer id the question offers. Entries
+    are built with one query per exam and are checked against a version
+    token kept in the Django cache, so invalidation reaches every worker
+    sharing it.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._question_exams = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _version_key(exam_id):
+        return f"answer_key_version:{exam_id}"
+
+    def _version(self, exam_id):
+        """
+        Return the current answer key version of an exam.
+
+        A missing version gets a fresh random one, so a version evicted
+        from the Django cache never matches an entry built before.
+        """
+
+        key = self._version_key(exam_id)
+        version = cache.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, timeout=None)
+            version = cache.get(key)
+        return version
+
+    def _load(self, exam_id, version):
+        """Build the answer key of an exam with a single query."""
+
+        ids = {}
+        texts = {}
+        weights = {}
+        options = {}
+        for question_id, weight, answer_id, text, is_correct in (
+            Question.objects.filter(exam_id=exam_id)
+            .order_by("id", "options__position", "options__id")
+            .values_list(
+                "id",
+                "weight",
+                "options__answer",
+                "options__answer__text",
+                "options__is_correct",
+            )
+        ):
+            weights[question_id] = weight
+            ids.setdefault(question_id, [])
+            texts.setdefault(question_id, [])
+            options.setdefault(question_id, [])
+            if answer_id is not None:
+                options[question_id].append(answer_id)
+            if is_correct:
+                ids[question_id].append(answer_id)
+                texts[question_id].append(text)
+
+        return ExamAnswerKey(
+            version,
+            {question_id: frozenset(ids[question_id]) for question_id in ids},
+            {question_id: tuple(texts[question_id]) for question_id in texts},
+            weights,
+            {
+                question_id: frozenset(options[question_id])
+                for question_id in options
+            },
+        )
+
+    def _entry(self, exam_id):
+        version = self._version(exam_id)
+        with self._lock:
+            entry = self._entries.get(exam_id)
+            if entry is not None and entry.version == version:
+                self._entries.move_to_end(exam_id)
+                return entry
+
+        entry = self._load(exam_id, version)
+        with self._lock:
+            self._entries[exam_id] = entry
+            self._entries.move_to_end(exam_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            for question_id in entry.ids:
+                self._question_exams[question_id] = exam_id
+        return entry
+
+    def _question_entry(self, question_id):
+        """Return the answer key of the exam the question belongs to."""
+
+        exam_id = self._question_exams.get(question_id)
+        if exam_id is not None:
+            entry = self._entry(exam_id)
+            if question_id in entry.ids:
+                return entry
+
+        exam_id = (
+            Question.objects.filter(id=question_id)
+            .values_list("exam_id", flat=True)
+            .first()
+        )
+        if exam_id is None:
+            raise Question.DoesNotExist
+        return self._entry(exam_id)
+
+    def get(self, exam_id):
+        """Return a dict of question id to correct answer ids for exam."""
+
+        return self._entry(exam_id).ids
+
+    def correct_answer_ids(self, question_id):
+        """Return a frozenset of correct answer ids for question."""
+
+        return self._question_entry(question_id).ids[question_id]
+
+    def correct_answer_texts(self, question_id):
+        """Return a tuple of correct answer texts for question."""
+
+        return self._question_entry(question_id).texts[question_id]
+
+    def question_weight(self, question_id):
+        """Return the weight of question."""
+
+        return self._question_entry(question_id).weights[question_id]
+
+    def option_ids(self, question_id):
+        """Return a frozenset of every answer id question offers."""
+
+        return self._question_entry(question_id).options[question_id]
+
+    def invalidate(self, *exam_ids):
+        """
+        Mark cached answer keys of exams as outdated.
+
+        Versions are dropped right away and once more on commit, so a key
+        rebuilt from not yet committed data doesn't outlive the change.
+        """
+
+        keys = [self._version_key(exam_id) for exam_id in exam_ids]
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+    def clear(self):
+        """Drop all answer keys cached by this process."""
+
+        with self._lock:
+            self._entries.clear()
+            self._question_exams.clear()
+
+
+answer_keys = AnswerKeyCache(settings.ANSWER_KEY_CACHE_SIZE)
@@ -0,0 +1,157 @@
+# Generated by Django 4.0.1 on 2026-10-18 07:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 10000
+
+
+def copy_to_options(apps, schema_editor):
+    """
+    Turn correct and wrong answers of questions into options.
+
+    Correct answers come first, both kinds keep the order they were added
+    in. An answer that is both correct and wrong becomes a correct one.
+    """
+
+    Question = apps.get_model("question", "Question")
+    QuestionOption = apps.get_model("question", "QuestionOption")
+    options = []
+    positions = {}
+    for is_correct, through in (
+        (True, Question.correct_answers.through),
+        (False, Question.wrong_answers.through),
+    ):
+        for question_id, answer_id in (
+            through.objects.order_by("id")
+            .values_list("question_id", "answer_id")
+            .iterator(chunk_size=BATCH_SIZE)
+        ):
+            offered = positions.setdefault(question_id, {})
+            if answer_id in offered:
+                continue
+            offered[answer_id] = len(offered)
+            options.append(
+                QuestionOption(
+                    question_id=question_id,
+                    answer_id=answer_id,
+                    is_correct=is_correct,
+                    position=offered[answer_id],
+                )
+            )
+            if len(options) >= BATCH_SIZE:
+                QuestionOption.objects.bulk_create(options)
+                options = []
+    QuestionOption.objects.bulk_create(options)
+
+
+def copy_from_options(apps, schema_editor):
+    """Turn options back into correct and wrong answers."""
+
+    Question = apps.get_model("question", "Question")
+    QuestionOption = apps.get_model("question", "QuestionOption")
+    throughs = {
+        True: Question.correct_answers.through,
+        False: Question.wrong_answers.through,
+    }
+    rows = {True: [], False: []}
+    for question_id, answer_id, is_correct in (
+        QuestionOption.objects.order_by("question_id", "position", "id")
+        .values_list("question_id", "answer_id", "is_correct")
+        .iterator(chunk_size=BATCH_SIZE)
+    ):
+        rows[is_correct].append(
+            throughs[is_correct](question_id=question_id, answer_id=answer_id)
+        )
+        if len(rows[is_correct]) >= BATCH_SIZE:
+            throughs[is_correct].objects.bulk_create(rows[is_correct])
+            rows[is_correct] = []
+    for is_correct, through in throughs.items():
+        through.objects.bulk_create(rows[is_correct])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "question",
+            "0005_alter_answer_options_alter_question_options_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="answer",
+            name="text",
+            field=models.CharField(max_length=1000, verbose_name="text"),
+        ),
+        migrations.CreateModel(
+            name="QuestionOption",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "is_correct",
+                    models.BooleanField(
+                        default=False, verbose_name="is correct"
+                    ),
+                ),
+                (
+                    "position",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="position"
+                    ),
+                ),
+                (
+                    "answer",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="options",
+                        to="question.answer",
+                    ),
+                ),
+                (
+                    "question",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="options",
+                        to="question.question",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "question option",
+                "verbose_name_plural": "question options",
+                "ordering": ("question", "position", "id"),
+            },
+        ),
+        migrations.AddIndex(
+            model_name="questionoption",
+            index=models.Index(
+                fields=["question", "position", "id"],
+                name="question_qu_questio_1ec2a3_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="questionoption",
+            constraint=models.UniqueConstraint(
+                fields=("question", "answer"), name="unique_question_answer"
+            ),
+        ),
+        migrations.RunPython(copy_to_options, copy_from_options),
+        migrations.RemoveField(
+            model_name="question",
+            name="correct_answers",
+        ),
+        migrations.RemoveField(
+            model_name="question",
+            name="wrong_answers",
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Max
 from django.utils.translation import gettext_lazy as _
 
 
@@ -38,12 +39,6 @@ class Question(models.Model):
         choices=QUESTION_TYPES,
     )
     weight = models.IntegerField(verbose_name=_("weight"), default=1)
-    correct_answers = models.ManyToManyField(
-        Answer, related_name="correct_answers"
-    )
-    wrong_answers = models.ManyToManyField(
-        Answer, related_name="wrong_answers"
-    )
 
     category = models.ForeignKey("QuestionCategory", on_delete=models.CASCADE)
     exam = models.ForeignKey(
@@ -61,8 +56,113 @@ class Question(models.Model):
             text=self.text, id=self.id
         )
 
+    @property
+    def correct_answers(self):
+        """Correct answers of the question, see OptionAnswers."""
+
+        return OptionAnswers(self, is_correct=True)
+
+    @property
+    def wrong_answers(self):
+        """Wrong answers of the question, see OptionAnswers."""
+
+        return OptionAnswers(self, is_correct=False)
+
     def correct_answer_ids(self):
-        return (answer.id for answer in self.correct_answers.all())
+        return self.options.filter(is_correct=True).values_list(
+            "answer_id", flat=True
+        )
+
+
+class QuestionOption(models.Model):
+    """Answer offered by a question, in the order it's offered."""
+
+    question = models.ForeignKey(
+        Question, related_name="options", on_delete=models.CASCADE
+    )
+    answer = models.ForeignKey(
+        Answer, related_name="options", on_delete=models.CASCADE
+    )
+    is_correct = models.BooleanField(
+        verbose_name=_("is correct"), default=False
+    )
+    position = models.PositiveIntegerField(
+        verbose_name=_("position"), default=0
+    )
+
+    class Meta:
+        """Meta class for Question Option model."""
+
+        verbose_name = _("question option")
+        verbose_name_plural = _("question options")
+        ordering = ("question", "position", "id")
+        constraints = [
+            models.UniqueConstraint(
+                fields=("question", "answer"), name="unique_question_answer"
+            )
+        ]
+        indexes = [models.Index(fields=("question", "position", "id"))]
+
+    def __str__(self):
+        return _("<Option>: {answer} of question# {question}").format(
+            answer=self.answer_id, question=self.question_id
+        )
+
+
+class OptionAnswers:
+    """
+    Answers of a question that are either correct or wrong.
+
+    Stands in for the correct_answers and wrong_answers many-to-many
+    managers questions used to have. Adding an answer the question
+    already offers moves it to this kind, new answers go last.
+    """
+
+    def __init__(self, question, is_correct):
+        self.question = question
+        self.is_correct = is_correct
+
+    def _options(self):
+        return self.question.options.filter(is_correct=self.is_correct)
+
+    def all(self):
+        return Answer.objects.filter(
+            options__question=self.question,
+            options__is_correct=self.is_correct,
+        ).order_by("options__position", "options__id")
+
+    def add(self, *answers):
+        position = self.question.options.aggregate(position=Max("position"))[
+            "position"
+        ]
+        position = -1 if position is None else position
+        for answer in answers:
+            option, created = QuestionOption.objects.get_or_create(
+                question=self.question,
+                answer_id=getattr(answer, "pk", answer),
+                defaults={
+                    "is_correct": self.is_correct,
+                    "position": position + 1,
+                },
+            )
+            if created:
+                position += 1
+            elif option.is_correct != self.is_correct:
+                option.is_correct = self.is_correct
+                option.save(update_fields=["is_correct"])
+
+    def remove(self, *answers):
+        self._options().filter(
+            answer_id__in=[getattr(answer, "pk", answer) for answer in answers]
+        ).delete()
+
+    def clear(self):
+        self._options().delete()
+
+    def set(self, answers):
+        answer_ids = [getattr(answer, "pk", answer) for answer in answers]
+        self._options().exclude(answer_id__in=answer_ids).delete()
+        self.add(*answer_ids)
 
 
 class QuestionCategory(models.Model):
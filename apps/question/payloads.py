@@ -0,0 +1,149 @@
+"""Cached, pre-serialized question payloads."""
+import hashlib
+import random
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+
+from apps.question.models import Question, QuestionOption
+from apps.question.serializers import QuestionSerializer
+
+
+def _version_key(question_id):
+    return f"question_version:{question_id}"
+
+
+def _payload_key(question_id, version):
+    return f"question_payload:{question_id}:{version}"
+
+
+def _versions(question_ids):
+    """
+    Return current payload versions of questions.
+
+    Missing versions are minted. A minted version evicted before it's
+    read back is still returned, it just won't match next time.
+    """
+
+    keys = {
+        _version_key(question_id): question_id for question_id in question_ids
+    }
+    versions = {
+        keys[key]: version for key, version in cache.get_many(keys).items()
+    }
+
+    missing = {
+        _version_key(question_id): uuid.uuid4().hex
+        for question_id in question_ids
+        if question_id not in versions
+    }
+    if missing:
+        for key, version in missing.items():
+            cache.add(key, version, timeout=None)
+        versions.update(
+            (keys[key], version)
+            for key, version in cache.get_many(missing).items()
+        )
+        for key, version in missing.items():
+            versions.setdefault(keys[key], version)
+    return versions
+
+
+def invalidate_payloads(*question_ids):
+    """
+    Mark cached payloads of questions as outdated.
+
+    Versions are dropped right away and once more on commit, so a payload
+    rebuilt from not yet committed data doesn't outlive the change.
+    """
+
+    keys = [_version_key(question_id) for question_id in question_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def get_payloads(question_ids):
+    """
+    Return a dict of question id to its serialized payload.
+
+    Payloads are read from the cache and the missing ones are serialized
+    together with a constant number of queries. Answers are in a fixed
+    order, see shuffle_answers() for the order shown to a student.
+    Unknown question ids are left out.
+    """
+
+    versions = _versions(question_ids)
+    keys = {
+        _payload_key(question_id, version): question_id
+        for question_id, version in versions.items()
+    }
+    payloads = {
+        keys[key]: payload for key, payload in cache.get_many(keys).items()
+    }
+
+    missing = [
+        question_id
+        for question_id in question_ids
+        if question_id not in payloads
+    ]
+    if missing:
+        built = {
+            question.id: QuestionSerializer(question).data
+            for question in Question.objects.filter(
+                id__in=missing
+            ).prefetch_related(
+                Prefetch(
+                    "options",
+                    queryset=QuestionOption.objects.select_related("answer"),
+                )
+            )
+        }
+        cache.set_many(
+            {
+                _payload_key(question_id, versions[question_id]): payload
+                for question_id, payload in built.items()
+            },
+            timeout=None,
+        )
+        payloads.update(built)
+
+    return payloads
+
+
+def payloads_etag(question_ids, attempt_id):
+    """
+    Return an entity tag of the payloads of questions in an attempt.
+
+    It only reads payload versions from the cache, so an unchanged bundle
+    is recognized without touching the database.
+    """
+
+    versions = _versions(question_ids)
+    digest = hashlib.md5(str(attempt_id).encode())
+    for question_id in question_ids:
+        digest.update(f":{question_id}:{versions[question_id]}".encode())
+    return digest.hexdigest()
+
+
+def shuffle_answers(payload, attempt_id):
+    """
+    Return a copy of payload with answers shuffled for an attempt.
+
+    The order only depends on the attempt and the question, so it stays
+    the same across reloads.
+    """
+
+    answers = sorted(payload["answers"], key=lambda answer: answer["id"])
+    random.Random(f"{attempt_id}:{payload['id']}").shuffle(answers)
+    return {**payload, "answers": answers}
+
+
+def question_payload(question_id, attempt_id):
+    """Return the payload of a question as shown in an attempt."""
+
+    payload = get_payloads([question_id]).get(question_id)
+    if payload is None:
+        raise Question.DoesNotExist
+    return shuffle_answers(payload, attempt_id)
@@ -0,0 +1,109 @@
+"""Database-side sampling of exam questions."""
+import random
+from collections import defaultdict
+
+from django.db.models import Count, F, IntegerField, Value
+
+from apps.question.models import Question
+
+# Questions are ordered by a seeded hash of their id computed by the
+# database, which is a reproducible shuffle of the whole pool. Picking the
+# first k rows of a stratum by that order is a uniform sample that never
+# loads more than k ids into memory.
+SAMPLE_MODULUS = 2147483647
+SAMPLE_MULTIPLIER = 48271
+
+
+def new_seed():
+    """Return a random sampling seed."""
+
+    return random.randrange(SAMPLE_MODULUS)
+
+
+def sample_key(seed):
+    """Return the expression of question order for a seed."""
+
+    seed = Value(seed, output_field=IntegerField())
+    mixed = (F("id") * SAMPLE_MULTIPLIER + seed) % SAMPLE_MODULUS
+    return (mixed * mixed + seed) % SAMPLE_MODULUS
+
+
+def allocate(sizes, count):
+    """
+    Split count between strata proportionally to their sizes.
+
+    Uses the largest remainder method, so allocations add up to count
+    (or to the whole pool when it's smaller) and never exceed a stratum.
+    """
+
+    total = sum(sizes.values())
+    if count >= total:
+        return dict(sizes)
+
+    allocation = {}
+    remainders = []
+    for stratum, size in sizes.items():
+        allocation[stratum], remainder = divmod(count * size, total)
+        remainders.append((-remainder, stratum))
+
+    for _, stratum in sorted(remainders)[: count - sum(allocation.values())]:
+        allocation[stratum] += 1
+
+    return allocation
+
+
+def sample_questions(exam_ids, count, seed, category_quotas=None):
+    """
+    Pick count question ids of exams inside the database.
+
+    Questions are allocated between exams proportionally to their pool
+    sizes. category_quotas maps category ids to the number of questions
+    to take from them, spread over exams the same way; questions of other
+    categories fill up the rest of count. Ids are returned in sample order,
+    which is the same for the same seed and pool.
+    """
+
+    category_quotas = category_quotas or {}
+    pool = Question.objects.filter(exam_id__in=exam_ids)
+
+    sizes = defaultdict(dict)
+    for exam_id, category_id, size in (
+        pool.order_by()
+        .values_list("exam", "category")
+        .annotate(size=Count("id"))
+    ):
+        if category_id not in category_quotas:
+            category_id = None
+        sizes[category_id][exam_id] = sizes[category_id].get(exam_id, 0) + size
+
+    strata = {}
+    for category_id, quota in category_quotas.items():
+        for exam_id, size in allocate(
+            sizes.get(category_id, {}), quota
+        ).items():
+            strata[exam_id, category_id] = size
+
+    rest = max(count - sum(strata.values()), 0)
+    for exam_id, size in allocate(sizes.get(None, {}), rest).items():
+        strata[exam_id, None] = size
+
+    key = sample_key(seed)
+    sample = []
+    for (exam_id, category_id), size in strata.items():
+        if not size:
+            continue
+
+        stratum = pool.filter(exam_id=exam_id)
+        if category_id is None:
+            if category_quotas:
+                stratum = stratum.exclude(category_id__in=category_quotas)
+        else:
+            stratum = stratum.filter(category_id=category_id)
+
+        sample.extend(
+            stratum.annotate(sample_key=key)
+            .order_by("sample_key", "id")
+            .values_list("sample_key", "id")[:size]
+        )
+
+    return [question_id for _, question_id in sorted(sample)]
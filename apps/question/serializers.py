@@ -1,5 +1,3 @@
-import random
-
 from rest_framework import serializers
 
 from apps.question.models import Answer, Question
@@ -14,18 +12,38 @@ class AnswerSerializer(serializers.ModelSerializer):
 
 
 class QuestionSerializer(serializers.ModelSerializer):
-    """Serializer for Question model."""
+    """
+    Serializer for Question model.
+
+    Answers aren't shuffled here, attempts shuffle them with
+    apps.question.payloads.shuffle_answers().
+    """
 
     answers = serializers.SerializerMethodField()
 
     def get_answers(self, obj):
-        """Combine correct and wrong answers and shuffle them."""
+        """Return answers of the question's options, correct or not."""
 
-        answers = list(obj.correct_answers.all())
-        answers.extend(obj.wrong_answers.all())
-        random.shuffle(answers)
-        return AnswerSerializer(answers, many=True).data
+        return AnswerSerializer(
+            [option.answer for option in obj.options.all()], many=True
+        ).data
 
     class Meta:
         model = Question
         fields = ("id", "text", "type", "answers")
+
+
+class AnswerSubmissionSerializer(serializers.Serializer):
+    """Serializer for answers submitted in a batch."""
+
+    question_id = serializers.IntegerField()
+    answer_ids = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False
+    )
+    key = serializers.CharField(max_length=64, required=False)
+
+
+class AnswerBatchSerializer(serializers.Serializer):
+    """Serializer for a batch of submitted answers."""
+
+    answers = AnswerSubmissionSerializer(many=True)
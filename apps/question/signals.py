@@ -0,0 +1,60 @@
+"""Question app signal handlers."""
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.question.cache import answer_keys
+from apps.question.models import Answer, Question, QuestionOption
+from apps.question.payloads import invalidate_payloads
+
+
+@receiver(pre_save, sender=Question)
+def remember_question_exam(sender, instance, raw, **kwargs):
+    """Remember the exam a question belonged to before it's saved."""
+
+    instance._previous_exam_id = (
+        Question.objects.filter(pk=instance.pk)
+        .values_list("exam_id", flat=True)
+        .first()
+        if instance.pk and not raw
+        else None
+    )
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_answer_key(sender, instance, **kwargs):
+    """Invalidate answer keys of exams the question belongs to."""
+
+    exam_ids = {instance.exam_id}
+    previous_exam_id = getattr(instance, "_previous_exam_id", None)
+    if previous_exam_id is not None:
+        exam_ids.add(previous_exam_id)
+    answer_keys.invalidate(*exam_ids)
+    invalidate_payloads(instance.id)
+
+
+@receiver(post_save, sender=QuestionOption)
+@receiver(post_delete, sender=QuestionOption)
+def invalidate_question_options(sender, instance, **kwargs):
+    """Invalidate answer keys and payloads when options change."""
+
+    answer_keys.invalidate(
+        *Question.objects.filter(pk=instance.question_id).values_list(
+            "exam_id", flat=True
+        )
+    )
+    invalidate_payloads(instance.question_id)
+
+
+@receiver(post_save, sender=Answer)
+def invalidate_answer_text(sender, instance, created, **kwargs):
+    """Invalidate answer keys and payloads of questions using the answer."""
+
+    if created:
+        return
+
+    questions = Question.objects.filter(options__answer=instance)
+    answer_keys.invalidate(
+        *questions.values_list("exam_id", flat=True).distinct()
+    )
+    invalidate_payloads(*questions.values_list("id", flat=True))
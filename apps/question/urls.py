@@ -2,21 +2,52 @@
 
 from django.urls import path
 
+from apps.core.views import select_view
+from apps.question.async_views import (
+    AsyncQuestionAnswerView,
+    AsyncQuestionView,
+)
 from apps.question.views import (
+    AnswerBatchView,
+    CheckAnswersView,
     CheckAnswerView,
     QuestionAnswerView,
+    QuestionBundleView,
     QuestionView,
+    VerificationBundleView,
 )
 
 urlpatterns = [
     path(
         "api/attempt/<int:attempt_id>/question/",
-        QuestionView.as_view(),
+        select_view("question_api", QuestionView, AsyncQuestionView),
         name="question_api",
     ),
+    path(
+        "api/attempt/<int:attempt_id>/answers/",
+        AnswerBatchView.as_view(),
+        name="answer_batch_api",
+    ),
+    path(
+        "api/attempt/<int:attempt_id>/bundle/",
+        QuestionBundleView.as_view(),
+        name="question_bundle_api",
+    ),
+    path(
+        "api/attempt/<int:attempt_id>/verification/",
+        VerificationBundleView.as_view(),
+        name="verification_bundle_api",
+    ),
+    path(
+        "api/attempt/<int:attempt_id>/check_answers/",
+        CheckAnswersView.as_view(),
+        name="check_answers_api",
+    ),
     path(
         "api/attempt/<int:attempt_id>/<int:question_id>/",
-        QuestionAnswerView.as_view(),
+        select_view(
+            "question_answers_api", QuestionAnswerView, AsyncQuestionAnswerView
+        ),
         name="question_answers_api",
     ),
     path(
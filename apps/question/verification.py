@@ -0,0 +1,96 @@
+"""Answer verification bundles for practice attempts."""
+import hashlib
+import json
+
+from django.core.signing import Signer
+from django.utils.crypto import salted_hmac
+
+from apps.question.cache import answer_keys
+
+SIGNER_SALT = "apps.question.verification"
+
+
+def attempt_salt(attempt_id):
+    """Return the answer hash salt of an attempt."""
+
+    return salted_hmac(SIGNER_SALT, f"attempt:{attempt_id}").hexdigest()
+
+
+def answer_set_hash(salt, question_id, answer_ids):
+    """
+    Return the salted hash of a set of answers to a question.
+
+    Answer ids are sorted, so the hash only depends on the set. Clients
+    hash the picked answers the same way and compare.
+    """
+
+    answer_ids = ",".join(str(answer_id) for answer_id in sorted(answer_ids))
+    return hashlib.sha256(
+        f"{salt}:{question_id}:{answer_ids}".encode()
+    ).hexdigest()
+
+
+def verification_bundle(attempt):
+    """
+    Return a signed bundle to check answers of attempt locally.
+
+    Every question of the attempt comes with the salted hash of its
+    correct answer set and the texts of correct answers, read from the
+    answer key cache. Hashes keep answer ids out of plain sight, but the
+    bundle gives answers away, so it's only meant for practice attempts.
+    """
+
+    salt = attempt_salt(attempt.id)
+    for exam_id in attempt.exams.values_list("id", flat=True):
+        answer_keys.get(exam_id)
+
+    questions = []
+    for question_id in attempt.question_ids():
+        questions.append(
+            {
+                "id": question_id,
+                "hash": answer_set_hash(
+                    salt,
+                    question_id,
+                    answer_keys.correct_answer_ids(question_id),
+                ),
+                "correct_answers": list(
+                    answer_keys.correct_answer_texts(question_id)
+                ),
+            }
+        )
+
+    bundle = {"attempt": attempt.id, "salt": salt, "questions": questions}
+    bundle["signature"] = Signer(salt=SIGNER_SALT).signature(
+        json.dumps(bundle, sort_keys=True)
+    )
+    return bundle
+
+
+def check_answers(submissions):
+    """
+    Check picked answers against the answer key cache.
+
+    submissions is a list of dicts with `question_id` and `answer_ids`.
+    Return a list of results in the same order, wrong ones come with the
+    texts of correct answers.
+    """
+
+    results = []
+    for submission in submissions:
+        question_id = submission["question_id"]
+        if set(submission["answer_ids"]) == answer_keys.correct_answer_ids(
+            question_id
+        ):
+            results.append({"question_id": question_id, "result": "correct"})
+        else:
+            results.append(
+                {
+                    "question_id": question_id,
+                    "result": "wrong",
+                    "correct_answers": list(
+                        answer_keys.correct_answer_texts(question_id)
+                    ),
+                }
+            )
+    return results
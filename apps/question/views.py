@@ -1,16 +1,33 @@
 """Question Views Methods."""
-import random
 
+from django.core.exceptions import ValidationError
 from django.http import Http404
-from django.shortcuts import get_object_or_404
-from rest_framework import status
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import serializers, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from apps.exam.models import AnswerAttempt, ExamAttempt
-from apps.question.models import Answer, Question
-from apps.question.serializers import QuestionSerializer
+from apps.exam.services import (
+    buffer_answer,
+    get_attempt,
+    next_question_payload,
+    picked_answer_ids,
+    record_answers,
+    save_answer,
+    write_behind,
+)
+from apps.question.cache import answer_keys
+from apps.question.models import Question
+from apps.question.payloads import (
+    get_payloads,
+    payloads_etag,
+    question_payload,
+    shuffle_answers,
+)
+from apps.question.serializers import AnswerBatchSerializer
+from apps.question.verification import check_answers, verification_bundle
 
 
 class APIAttemptBase(APIView):
@@ -20,9 +37,12 @@ class APIAttemptBase(APIView):
 
     def dispatch(self, request, *args, **kwargs):
 
-        self.attempt = get_object_or_404(
-            ExamAttempt, id=self.kwargs["attempt_id"], user=request.user.id
-        )
+        try:
+            self.attempt = get_attempt(
+                self.kwargs["attempt_id"], request.user.id
+            )
+        except ExamAttempt.DoesNotExist:
+            raise Http404
         return super().dispatch(request, *args, **kwargs)
 
 
@@ -32,51 +52,75 @@ class QuestionView(APIAttemptBase):
     def get(self, request, **kwargs):
         """Send a question object to frontend."""
 
-        questions = self.attempt.questions.exclude(
-            id__in=self.attempt.answered_question_ids
-        )
-        if questions:
-            return Response(QuestionSerializer(random.choice(questions)).data)
+        try:
+            payload = next_question_payload(self.attempt)
+        except Question.DoesNotExist:
+            raise Http404
+        if payload is not None:
+            return Response(payload)
 
         return Response(status=status.HTTP_200_OK)
 
     def post(self, request, **kwargs):
-        """Save answers to AnswerAttempt."""
+        """
+        Save answers to AnswerAttempt.
+
+        Answers buffered to be written later are acknowledged with 202.
+        """
 
         data = request.data
-        answer_ids = data.get("answers")
+        if hasattr(data, "getlist"):
+            answer_ids = data.getlist("answers")
+        else:
+            answer_ids = data.get("answers")
         if self.attempt.is_in_exam_mode and not self.attempt.time_left_seconds:
             raise Http404
 
-        if not data or not answer_ids:
+        if not data or not answer_ids or "question_id" not in data:
             raise Http404
 
-        # Try to update an existing answer attempt.
+        save = buffer_answer if write_behind(self.attempt) else save_answer
         try:
-            answer_attempt = AnswerAttempt.objects.prefetch_related(
-                "answers"
-            ).get(attempt=self.attempt, question=data["question_id"])
+            created = save(
+                self.attempt,
+                int(data["question_id"]),
+                [int(answer_id) for answer_id in answer_ids],
+            )
+        except Question.DoesNotExist:
+            raise Http404
+        except ValidationError as error:
+            raise serializers.ValidationError(error.messages)
 
-            if set((a.id for a in answer_attempt.answers.all())) == set(
-                answer_ids
-            ):
-                return Response(status=status.HTTP_200_OK)
+        if save is buffer_answer:
+            return Response(status=status.HTTP_202_ACCEPTED)
+        if created:
+            return Response(status=status.HTTP_201_CREATED)
+        return Response(status=status.HTTP_200_OK)
 
-            answer_attempt.answers.set(
-                Answer.objects.filter(id__in=answer_ids)
-            )
-            return Response(status=status.HTTP_200_OK)
-        except AnswerAttempt.DoesNotExist:
-            pass
 
-        # Create a new answer attempt.
-        answer_attempt = AnswerAttempt.objects.create(
-            attempt_id=self.attempt.id, question_id=data["question_id"]
-        )
-        for answer_id in answer_ids:
-            answer_attempt.answers.add(Answer.objects.get(id=answer_id))
+class AnswerBatchView(APIAttemptBase):
+    """Answers submitted in a batch."""
+
+    def post(self, request, **kwargs):
+        """
+        Save many answers of the attempt at once.
 
-        return Response(status=status.HTTP_201_CREATED)
+        Expects {"answers": [{"question_id", "answer_ids", "key"}, ...]},
+        submissions with an already recorded key are skipped.
+        """
+
+        if self.attempt.is_in_exam_mode and not self.attempt.time_left_seconds:
+            raise Http404
+
+        serializer = AnswerBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        submissions = serializer.validated_data["answers"]
+        try:
+            result = record_answers(self.attempt, submissions)
+        except ValidationError as error:
+            raise serializers.ValidationError(error.messages)
+
+        return Response(result)
 
 
 class QuestionAnswerView(APIAttemptBase):
@@ -85,40 +129,117 @@ class QuestionAnswerView(APIAttemptBase):
     def get(self, request, **kwargs):
         """Returns answered question and picked answers from AttemptAnswer."""
 
-        question = get_object_or_404(Question, id=self.kwargs["question_id"])
+        question_id = self.kwargs["question_id"]
+        if question_id not in self.attempt.question_ids():
+            raise Http404
 
-        if question not in self.attempt.questions.all():
+        try:
+            answer_ids = picked_answer_ids(self.attempt, question_id)
+            payload = question_payload(question_id, self.attempt.id)
+        except (AnswerAttempt.DoesNotExist, Question.DoesNotExist):
             raise Http404
 
-        answer_attempt = AnswerAttempt.objects.get(
-            attempt=self.attempt.id, question=question.id
-        )
+        return Response({"answer_ids": answer_ids, "question": payload})
+
+
+class QuestionBundleView(APIAttemptBase):
+    """All questions of a practice attempt in one response."""
+
+    def get(self, request, **kwargs):
+        """
+        Send every question of the attempt in delivery order.
+
+        Responses carry an ETag, a reload with a matching If-None-Match
+        gets 304 Not Modified without building the bundle.
+        """
+
+        if not self.attempt.is_in_practice_mode:
+            raise Http404
+
+        question_ids = self.attempt.question_ids()
+        etag = quote_etag(payloads_etag(question_ids, self.attempt.id))
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = parse_etags(request.headers.get("If-None-Match", ""))
+        if etag in if_none_match or "*" in if_none_match:
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED, headers=headers
+            )
+
+        payloads = get_payloads(question_ids)
+        questions = [
+            shuffle_answers(payloads[question_id], self.attempt.id)
+            for question_id in question_ids
+            if question_id in payloads
+        ]
+        return Response({"questions": questions}, headers=headers)
+
+
+class VerificationBundleView(APIAttemptBase):
+    """Answer verification bundle of a practice attempt."""
+
+    def get(self, request, **kwargs):
+        """Send hashes and texts of correct answers to check them locally."""
+
+        if not self.attempt.is_in_practice_mode:
+            raise Http404
 
-        answer_ids = [answer.id for answer in answer_attempt.answers.all()]
         return Response(
-            {
-                "answer_ids": answer_ids,
-                "question": QuestionSerializer(question).data,
-            }
+            verification_bundle(self.attempt),
+            headers={"Cache-Control": "private, no-store"},
         )
 
 
+class CheckAnswersView(APIAttemptBase):
+    """Answers of a practice attempt checked in a batch."""
+
+    def post(self, request, **kwargs):
+        """
+        Check many answers at once.
+
+        Expects {"answers": [{"question_id", "answer_ids"}, ...]}, for
+        clients that can't use the verification bundle.
+        """
+
+        if not self.attempt.is_in_practice_mode:
+            raise Http404
+
+        serializer = AnswerBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        submissions = serializer.validated_data["answers"]
+
+        question_ids = set(self.attempt.question_ids())
+        for submission in submissions:
+            if submission["question_id"] not in question_ids:
+                raise Http404
+
+        try:
+            return Response({"results": check_answers(submissions)})
+        except Question.DoesNotExist:
+            raise Http404
+
+
 class CheckAnswerView(APIView):
     def post(self, request, **kwargs):
 
         data = request.data
-        question = Question.objects.get(id=self.kwargs["question_id"])
-        correct_answer_ids = (
-            int(answer_id) for answer_id in data["answer_ids"]
-        )
-        if set(correct_answer_ids) == set((question.correct_answer_ids())):
+        try:
+            correct_answer_ids = answer_keys.correct_answer_ids(
+                self.kwargs["question_id"]
+            )
+        except Question.DoesNotExist:
+            raise Http404
+
+        answer_ids = (int(answer_id) for answer_id in data["answer_ids"])
+        if set(answer_ids) == correct_answer_ids:
             return Response({"result": "correct"})
 
         return Response(
             {
                 "result": "wrong",
-                "correct_answers": [
-                    answer.text for answer in question.correct_answers.all()
-                ],
+                "correct_answers": list(
+                    answer_keys.correct_answer_texts(
+                        self.kwargs["question_id"]
+                    )
+                ),
             }
         )
@@ -9,7 +9,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.exam.models import Exam, ExamAttempt
+from apps.exam.models import AttemptSummary, Exam, ExamAttempt
 from apps.user.forms import EditProfileForm, LoginForm, SignupForm
 
 
@@ -44,6 +44,25 @@ class Logout(TemplateView):
         return redirect("login")
 
 
+def exam_history(user):
+    """Return summaries of finished exam mode attempts of user."""
+
+    return AttemptSummary.objects.filter(
+        user=user, mode=ExamAttempt.EXAM_MODE
+    ).order_by("-created")
+
+
+def attempted_exam_ids(attempts):
+    """Return distinct ids of exams of attempts, paged and counted in SQL."""
+
+    return (
+        ExamAttempt.exams.through.objects.filter(examattempt__in=attempts)
+        .order_by("exam")
+        .values_list("exam", flat=True)
+        .distinct()
+    )
+
+
 class Profile(LoginRequiredMixin, ListView):
     """Profile methods."""
 
@@ -54,32 +73,25 @@ class Profile(LoginRequiredMixin, ListView):
         """Get context."""
 
         show_charts = 2
-        exam_ids = (
+        exam_ids = attempted_exam_ids(
             ExamAttempt.objects.filter(
                 user=self.request.user, mode=ExamAttempt.EXAM_MODE
             )
-            .values_list("exams", flat=True)
-            .distinct()[:show_charts]
         )
         context = super().get_context_data(**kwargs)
         context.update(
             {
-                "exams_count": ExamAttempt.objects.filter(
-                    user=self.request.user, mode=ExamAttempt.EXAM_MODE
-                )
-                .values("exams")
-                .distinct()
-                .count(),
-                "exam_ids": list(exam_ids),
+                "exams_count": exam_ids.count(),
+                "exam_ids": list(exam_ids[:show_charts]),
             }
         )
 
         return context
 
     def get_queryset(self):
-        return ExamAttempt.objects.filter(
-            user=self.request.user, mode=ExamAttempt.EXAM_MODE
-        ).order_by("-created")
+        """Return attempt summaries, paged by the history index."""
+
+        return exam_history(self.request.user)
 
 
 class ProfileChart(APIView):
@@ -158,7 +170,7 @@ class EditProfile(LoginRequiredMixin, TemplateView):
         return render(request, self.template_name, {"form": form})
 
 
-class ProgressCharts(ListView):
+class ProgressCharts(LoginRequiredMixin, ListView):
 
     paginate_by = 2
     template_name = "user/progress_charts.html"
@@ -166,9 +178,6 @@ class ProgressCharts(ListView):
     def get_queryset(self):
         """Return list of exam ids for current user."""
 
-        return list(
+        return attempted_exam_ids(
             ExamAttempt.objects.filter(user=self.request.user)
-            .select_related("exam", "exam__subject")
-            .values_list("exam", flat=True)
-            .distinct()
         )
@@ -0,0 +1,47 @@
+"""
+Benchmarks for exam hot paths.
+
+Every benchmark runs against a throwaway test database and is started
+from the project root, e.g. `python -m benchmarks.sampling`.
+"""
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+def setup():
+    """Configure Django for a standalone benchmark script."""
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    """Create a test database for the benchmark and drop it afterwards."""
+
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(func, *args, **kwargs):
+    """Return the seconds and peak bytes of memory spent calling func."""
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    func(*args, **kwargs)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
@@ -0,0 +1,242 @@
+"""
+Compare storage and reads of picked answers kept inline and in a join table.
+
+Answer attempts used to keep picked answers in an `answers` many-to-many
+table, one row per pick. They now keep them inline as packed integers.
+The benchmark fills answer attempts with random picks, rebuilds the old
+join table next to them and reports the bytes taken by the picks and the
+queries and time needed to read the picks of an attempt. Sizes come from
+SQLite's dbstat table.
+"""
+import argparse
+import random
+import time
+
+from benchmarks import benchmark_database, setup
+
+LEGACY_TABLE = "benchmark_answerattempt_answers"
+
+
+def table_bytes(cursor, table):
+    """Return the bytes of pages used by a table and its indexes."""
+
+    cursor.execute(
+        "SELECT SUM(pgsize) FROM dbstat WHERE name IN "
+        "(SELECT name FROM sqlite_master WHERE tbl_name = %s)",
+        [table],
+    )
+    return cursor.fetchone()[0] or 0
+
+
+def inline_bytes(cursor):
+    """Return the bytes taken by the answer_ids column of answer attempts."""
+
+    sizes = []
+    for name, columns in (
+        ("benchmark_with_picks", "id, attempt_id, question_id, answer_ids"),
+        ("benchmark_without_picks", "id, attempt_id, question_id"),
+    ):
+        cursor.execute(
+            f"CREATE TABLE {name} AS SELECT {columns} FROM exam_answerattempt"
+        )
+        sizes.append(table_bytes(cursor, name))
+        cursor.execute(f"DROP TABLE {name}")
+    return sizes[0] - sizes[1]
+
+
+def create_legacy_table(cursor, batch_size):
+    """Copy the picks into a join table shaped like the old one."""
+
+    from apps.exam.models import AnswerAttempt
+
+    cursor.execute(
+        f"CREATE TABLE {LEGACY_TABLE} ("
+        "id integer NOT NULL PRIMARY KEY AUTOINCREMENT, "
+        "answerattempt_id bigint NOT NULL, "
+        "answer_id bigint NOT NULL)"
+    )
+    cursor.execute(
+        f"CREATE UNIQUE INDEX {LEGACY_TABLE}_uniq "
+        f"ON {LEGACY_TABLE} (answerattempt_id, answer_id)"
+    )
+    cursor.execute(
+        f"CREATE INDEX {LEGACY_TABLE}_answer_id "
+        f"ON {LEGACY_TABLE} (answer_id)"
+    )
+
+    rows = []
+    for answer_attempt_id, answer_ids in AnswerAttempt.objects.values_list(
+        "id", "answer_ids"
+    ).iterator(chunk_size=batch_size):
+        rows.extend((answer_attempt_id, answer_id) for answer_id in answer_ids)
+        if len(rows) >= batch_size:
+            insert_legacy_rows(cursor, rows)
+            rows = []
+    insert_legacy_rows(cursor, rows)
+
+
+def insert_legacy_rows(cursor, rows):
+    cursor.executemany(
+        f"INSERT INTO {LEGACY_TABLE} (answerattempt_id, answer_id) "
+        "VALUES (%s, %s)",
+        rows,
+    )
+
+
+def read_legacy(attempt_id):
+    """Return picks of an attempt the way the join table was prefetched."""
+
+    from django.db import connection
+
+    from apps.exam.models import AnswerAttempt
+
+    answer_attempts = dict(
+        AnswerAttempt.objects.filter(attempt=attempt_id).values_list(
+            "id", "question"
+        )
+    )
+    picked = {question_id: [] for question_id in answer_attempts.values()}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT answerattempt_id, answer_id FROM {LEGACY_TABLE} "
+            "WHERE answerattempt_id IN (SELECT id FROM exam_answerattempt "
+            "WHERE attempt_id = %s)",
+            [attempt_id],
+        )
+        for answer_attempt_id, answer_id in cursor.fetchall():
+            picked[answer_attempts[answer_attempt_id]].append(answer_id)
+    return picked
+
+
+def read_inline(attempt_id):
+    """Return picks of an attempt from the inline column."""
+
+    from apps.exam.models import AnswerAttempt
+
+    return dict(
+        AnswerAttempt.objects.filter(attempt=attempt_id).values_list(
+            "question", "answer_ids"
+        )
+    )
+
+
+def measure_reads(read, attempt_ids):
+    """Return the queries and seconds spent per read of attempt picks."""
+
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for attempt_id in attempt_ids:
+            read(attempt_id)
+        elapsed = time.perf_counter() - started
+    return len(queries) / len(attempt_ids), elapsed / len(attempt_ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--attempts", type=int, default=20000, help="exam attempts"
+    )
+    parser.add_argument(
+        "--questions", type=int, default=50, help="questions per attempt"
+    )
+    parser.add_argument(
+        "--reads", type=int, default=500, help="attempts read per layout"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=10000, help="rows per insert"
+    )
+    args = parser.parse_args()
+
+    setup()
+
+    from django.db import connection
+
+    from apps.exam.models import AnswerAttempt, Exam, ExamAttempt, Subject
+    from apps.question.models import Answer, Question, QuestionCategory
+    from apps.user.models import User
+
+    rng = random.Random(42)
+    with benchmark_database():
+        subject = Subject.objects.create(name="Benchmark")
+        exam = Exam.objects.create(name="Benchmark", subject=subject)
+        category = QuestionCategory.objects.create(name="Benchmark")
+        choices = {}
+        for i in range(args.questions):
+            question = Question.objects.create(
+                text=f"Question {i}", exam=exam, category=category
+            )
+            answers = Answer.objects.bulk_create(
+                Answer(text=f"Answer {i} {j}") for j in range(4)
+            )
+            question.correct_answers.add(answers[0])
+            question.wrong_answers.add(*answers[1:])
+            choices[question.id] = [answer.id for answer in answers]
+
+        user = User.objects.create_user("benchmark")
+        ExamAttempt.objects.bulk_create(
+            (ExamAttempt(user=user) for _ in range(args.attempts)),
+            batch_size=args.batch_size,
+        )
+        attempt_ids = list(ExamAttempt.objects.values_list("id", flat=True))
+        AnswerAttempt.objects.bulk_create(
+            (
+                AnswerAttempt(
+                    attempt_id=attempt_id,
+                    question_id=question_id,
+                    answer_ids=sorted(
+                        rng.sample(answer_ids, rng.randint(1, 2))
+                    ),
+                )
+                for attempt_id in attempt_ids
+                for question_id, answer_ids in choices.items()
+            ),
+            batch_size=args.batch_size,
+        )
+
+        with connection.cursor() as cursor:
+            create_legacy_table(cursor, args.batch_size)
+            cursor.execute(f"SELECT COUNT(*) FROM {LEGACY_TABLE}")
+            legacy_rows = cursor.fetchone()[0]
+            legacy_bytes = table_bytes(cursor, LEGACY_TABLE)
+            packed_bytes = inline_bytes(cursor)
+
+        answer_attempts = args.attempts * args.questions
+        sample = rng.sample(attempt_ids, min(args.reads, len(attempt_ids)))
+        legacy_queries, legacy_time = measure_reads(read_legacy, sample)
+        inline_queries, inline_time = measure_reads(read_inline, sample)
+
+        print(
+            f"{args.attempts} attempts, {answer_attempts} answer attempts, "
+            f"{legacy_rows} picks"
+        )
+        print(
+            f"{'layout':<8} {'rows':>10} {'MiB':>8} "
+            f"{'queries/read':>13} {'ms/read':>8}"
+        )
+        for name, rows, size, queries, elapsed in (
+            (
+                "m2m",
+                answer_attempts + legacy_rows,
+                legacy_bytes,
+                legacy_queries,
+                legacy_time,
+            ),
+            (
+                "inline",
+                answer_attempts,
+                packed_bytes,
+                inline_queries,
+                inline_time,
+            ),
+        ):
+            print(
+                f"{name:<8} {rows:>10} {size / 2 ** 20:>8.1f} "
+                f"{queries:>13.0f} {elapsed * 1000:>8.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
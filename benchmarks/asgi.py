@@ -0,0 +1,199 @@
+"""
+Compare throughput of exam APIs served by WSGI and by ASGI.
+
+The WSGI handler serves the DRF views from a pool of threads, one per
+concurrent client. The ASGI handler serves the async views from an event
+loop. Both run in process, so the numbers show the cost of the handlers
+and views rather than of a web server.
+"""
+import argparse
+import asyncio
+import importlib
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import benchmark_database, setup
+
+ENDPOINTS = {
+    "question_api": "/api/attempt/{attempt}/question/",
+    "question_answers_api": "/api/attempt/{attempt}/{question}/",
+    "get_attempt": "/api/attempt/{attempt}/",
+}
+
+
+def use_async_views(names):
+    """Serve URLs named names by async views from now on."""
+
+    from django.conf import settings
+    from django.urls import clear_url_caches
+
+    settings.ASYNC_VIEWS = set(names)
+    for module in ("apps.question.urls", "apps.exam.urls", "config.urls"):
+        importlib.reload(importlib.import_module(module))
+    clear_url_caches()
+
+
+def percentile(latencies, fraction):
+    latencies = sorted(latencies)
+    return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)]
+
+
+def run_wsgi(path, cookie, requests, concurrency):
+    """Return latencies of requests sent to the WSGI handler."""
+
+    from django.core.handlers.wsgi import WSGIHandler
+
+    handler = WSGIHandler()
+
+    def request(_):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "SCRIPT_NAME": "",
+            "QUERY_STRING": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "HTTP_HOST": "localhost",
+            "HTTP_COOKIE": cookie,
+            "wsgi.input": io.BytesIO(),
+            "wsgi.url_scheme": "http",
+        }
+        started = time.perf_counter()
+        response = handler(environ, lambda status, headers: None)
+        b"".join(response)
+        response.close()
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return list(executor.map(request, range(requests)))
+
+
+def run_asgi(path, cookie, requests, concurrency):
+    """Return latencies of requests sent to the ASGI handler."""
+
+    from django.core.handlers.asgi import ASGIHandler
+
+    handler = ASGIHandler()
+    scope = {
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"cookie", cookie.encode())],
+    }
+
+    async def request(semaphore):
+        async def receive():
+            return {"type": "http.request", "body": b""}
+
+        statuses = []
+
+        async def send(message):
+            if message["type"] == "http.response.start":
+                statuses.append(message["status"])
+
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(scope, receive, send)
+            assert statuses == [200], statuses
+            return time.perf_counter() - started
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *(request(semaphore) for _ in range(requests))
+        )
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--requests", type=int, default=2000, help="requests per run"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        nargs="+",
+        default=(1, 16, 64, 256),
+        help="concurrent clients",
+    )
+    args = parser.parse_args()
+
+    setup()
+
+    from django.test import Client
+
+    from apps.exam.models import AnswerAttempt, Exam, ExamAttempt, Subject
+    from apps.exam.services import provision_attempt
+    from apps.question.models import Answer, Question, QuestionCategory
+    from apps.user.models import User
+
+    with benchmark_database():
+        subject = Subject.objects.create(name="Benchmark")
+        exam = Exam.objects.create(name="Benchmark", subject=subject)
+        category = QuestionCategory.objects.create(name="Benchmark")
+        for i in range(50):
+            question = Question.objects.create(
+                text=f"Question {i}", exam=exam, category=category
+            )
+            question.correct_answers.add(
+                Answer.objects.create(text=f"Correct {i}")
+            )
+            question.wrong_answers.add(
+                *(
+                    Answer.objects.create(text=f"Wrong {i} {j}")
+                    for j in range(3)
+                )
+            )
+
+        user = User.objects.create_user("benchmark", password="benchmark")
+        attempt = provision_attempt(
+            user, ExamAttempt.PRACTICE_MODE, [exam], 50
+        )
+        question = Question.objects.get(id=attempt.question_ids()[0])
+        AnswerAttempt.objects.create(
+            attempt=attempt,
+            question=question,
+            answer_ids=[
+                answer.id for answer in question.correct_answers.all()
+            ],
+        )
+
+        client = Client()
+        client.force_login(user)
+        cookie = "; ".join(
+            f"{name}={morsel.value}" for name, morsel in client.cookies.items()
+        )
+
+        print(
+            f"{'endpoint':<22} {'clients':>7} {'wsgi rps':>9} "
+            f"{'wsgi p99 ms':>12} {'asgi rps':>9} {'asgi p99 ms':>12}"
+        )
+        for name, path in ENDPOINTS.items():
+            path = path.format(attempt=attempt.id, question=question.id)
+            for concurrency in args.concurrency:
+                results = []
+                for run, names in ((run_wsgi, ()), (run_asgi, ENDPOINTS)):
+                    use_async_views(names)
+                    started = time.perf_counter()
+                    latencies = run(path, cookie, args.requests, concurrency)
+                    elapsed = time.perf_counter() - started
+                    results.append(
+                        (
+                            args.requests / elapsed,
+                            percentile(latencies, 0.99) * 1000,
+                        )
+                    )
+                (wsgi_rps, wsgi_p99), (asgi_rps, asgi_p99) = results
+                print(
+                    f"{name:<22} {concurrency:>7} {wsgi_rps:>9.0f} "
+                    f"{wsgi_p99:>12.1f} {asgi_rps:>9.0f} {asgi_p99:>12.1f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Compare memory used to sample questions from growing pools.
+
+The old way loads every id of the pool and samples them in Python, the
+sampler picks questions inside the database and keeps memory flat.
+"""
+import argparse
+import random
+
+from benchmarks import benchmark_database, measure, setup
+
+
+def python_sample(exam_ids, count):
+    """Sample questions the way attempts used to be provisioned."""
+
+    from apps.question.models import Question
+
+    question_ids = list(
+        Question.objects.filter(exam_id__in=exam_ids).values_list(
+            "id", flat=True
+        )
+    )
+    return random.sample(question_ids, min(count, len(question_ids)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=(1000, 10000, 100000, 200000),
+        help="question pool sizes",
+    )
+    parser.add_argument(
+        "--count", type=int, default=50, help="questions per attempt"
+    )
+    args = parser.parse_args()
+
+    setup()
+
+    from apps.exam.models import Exam, Subject
+    from apps.question.models import Question, QuestionCategory
+    from apps.question.sampling import new_seed, sample_questions
+
+    with benchmark_database():
+        subject = Subject.objects.create(name="Benchmark")
+        exams = [
+            Exam.objects.create(name=f"Exam {i}", subject=subject)
+            for i in range(3)
+        ]
+        exam_ids = [exam.id for exam in exams]
+        category = QuestionCategory.objects.create(name="Benchmark")
+
+        print(
+            f"{'pool':>8} {'python ms':>10} {'python KiB':>11} "
+            f"{'sampler ms':>11} {'sampler KiB':>12}"
+        )
+        pool_size = 0
+        for size in sorted(args.sizes):
+            Question.objects.bulk_create(
+                (
+                    Question(
+                        text=f"Question {i}",
+                        exam=exams[i % len(exams)],
+                        category=category,
+                    )
+                    for i in range(pool_size, size)
+                ),
+                batch_size=5000,
+            )
+            pool_size = size
+
+            python_time, python_peak = measure(
+                python_sample, exam_ids, args.count
+            )
+            sampler_time, sampler_peak = measure(
+                sample_questions, exam_ids, args.count, new_seed()
+            )
+            print(
+                f"{size:>8} {python_time * 1000:>10.1f} "
+                f"{python_peak / 1024:>11.1f} "
+                f"{sampler_time * 1000:>11.1f} {sampler_peak / 1024:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Compare sustained answer throughput with and without write-behind.
+
+Clients answer every question of their exam mode attempt from threads of
+one process, like requests served by a threaded worker. Without
+write-behind every answer is written in its own transaction. With it
+answers are journaled, buffered and written in group commits by the
+flusher thread. Throughput counts an answer once it's in the database.
+The test database is a file, so commits pay for the disk like they do
+in production. SQLite refuses to upgrade the read lock of a transaction
+while another one writes, such writes are retried and the retries count
+towards latency.
+"""
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks import benchmark_database, setup
+
+
+def retry_locked(func, *args):
+    """Call func until SQLite lets it write."""
+
+    from django.db import OperationalError
+
+    while True:
+        try:
+            return func(*args)
+        except OperationalError as error:
+            if "locked" not in str(error):
+                raise
+
+
+def answer_all(attempt_ids, answer, choices):
+    """
+    Answer every question of attempts from a pool of threads.
+
+    Return the seconds every answer took to be accepted.
+    """
+
+    from django.db import connection
+
+    from apps.exam.models import ExamAttempt
+
+    def client(attempt_id):
+        latencies = []
+        try:
+            attempt = ExamAttempt.objects.get(id=attempt_id)
+            for question_id in attempt.question_ids():
+                started = time.perf_counter()
+                retry_locked(
+                    answer, attempt, question_id, choices[question_id]
+                )
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+        return latencies
+
+    with ThreadPoolExecutor(len(attempt_ids)) as executor:
+        return [
+            latency
+            for latencies in executor.map(client, attempt_ids)
+            for latency in latencies
+        ]
+
+
+def run(attempt_ids, choices, write_behind, journal_dir, fsync):
+    """Return answers written per second and mean seconds to accept one."""
+
+    from django.test import override_settings
+
+    from apps.exam.models import AnswerAttempt
+    from apps.exam.services import buffer_answer, flush_answers, save_answer
+
+    AnswerAttempt.objects.all().delete()
+    expected = len(attempt_ids) * len(choices)
+    answer = buffer_answer if write_behind else save_answer
+    with override_settings(
+        EXAM_ANSWER_WRITE_BEHIND=write_behind,
+        EXAM_ANSWER_JOURNAL_DIR=journal_dir,
+        EXAM_ANSWER_JOURNAL_FSYNC=fsync,
+    ):
+        started = time.perf_counter()
+        latencies = answer_all(attempt_ids, answer, choices)
+        retry_locked(flush_answers)
+        while AnswerAttempt.objects.count() < expected:
+            time.sleep(0.01)
+        elapsed = time.perf_counter() - started
+    return expected / elapsed, sum(latencies) / len(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--clients",
+        type=int,
+        nargs="+",
+        default=(1, 16, 64),
+        help="concurrent clients",
+    )
+    parser.add_argument(
+        "--questions", type=int, default=50, help="questions per attempt"
+    )
+    parser.add_argument(
+        "--no-fsync",
+        action="store_true",
+        help="don't fsync journal appends",
+    )
+    args = parser.parse_args()
+
+    setup()
+
+    from django.db import connection
+
+    from apps.exam.models import Exam, ExamAttempt, Subject
+    from apps.exam.services import provision_attempt
+    from apps.question.models import Answer, Question, QuestionCategory
+    from apps.user.models import User
+
+    workdir = Path(tempfile.mkdtemp())
+    connection.settings_dict["TEST"]["NAME"] = str(workdir / "db.sqlite3")
+    with benchmark_database():
+        subject = Subject.objects.create(name="Benchmark")
+        exam = Exam.objects.create(name="Benchmark", subject=subject)
+        category = QuestionCategory.objects.create(name="Benchmark")
+        choices = {}
+        for i in range(args.questions):
+            question = Question.objects.create(
+                text=f"Question {i}", exam=exam, category=category
+            )
+            answers = Answer.objects.bulk_create(
+                Answer(text=f"Answer {i} {j}") for j in range(4)
+            )
+            question.correct_answers.add(answers[0])
+            question.wrong_answers.add(*answers[1:])
+            choices[question.id] = [answers[i % 4].id]
+
+        user = User.objects.create_user("benchmark")
+        print(
+            f"{'clients':>7} {'direct ans/s':>13} {'direct ms':>10} "
+            f"{'buffered ans/s':>15} {'buffered ms':>12}"
+        )
+        for clients in args.clients:
+            attempt_ids = [
+                provision_attempt(
+                    user, ExamAttempt.EXAM_MODE, [exam], args.questions
+                ).id
+                for _ in range(clients)
+            ]
+            results = [
+                run(
+                    attempt_ids,
+                    choices,
+                    write_behind,
+                    workdir / "journal",
+                    not args.no_fsync,
+                )
+                for write_behind in (False, True)
+            ]
+            (direct_rate, direct_latency), (
+                buffered_rate,
+                buffered_latency,
+            ) = results
+            print(
+                f"{clients:>7} {direct_rate:>13.0f} "
+                f"{direct_latency * 1000:>10.2f} {buffered_rate:>15.0f} "
+                f"{buffered_latency * 1000:>12.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
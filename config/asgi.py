@@ -2,6 +2,8 @@
 ASGI config for sim2 project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Attempt event streams are served by an ASGI application of their own,
+everything else by Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
@@ -13,4 +15,15 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from apps.exam.streams import attempt_stream  # noqa: E402
+
+
+async def application(scope, receive, send):
+    """Route attempt event streams past Django."""
+
+    if scope["type"] == "http" and scope["path"].startswith("/events/"):
+        await attempt_stream(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -118,6 +118,21 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "sim2.sqlite3",
+        # Wait for the write lock instead of failing when many attempts
+        # are started at once.
+        "OPTIONS": {"timeout": 20},
+    }
+}
+
+# Cache
+# https://docs.djangoproject.com/en/4.0/topics/cache/
+# Answer keys and question payloads are versioned through this cache, point
+# it to a shared backend when running several workers.
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 10000},
     }
 }
 
@@ -198,6 +213,69 @@ STATIC_URL = "static/"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Number of questions in an attempt covering a whole subject.
+
+SUBJECT_QUESTION_COUNT = 50
+
+# Keep attempt questions only in their delivery order instead of writing
+# a row per question.
+
+EXAM_VIRTUAL_QUESTION_SETS = False
+
+# Number of exams whose answer keys are kept in memory by each worker.
+
+ANSWER_KEY_CACHE_SIZE = 128
+
+# Grade finished attempts with the grading_worker command instead of
+# inside the finish request. The finish page shows a pending state until
+# the grading job is done.
+
+EXAM_BACKGROUND_GRADING = False
+
+# Seconds the initial state of an exam page is cached for. Documents are
+# keyed by attempt version, the timeout only bounds how long stale ones
+# stay around.
+
+EXAM_BOOTSTRAP_CACHE_TIMEOUT = 60 * 60
+
+# Seconds attempt rows are cached for API requests. Every change of an
+# attempt drops its cached state, the timeout only bounds how long
+# unused states stay around.
+
+EXAM_ATTEMPT_STATE_CACHE_TIMEOUT = 60 * 60
+
+# Attempt event streams served by config.asgi. Events are published in
+# process, streams served by other processes see the change when they poll
+# the attempt state version every EXAM_EVENTS_POLL_SECONDS, which needs a
+# cache shared by all processes. Keepalive comments are sent to idle
+# streams every EXAM_EVENTS_KEEPALIVE_SECONDS, a stream keeps at most
+# EXAM_EVENTS_QUEUE_SIZE undelivered events.
+
+EXAM_EVENTS_KEEPALIVE_SECONDS = 15
+EXAM_EVENTS_POLL_SECONDS = 5
+EXAM_EVENTS_QUEUE_SIZE = 100
+
+# Buffer answers of exam mode attempts and write them in batches instead
+# of inside every request. Answers are appended to a journal file per
+# process in EXAM_ANSWER_JOURNAL_DIR, fsynced with
+# EXAM_ANSWER_JOURNAL_FSYNC, and mirrored to the cache, which must be
+# shared by all workers. Each process writes its answers every
+# EXAM_ANSWER_FLUSH_SECONDS or once EXAM_ANSWER_FLUSH_BATCH_SIZE of them
+# are waiting. Journals of processes that died are written by the
+# replay_answer_journals command.
+
+EXAM_ANSWER_WRITE_BEHIND = False
+EXAM_ANSWER_JOURNAL_DIR = BASE_DIR / "journal"
+EXAM_ANSWER_JOURNAL_FSYNC = True
+EXAM_ANSWER_FLUSH_SECONDS = 1
+EXAM_ANSWER_FLUSH_BATCH_SIZE = 500
+
+# Names of URLs served by async views instead of their DRF counterparts,
+# e.g. {"question_api", "question_answers_api", "get_attempt",
+# "question_toggle_flag"}. Async views only pay off under config.asgi.
+
+ASYNC_VIEWS = set()
+
 WEBPACK_LOADER = {
     "DEFAULT": {
         "CACHE": not DEBUG,
@@ -0,0 +1,91 @@
+"""Tests for Exam app async views."""
+
+import json
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+
+from apps.exam.async_views import AsyncAttemptView, AsyncQuestionFlag
+from apps.exam.models import ExamAttempt
+from apps.exam.serializers import ExamAttemptSerializer
+from apps.question.models import Question
+from apps.user.models import User
+
+
+class AsyncExamViewTestCase(TestCase):
+    """Test cases for async exam views."""
+
+    factory = AsyncRequestFactory()
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "exam_attempt.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def setUp(self):
+
+        cache.clear()
+        self.exam_attempt = ExamAttempt.objects.get(id=1)
+        self.question = Question.objects.get(id=1)
+        self.user = User.objects.get(id=4)
+
+    def call(self, view, request, user=None, **kwargs):
+        request.user = user or self.user
+        return async_to_sync(view.as_view())(request, **kwargs)
+
+    def test_get_attempt(self):
+        """Check that the attempt is sent to its owner only."""
+
+        response = self.call(
+            AsyncAttemptView,
+            self.factory.get("/"),
+            attempt_id=self.exam_attempt.id,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            json.loads(
+                json.dumps(ExamAttemptSerializer(self.exam_attempt).data)
+            ),
+        )
+
+        response = self.call(
+            AsyncAttemptView,
+            self.factory.get("/"),
+            user=User.objects.get(id=5),
+            attempt_id=self.exam_attempt.id,
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_toggle_flag(self):
+        """Check that questions are flagged and unflagged."""
+
+        for version, flagged in enumerate((True, False), start=1):
+            response = self.call(
+                AsyncQuestionFlag,
+                self.factory.post("/", content_type="application/json"),
+                attempt_id=self.exam_attempt.id,
+                question_id=self.question.id,
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                json.loads(response.content),
+                {
+                    "question_id": self.question.id,
+                    "flagged": flagged,
+                    "version": version,
+                },
+            )
+
+        response = self.call(
+            AsyncQuestionFlag,
+            self.factory.get("/"),
+            attempt_id=self.exam_attempt.id,
+            question_id=self.question.id,
+        )
+        self.assertEqual(response.status_code, 405)
@@ -0,0 +1,314 @@
+"""Tests for the write-behind answer buffer."""
+
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.exam.buffer import answer_buffer, read_journal
+from apps.exam.models import AnswerAttempt, Exam, ExamAttempt
+from apps.exam.services import (
+    buffer_answer,
+    finish_expired_attempts,
+    flush_answers,
+    next_question_id,
+    picked_answer_ids,
+    provision_attempt,
+    record_answers,
+    replay_answer_journals,
+    save_answer,
+)
+from apps.user.models import User
+
+
+class AnswerBufferTestCase(TestCase):
+    """Test cases for buffered answers of exam mode attempts."""
+
+    client = Client()
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def setUp(self):
+
+        cache.clear()
+        self.journal_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.journal_dir)
+        settings = override_settings(
+            EXAM_ANSWER_WRITE_BEHIND=True,
+            EXAM_ANSWER_JOURNAL_DIR=self.journal_dir,
+            EXAM_ANSWER_FLUSH_SECONDS=0,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(answer_buffer.close)
+        self.addCleanup(lambda: answer_buffer.discard(answer_buffer.entries()))
+
+        self.user = User.objects.get(id=4)
+        exams = Exam.objects.filter(id__in=(1, 2))
+        self.attempt = provision_attempt(
+            self.user, ExamAttempt.EXAM_MODE, exams, 3
+        )
+        self.question_ids = self.attempt.question_ids()
+
+    def journal_entries(self):
+        return [
+            entry
+            for path in self.journal_dir.iterdir()
+            for entry in read_journal(path)
+        ]
+
+    def test_buffer_answer(self):
+        """Check that buffered answers are journaled and read back."""
+
+        first, second, _ = self.question_ids
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("question_api", kwargs={"attempt_id": self.attempt.id}),
+            {"question_id": first, "answers": [1]},
+        )
+
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(AnswerAttempt.objects.exists())
+        self.assertEqual(
+            [entry[:2] + entry[3:] for entry in self.journal_entries()],
+            [(self.attempt.id, first, [1])],
+        )
+        self.assertEqual(next_question_id(self.attempt), second)
+        self.assertEqual(picked_answer_ids(self.attempt, first), [1])
+
+        response = self.client.get(
+            reverse(
+                "question_answers_api",
+                kwargs={"attempt_id": self.attempt.id, "question_id": first},
+            )
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["answer_ids"], [1])
+
+    def test_buffer_answer_invalid(self):
+        """Check that answers not offered by the question aren't buffered."""
+
+        with self.assertRaises(ValidationError):
+            buffer_answer(self.attempt, 1, [4])
+
+        self.assertEqual(self.journal_entries(), [])
+
+    def test_practice_mode_answers_written(self):
+        """Check that practice mode answers are written right away."""
+
+        attempt = provision_attempt(
+            self.user,
+            ExamAttempt.PRACTICE_MODE,
+            Exam.objects.filter(id=1),
+            1,
+        )
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse("question_api", kwargs={"attempt_id": attempt.id}),
+            {"question_id": 1, "answers": [1]},
+        )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(AnswerAttempt.objects.filter(attempt=attempt).exists())
+
+    def test_flush_answers(self):
+        """Check that flushes write answers, counters and the cursor."""
+
+        first, second, third = self.question_ids
+        buffer_answer(self.attempt, first, [2])
+        buffer_answer(self.attempt, second, [1])
+        buffer_answer(self.attempt, first, [1])
+
+        self.assertEqual(flush_answers(), 2)
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.answered_count, 2)
+        self.assertEqual(
+            dict(AnswerAttempt.objects.values_list("question", "answer_ids")),
+            {first: [1], second: [1]},
+        )
+        self.assertEqual(self.attempt.next_question_id(), third)
+        self.assertEqual(answer_buffer.pending(self.attempt.id, [first]), {})
+        self.assertEqual(flush_answers(), 0)
+        self.assertEqual(self.journal_entries(), [])
+
+    def test_flush_answers_out_of_order(self):
+        """Check that the cursor catches up with answers flushed late."""
+
+        first, second, third = self.question_ids
+        buffer_answer(self.attempt, second, [1])
+        flush_answers()
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.next_question_id(), first)
+
+        buffer_answer(self.attempt, first, [1])
+        flush_answers([self.attempt])
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.next_question_id(), third)
+
+    def test_record_answers_drops_buffered(self):
+        """Check that a batch isn't overwritten by answers buffered before."""
+
+        first, second, _ = self.question_ids
+        buffer_answer(self.attempt, first, [2])
+        buffer_answer(self.attempt, second, [2])
+
+        record_answers(
+            self.attempt, [{"question_id": first, "answer_ids": [1]}]
+        )
+
+        self.assertEqual(flush_answers(), 1)
+        self.assertEqual(
+            dict(AnswerAttempt.objects.values_list("question", "answer_ids")),
+            {first: [1], second: [2]},
+        )
+        self.assertEqual(picked_answer_ids(self.attempt, first), [1])
+
+    def test_flush_answers_disabled(self):
+        """Check that nothing is flushed without write-behind."""
+
+        buffer_answer(self.attempt, self.question_ids[0], [1])
+
+        with override_settings(EXAM_ANSWER_WRITE_BEHIND=False):
+            self.assertEqual(flush_answers(), 0)
+        self.assertFalse(AnswerAttempt.objects.exists())
+
+    def test_finished_attempt_answers_dropped(self):
+        """Check that answers to finished attempts are dropped."""
+
+        buffer_answer(self.attempt, self.question_ids[0], [1])
+        self.attempt.finish()
+
+        self.assertEqual(flush_answers(), 0)
+        self.assertFalse(AnswerAttempt.objects.exists())
+        self.assertEqual(answer_buffer.entries(), {})
+
+    def test_finish_view_flushes(self):
+        """Check that buffered answers are graded when finishing."""
+
+        for question_id in self.question_ids:
+            buffer_answer(self.attempt, question_id, [1])
+        self.client.force_login(self.user)
+
+        response = self.client.get(
+            reverse("exam_finish", kwargs={"attempt_id": self.attempt.id})
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.attempt.refresh_from_db()
+        self.assertTrue(self.attempt.is_finished)
+        self.assertEqual(self.attempt.answered_count, 3)
+        self.assertEqual(self.attempt.correct_count, 2)
+
+    def test_finish_expired_attempts_flushes(self):
+        """Check that buffered answers count when time runs out."""
+
+        buffer_answer(self.attempt, 1, [1])
+        ExamAttempt.objects.filter(id=self.attempt.id).update(
+            ends_at=timezone.now() - timedelta(minutes=1)
+        )
+
+        self.assertEqual(finish_expired_attempts(), 1)
+
+        self.attempt.refresh_from_db()
+        self.assertTrue(self.attempt.is_finished)
+        self.assertEqual(self.attempt.answered_count, 1)
+        self.assertEqual(self.attempt.correct_count, 1)
+
+    def test_replay_answer_journals(self):
+        """Check that the latest complete journal entries are written."""
+
+        first, second, _ = self.question_ids
+        path = self.journal_dir / "otherhost-1.journal"
+        lines = [
+            {"attempt": self.attempt.id, "question": first, "seq": 2},
+            {"attempt": self.attempt.id, "question": first, "seq": 1},
+            {"attempt": self.attempt.id, "question": second, "seq": 1},
+        ]
+        with open(path, "w") as journal:
+            for line, answer_ids in zip(lines, ([1], [2], [1])):
+                journal.write(json.dumps({**line, "answer_ids": answer_ids}))
+                journal.write("\n")
+            journal.write('{"attempt": ')
+
+        self.assertEqual(replay_answer_journals([path]), 2)
+
+        self.assertFalse(path.exists())
+        self.assertEqual(
+            dict(AnswerAttempt.objects.values_list("question", "answer_ids")),
+            {first: [1], second: [1]},
+        )
+
+    def test_replay_answer_journals_superseded(self):
+        """Check that journaled answers don't overwrite newer ones."""
+
+        question_id = self.question_ids[0]
+        path = self.journal_dir / "otherhost-1.journal"
+        path.write_text(
+            json.dumps(
+                {
+                    "attempt": self.attempt.id,
+                    "question": question_id,
+                    "seq": 1,
+                    "answer_ids": [2],
+                }
+            )
+            + "\n"
+        )
+        buffer_answer(self.attempt, question_id, [1])
+        flush_answers()
+
+        self.assertEqual(replay_answer_journals([path]), 0)
+        self.assertEqual(
+            AnswerAttempt.objects.get(question=question_id).answer_ids, [1]
+        )
+
+    def test_replay_answer_journals_command(self):
+        """Check that the command replays journals in the journal dir."""
+
+        path = self.journal_dir / "otherhost-1.journal"
+        path.write_text(
+            json.dumps(
+                {
+                    "attempt": self.attempt.id,
+                    "question": self.question_ids[0],
+                    "seq": 1,
+                    "answer_ids": [1],
+                }
+            )
+            + "\n"
+        )
+        out = StringIO()
+
+        call_command("replay_answer_journals", stdout=out)
+        self.assertTrue(path.exists())
+
+        call_command("replay_answer_journals", "--all", stdout=out)
+        self.assertFalse(path.exists())
+        self.assertEqual(AnswerAttempt.objects.count(), 1)
+        self.assertIn("Wrote 1 answers from 1 journals.", out.getvalue())
+
+    def test_save_answer_after_buffer(self):
+        """Check that written answers win over older buffered ones."""
+
+        question_id = self.question_ids[0]
+        buffer_answer(self.attempt, question_id, [2])
+        flush_answers()
+        save_answer(self.attempt, question_id, [1])
+
+        self.assertEqual(picked_answer_ids(self.attempt, question_id), [1])
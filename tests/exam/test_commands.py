@@ -0,0 +1,231 @@
+"""Tests for Exam app management commands."""
+
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from apps.exam.models import (
+    AnswerAttempt,
+    AttemptSummary,
+    Exam,
+    ExamAttempt,
+    GradeResult,
+)
+from apps.exam.services import provision_attempt
+from apps.question.models import Question
+from apps.user.models import User
+
+
+class CompactAttemptQuestionsTestCase(TestCase):
+    """Test cases for compact_attempt_questions command."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "exam_attempt.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def setUp(self):
+
+        self.exam = Exam.objects.get(id=1)
+        self.user = User.objects.get(id=4)
+        Question.objects.bulk_create(
+            Question(text=f"Question {i}", exam=self.exam, category_id=1)
+            for i in range(10)
+        )
+
+    def call_command(self, *args):
+        out = StringIO()
+        call_command("compact_attempt_questions", *args, stdout=out)
+        return out.getvalue()
+
+    def test_compact_sampled_attempt(self):
+        """Check that a sampled attempt is converted to a virtual one."""
+
+        attempt = provision_attempt(
+            self.user, ExamAttempt.EXAM_MODE, [self.exam], 5
+        )
+        attempt.status = ExamAttempt.STATUS_FINISHED
+        attempt.save()
+        question_ids = attempt.question_ids()
+
+        self.call_command()
+
+        attempt.refresh_from_db()
+        self.assertTrue(attempt.virtual_questions)
+        self.assertFalse(attempt.questions.exists())
+        self.assertEqual(attempt.question_ids(), question_ids)
+
+    def test_compact_pool_changed(self):
+        """Check that compacted attempts survive changes of their pool."""
+
+        attempt = provision_attempt(
+            self.user, ExamAttempt.EXAM_MODE, [self.exam], 5
+        )
+        attempt.status = ExamAttempt.STATUS_FINISHED
+        attempt.save()
+        question_ids = attempt.question_ids()
+        self.call_command()
+
+        Question.objects.filter(id=min(question_ids)).delete()
+        Question.objects.filter(id=max(question_ids)).update(exam_id=2)
+
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.question_ids(), question_ids)
+
+    def test_compact_legacy_attempts(self):
+        """Check that attempts without an order keep their question ids."""
+
+        whole_pool, partial = ExamAttempt.objects.filter(id__in=(1, 3))
+        questions = Question.objects.filter(exam=self.exam).order_by("id")
+        partial.questions.set(questions[1:4])
+        ExamAttempt.objects.update(status=ExamAttempt.STATUS_FINISHED)
+
+        output = self.call_command()
+
+        self.assertIn("Compacted 3 attempts.", output)
+        whole_pool.refresh_from_db()
+        partial.refresh_from_db()
+        self.assertTrue(whole_pool.virtual_questions)
+        self.assertEqual(whole_pool.question_ids(), [1])
+        self.assertTrue(partial.virtual_questions)
+        self.assertEqual(
+            partial.question_ids(),
+            [question.id for question in questions[1:4]],
+        )
+        self.assertEqual(partial.question_count, 3)
+
+    def test_compact_dry_run(self):
+        """Check that dry run doesn't change anything."""
+
+        ExamAttempt.objects.update(status=ExamAttempt.STATUS_FINISHED)
+
+        self.call_command("--dry-run")
+
+        self.assertFalse(
+            ExamAttempt.objects.filter(virtual_questions=True).exists()
+        )
+
+
+class RepairAttemptScoresTestCase(TestCase):
+    """Test cases for repair_attempt_scores command."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "exam_attempt.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def test_repair_attempt_scores(self):
+        """Check that counters are recomputed from answers."""
+
+        attempt = ExamAttempt.objects.get(id=2)
+        for question_id, answer_id in ((1, 1), (2, 2)):
+            AnswerAttempt.objects.create(
+                attempt=attempt,
+                question_id=question_id,
+                answer_ids=[answer_id],
+            )
+
+        out = StringIO()
+        call_command("repair_attempt_scores", "--batch-size", "1", stdout=out)
+
+        self.assertIn("Repaired 1 attempts.", out.getvalue())
+        attempt.refresh_from_db()
+        self.assertEqual(attempt.score, GradeResult(2, 1, 2, 1))
+        self.assertEqual(
+            list(
+                AnswerAttempt.objects.order_by("question").values_list(
+                    "is_correct", flat=True
+                )
+            ),
+            [True, False],
+        )
+
+
+class ExpireAttemptsTestCase(TestCase):
+    """Test cases for expire_attempts command."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def test_expire_attempts(self):
+        """Check that expired attempts are finished batch by batch."""
+
+        user = User.objects.get(id=4)
+        exam = Exam.objects.get(id=1)
+        for _ in range(3):
+            provision_attempt(user, ExamAttempt.EXAM_MODE, [exam], 1)
+        ExamAttempt.objects.update(ends_at=timezone.now())
+
+        out = StringIO()
+        call_command("expire_attempts", "--batch-size", "2", stdout=out)
+
+        self.assertIn("Finished 3 expired attempts.", out.getvalue())
+        self.assertFalse(
+            ExamAttempt.objects.filter(
+                status=ExamAttempt.STATUS_IN_PROGRESS
+            ).exists()
+        )
+        self.assertEqual(
+            list(AttemptSummary.objects.values_list("exam_names", flat=True)),
+            ["Grammar"] * 3,
+        )
+
+
+class RebuildAttemptSummariesTestCase(TestCase):
+    """Test cases for rebuild_attempt_summaries command."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "exam_attempt.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def test_rebuild_attempt_summaries(self):
+        """Check that finished attempts are summarized batch by batch."""
+
+        ExamAttempt.objects.filter(id__in=(1, 2)).update(
+            status=ExamAttempt.STATUS_FINISHED, passing_grade=75
+        )
+        AttemptSummary.objects.create(
+            attempt_id=1,
+            user_id=4,
+            created=timezone.now(),
+            mode=ExamAttempt.PRACTICE_MODE,
+        )
+
+        out = StringIO()
+        call_command(
+            "rebuild_attempt_summaries", "--batch-size", "1", stdout=out
+        )
+
+        self.assertIn("Rebuilt 2 attempt summaries.", out.getvalue())
+        self.assertEqual(
+            list(
+                AttemptSummary.objects.order_by("attempt").values_list(
+                    "attempt", "exam_names", "grade", "passed"
+                )
+            ),
+            [(1, "Grammar", 100, True), (2, "Grammar, Exam 2", 100, True)],
+        )
@@ -0,0 +1,175 @@
+"""Tests for Exam app attempt event streams."""
+
+import asyncio
+import json
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.db.models import F
+from django.test import Client, TestCase, override_settings
+
+from apps.exam.events import attempt_events
+from apps.exam.models import ExamAttempt
+from apps.exam.state import invalidate_attempt_state
+from apps.exam.streams import attempt_stream
+from apps.user.models import User
+
+
+class AttemptStreamTestCase(TestCase):
+    """Test cases for attempt event streams."""
+
+    client = Client()
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "exam_attempt.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+    password = "mypassword"
+
+    def setUp(self):
+
+        self.exam_attempt = ExamAttempt.objects.get(id=1)
+        self.user = User.objects.get(id=4)
+
+    def scope(self, attempt_id):
+        cookies = "; ".join(
+            f"{name}={morsel.value}"
+            for name, morsel in self.client.cookies.items()
+        )
+        return {
+            "type": "http",
+            "path": f"/events/attempt/{attempt_id}/",
+            "headers": [(b"cookie", cookies.encode())],
+        }
+
+    async def stream(self, attempt_id, *changes):
+        """
+        Run a stream and apply changes after each event.
+
+        The client disconnects after the last change unless the stream
+        ends by itself. Return the response start and the events.
+        """
+
+        sent = asyncio.Queue()
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def next_event():
+            message = await asyncio.wait_for(sent.get(), 5)
+            event, data = message["body"].decode().split("\n")[:2]
+            return (
+                event.removeprefix("event: "),
+                json.loads(data.removeprefix("data: ")),
+            )
+
+        task = asyncio.ensure_future(
+            attempt_stream(self.scope(attempt_id), receive, sent.put)
+        )
+        start = await asyncio.wait_for(sent.get(), 5)
+        if start["status"] != 200:
+            await task
+            return start, []
+
+        events = [await next_event()]
+        for change in changes:
+            await sync_to_async(change)()
+            events.append(await next_event())
+        disconnect.set()
+        await asyncio.wait_for(task, 5)
+        return start, events
+
+    def test_stream_unknown_attempt(self):
+        """Check that streams of other users' attempts aren't served."""
+
+        user = User.objects.get(id=5)
+        self.client.login(username=user.username, password=self.password)
+        start, events = async_to_sync(self.stream)(self.exam_attempt.id)
+        self.assertEqual(start["status"], 404)
+
+        self.client.logout()
+        start, events = async_to_sync(self.stream)(self.exam_attempt.id)
+        self.assertEqual(start["status"], 404)
+
+    def test_stream_events(self):
+        """Check that deadline changes and the finish are pushed."""
+
+        self.client.login(username=self.user.username, password=self.password)
+
+        def extend():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.exam_attempt.duration_minutes += 10
+                self.exam_attempt.save()
+
+        def finish():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.exam_attempt.finish()
+
+        start, events = async_to_sync(self.stream)(
+            self.exam_attempt.id, extend, finish
+        )
+
+        self.assertEqual(start["status"], 200)
+        self.assertIn(
+            (b"content-type", b"text/event-stream"), start["headers"]
+        )
+        self.assertEqual(
+            [event for event, data in events],
+            ["deadline", "deadline", "finished"],
+        )
+        self.assertEqual(
+            events[1][1]["duration_minutes"],
+            events[0][1]["duration_minutes"] + 10,
+        )
+        self.assertEqual(
+            events[1][1]["ends_at"], self.exam_attempt.deadline.isoformat()
+        )
+        self.assertAlmostEqual(
+            events[1][1]["time_left_seconds"],
+            self.exam_attempt.time_left_seconds,
+            delta=1,
+        )
+        self.assertEqual(attempt_events.subscriber_count(), 0)
+
+    @override_settings(EXAM_EVENTS_POLL_SECONDS=0.01)
+    def test_stream_polled_changes(self):
+        """Check that changes not published in process are polled."""
+
+        self.client.login(username=self.user.username, password=self.password)
+        attempts = ExamAttempt.objects.filter(id=self.exam_attempt.id)
+
+        def extend():
+            attempts.update(duration_minutes=F("duration_minutes") + 10)
+            invalidate_attempt_state(self.exam_attempt.id)
+
+        def finish():
+            attempts.update(status=ExamAttempt.STATUS_FINISHED)
+            invalidate_attempt_state(self.exam_attempt.id)
+
+        start, events = async_to_sync(self.stream)(
+            self.exam_attempt.id, extend, finish
+        )
+
+        self.assertEqual(
+            [event for event, data in events],
+            ["deadline", "deadline", "finished"],
+        )
+        self.assertEqual(
+            events[1][1]["duration_minutes"],
+            events[0][1]["duration_minutes"] + 10,
+        )
+        self.assertEqual(attempt_events.subscriber_count(), 0)
+
+    def test_stream_disconnect(self):
+        """Check that a disconnected stream stops receiving events."""
+
+        self.client.login(username=self.user.username, password=self.password)
+        start, events = async_to_sync(self.stream)(self.exam_attempt.id)
+
+        self.assertEqual(events[0][0], "deadline")
+        self.assertEqual(attempt_events.subscriber_count(), 0)
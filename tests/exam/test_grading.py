@@ -0,0 +1,149 @@
+"""Tests for Exam app grading queue."""
+
+from datetime import timedelta
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.exam.grading import (
+    complete_job,
+    fail_job,
+    grade_attempt,
+    lease_jobs,
+    queue_stats,
+)
+from apps.exam.models import AttemptSummary, Exam, ExamAttempt, GradingJob
+from apps.exam.services import provision_attempt, save_answer
+from apps.user.models import User
+
+
+@override_settings(EXAM_BACKGROUND_GRADING=True)
+class GradingQueueTestCase(TestCase):
+    """Test cases for background grading."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+    password = "mypassword"
+
+    def setUp(self):
+
+        cache.clear()
+        self.user = User.objects.get(id=4)
+        self.attempt = provision_attempt(
+            self.user,
+            ExamAttempt.EXAM_MODE,
+            Exam.objects.filter(id__in=(1, 2)),
+            3,
+        )
+        save_answer(self.attempt, 1, [1])
+        save_answer(self.attempt, 2, [1])
+        save_answer(self.attempt, 3, [2])
+
+    def test_finish_enqueues_job(self):
+        """Check that finishing leaves grading to a job."""
+
+        self.attempt.finish()
+
+        self.assertTrue(self.attempt.is_grading_pending)
+        self.assertEqual(self.attempt.grade, 0)
+        self.assertEqual(
+            GradingJob.objects.get(attempt=self.attempt).status,
+            GradingJob.STATUS_PENDING,
+        )
+
+    def test_finish_page_pending(self):
+        """Check that the finish page waits for the grading job."""
+
+        self.client.login(username=self.user.username, password=self.password)
+        url = reverse("exam_finish", kwargs={"attempt_id": self.attempt.id})
+
+        response = self.client.get(url)
+        self.assertTrue(response.context["pending"])
+
+        call_command(
+            "grading_worker", "--processes", "0", "--burst", stdout=StringIO()
+        )
+
+        response = self.client.get(url)
+        self.assertNotIn("pending", response.context)
+        self.assertEqual(response.context["grade"], 67)
+
+    def test_lease_jobs(self):
+        """Check that leased jobs aren't leased again until they expire."""
+
+        self.attempt.finish()
+
+        jobs = lease_jobs(10, lease_seconds=60)
+        self.assertEqual([job.attempt_id for job in jobs], [self.attempt.id])
+        self.assertEqual(lease_jobs(10, lease_seconds=60), [])
+
+        GradingJob.objects.update(
+            leased_until=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(len(lease_jobs(10, lease_seconds=60)), 1)
+        self.assertFalse(complete_job(jobs[0], 100))
+
+    def test_complete_job(self):
+        """Check that completing a job stores the grade."""
+
+        self.attempt.finish()
+        (job,) = lease_jobs(10, lease_seconds=60)
+
+        self.assertTrue(complete_job(job, grade_attempt(job.attempt_id)))
+
+        self.attempt.refresh_from_db()
+        self.assertFalse(self.attempt.is_grading_pending)
+        self.assertEqual(self.attempt.grade, 67)
+        summary = AttemptSummary.objects.get(attempt=self.attempt)
+        self.assertEqual(summary.grade, 67)
+        self.assertFalse(summary.passed)
+        job.refresh_from_db()
+        self.assertEqual(job.status, GradingJob.STATUS_DONE)
+        self.assertEqual(job.tries, 1)
+
+    def test_fail_job(self):
+        """Check that failed jobs are retried with backoff, then failed."""
+
+        self.attempt.finish()
+        (job,) = lease_jobs(10, lease_seconds=60)
+
+        fail_job(job, "error", max_tries=2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, GradingJob.STATUS_PENDING)
+        self.assertGreater(job.available_at, timezone.now())
+        self.assertEqual(lease_jobs(10, lease_seconds=60), [])
+
+        GradingJob.objects.update(available_at=timezone.now())
+        (job,) = lease_jobs(10, lease_seconds=60)
+        fail_job(job, "error", max_tries=2)
+        job.refresh_from_db()
+        self.assertEqual(job.status, GradingJob.STATUS_FAILED)
+        self.assertEqual(job.error, "error")
+
+    def test_queue_stats(self):
+        """Check queue depth and latency reporting."""
+
+        self.attempt.finish()
+        stats = queue_stats()
+        self.assertEqual(stats[GradingJob.STATUS_PENDING], 1)
+        self.assertEqual(stats[GradingJob.STATUS_DONE], 0)
+
+        call_command(
+            "grading_worker", "--processes", "0", "--burst", stdout=StringIO()
+        )
+
+        out = StringIO()
+        call_command("grading_stats", stdout=out)
+        self.assertIn("pending: 0", out.getvalue())
+        self.assertIn("done: 1", out.getvalue())
+        self.assertIn("latency_mean_seconds", out.getvalue())
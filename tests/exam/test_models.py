@@ -1,8 +1,18 @@
 """Tests for Exam app models."""
 
+import random
+
+from django.forms import modelform_factory
 from django.test import TestCase
 
-from apps.exam.models import AnswerAttempt, Exam, ExamAttempt, Subject
+from apps.exam.models import (
+    AnswerAttempt,
+    AttemptSummary,
+    Exam,
+    ExamAttempt,
+    Subject,
+)
+from apps.question.cache import answer_keys
 from apps.question.models import Answer, Question
 from apps.user.models import User
 
@@ -68,7 +78,8 @@ class ExamModelTestCase(TestCase):
         self.exam_attempt.grade = 0
         self.exam_attempt.save()
 
-        self.answer_attempt.answers.set([self.correct_answer1])
+        self.answer_attempt.answer_ids = [self.correct_answer1.id]
+        self.answer_attempt.save()
         self.assertEqual(self.exam_attempt.calculate_grade(), 100)
 
     def test_calculate_grade_multiple_select(self):
@@ -76,10 +87,11 @@ class ExamModelTestCase(TestCase):
 
         self.exam_attempt.questions.set([self.question1])
         self.answer_attempt.question = self.question1
+        self.answer_attempt.answer_ids = [
+            self.correct_answer1.id,
+            self.correct_answer2.id,
+        ]
         self.answer_attempt.save()
-        self.answer_attempt.answers.set(
-            [self.correct_answer1, self.correct_answer2]
-        )
 
         self.assertEqual(self.exam_attempt.calculate_grade(), 100)
 
@@ -88,12 +100,12 @@ class ExamModelTestCase(TestCase):
 
         self.exam_attempt.questions.set([self.question1])
         self.answer_attempt.question = self.question1
+        self.answer_attempt.answer_ids = [
+            self.correct_answer1.id,
+            self.correct_answer2.id,
+            self.wrong_answers.id,
+        ]
         self.answer_attempt.save()
-        self.answer_attempt.answers.set(
-            [self.correct_answer1, self.correct_answer2]
-        )
-
-        self.answer_attempt.answers.add(self.wrong_answers)
 
         self.assertEqual(self.exam_attempt.calculate_grade(), 0)
 
@@ -113,3 +125,248 @@ class ExamModelTestCase(TestCase):
         for value in failing_values:
             self.exam_attempt.grade = value
             self.assertFalse(self.exam_attempt.passed)
+
+    def test_finish(self):
+        """Check that finishing happens once and snapshots the result."""
+
+        self.exam_attempt.add_to_score(2, 1, 2, 1)
+
+        self.assertTrue(self.exam_attempt.finish())
+        self.assertFalse(
+            ExamAttempt.objects.get(id=self.exam_attempt.id).finish()
+        )
+
+        self.exam_attempt.refresh_from_db()
+        self.assertTrue(self.exam_attempt.is_finished)
+        self.assertIsNotNone(self.exam_attempt.finished_at)
+        self.assertEqual(self.exam_attempt.grade, 50)
+        self.assertEqual(self.exam_attempt.passing_grade, 75)
+        self.assertEqual(self.exam_attempt.subject_name, self.subject.name)
+        self.assertEqual(
+            self.exam_attempt.exam_name, Exam.objects.get(id=1).name
+        )
+
+        Exam.objects.update(passing_grade=50)
+        with self.assertNumQueries(0):
+            self.assertFalse(self.exam_attempt.passed)
+
+    def test_finish_summary(self):
+        """Check that finishing writes the summary of the attempt."""
+
+        self.exam_attempt.add_to_score(4, 3, 4, 3)
+        self.exam_attempt.finish()
+
+        summary = AttemptSummary.objects.get(attempt=self.exam_attempt)
+        self.assertEqual(summary.user, self.user)
+        self.assertEqual(summary.created, self.exam_attempt.created)
+        self.assertEqual(summary.mode, ExamAttempt.EXAM_MODE)
+        self.assertEqual(summary.subject_name, self.subject.name)
+        self.assertEqual(summary.exam_ids, [1, 2])
+        self.assertEqual(summary.exam_names, "Grammar, Exam 2")
+        self.assertEqual(summary.grade, 75)
+        self.assertTrue(summary.passed)
+
+    def test_question_order(self):
+        """Check that questions are delivered in the stored order."""
+
+        self.exam_attempt.question_order = [3, 1, 2]
+        self.exam_attempt.save()
+        self.exam_attempt.refresh_from_db()
+
+        self.assertEqual(self.exam_attempt.question_ids(), [3, 1, 2])
+        self.assertEqual(self.exam_attempt.next_question_id(), 3)
+
+        self.exam_attempt.advance_cursor(1)
+        self.assertEqual(self.exam_attempt.next_question_id(), 3)
+
+        for question_id in (3, 1, 2):
+            self.exam_attempt.advance_cursor(question_id)
+        self.assertIsNone(self.exam_attempt.next_question_id())
+        self.exam_attempt.refresh_from_db()
+        self.assertEqual(self.exam_attempt.question_cursor, 3)
+
+    def test_ensure_question_order(self):
+        """Check delivery order of attempts created without one."""
+
+        self.exam_attempt.questions.add(self.question, self.question1)
+        self.exam_attempt.ensure_question_order()
+
+        self.assertEqual(self.exam_attempt.question_order[0], 1)
+        self.assertEqual(sorted(self.exam_attempt.question_order), [1, 2, 3])
+        self.assertEqual(self.exam_attempt.question_cursor, 1)
+        self.assertEqual(
+            self.exam_attempt.next_question_id(),
+            self.exam_attempt.question_order[1],
+        )
+
+        with self.assertNumQueries(0):
+            self.exam_attempt.ensure_question_order()
+
+    def test_attempt_counters_not_editable(self):
+        """Check that forms can't write back attempt counters."""
+
+        fields = modelform_factory(ExamAttempt, fields="__all__").base_fields
+
+        for name in (
+            "answered_count",
+            "correct_count",
+            "answered_weight",
+            "weighted_score",
+            "question_cursor",
+            "question_count",
+        ):
+            self.assertNotIn(name, fields)
+
+    def test_toggle_flag(self):
+        """Check flags of questions and their positions."""
+
+        self.exam_attempt.question_order = [3, 1, 2]
+        self.exam_attempt.save()
+
+        self.assertTrue(self.exam_attempt.toggle_flag(3))
+        self.assertTrue(self.exam_attempt.toggle_flag(1))
+        self.assertEqual(bytes(self.exam_attempt.flags), b"\x05")
+        self.assertEqual(self.exam_attempt.flagged_question_ids, [1, 3])
+
+        stale = ExamAttempt.objects.get(id=self.exam_attempt.id)
+        self.assertFalse(self.exam_attempt.toggle_flag(1))
+        self.assertTrue(stale.toggle_flag(2))
+        self.assertEqual(stale.flagged_question_ids, [2, 3])
+
+        with self.assertRaises(Question.DoesNotExist):
+            self.exam_attempt.toggle_flag(4)
+
+
+def python_grade(attempt):
+    """Reference implementation of grading, kept for parity checks."""
+
+    answer_attempts = AnswerAttempt.objects.filter(attempt=attempt.id)
+    if not answer_attempts:
+        return 0
+
+    correct_answer_count = 0
+    for answer_attempt in answer_attempts:
+        question = answer_attempt.question
+        if set(answer_attempt.answer_ids) == set(
+            a.id for a in question.correct_answers.all()
+        ):
+            correct_answer_count += 1
+
+    return round(correct_answer_count / answer_attempts.count() * 100)
+
+
+class GradingTestCase(TestCase):
+    """Test cases for database-side grading."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def setUp(self):
+
+        answer_keys.clear()
+        self.exam = Exam.objects.get(id=1)
+        self.user = User.objects.get(id=4)
+        self.answers = list(Answer.objects.all())
+        self.random = random.Random(42)
+
+    def make_questions(self, count, weight=1):
+        """Create questions with random correct and wrong answers."""
+
+        questions = []
+        for i in range(count):
+            question = Question.objects.create(
+                text=f"Question {i}",
+                exam=self.exam,
+                category_id=1,
+                weight=weight,
+            )
+            answers = self.random.sample(self.answers, 3)
+            correct = answers[: self.random.randint(0, 2)]
+            question.correct_answers.set(correct)
+            question.wrong_answers.set(set(answers) - set(correct))
+            questions.append(question)
+        return questions
+
+    def make_attempt(self, questions):
+        """Create an attempt with random answers for given questions."""
+
+        attempt = ExamAttempt.objects.create(user=self.user)
+        attempt.questions.set(questions)
+        for question in questions:
+            answers = self.random.sample(
+                self.answers, self.random.randint(0, 2)
+            )
+            AnswerAttempt.objects.create(
+                attempt=attempt,
+                question=question,
+                answer_ids=[answer.id for answer in answers],
+            )
+        return attempt
+
+    def test_grade_parity(self):
+        """Check that grading matches the reference implementation."""
+
+        questions = self.make_questions(30)
+        for _ in range(10):
+            attempt = self.make_attempt(
+                self.random.sample(questions, self.random.randint(0, 30))
+            )
+            grade = python_grade(attempt)
+            self.assertEqual(
+                AnswerAttempt.objects.filter(attempt=attempt).score().grade,
+                grade,
+            )
+            self.assertEqual(attempt.calculate_grade(), grade)
+
+    def test_grade_weighted(self):
+        """Check that question weight is taken into account."""
+
+        light = self.make_questions(1)[0]
+        heavy = self.make_questions(1, weight=3)[0]
+        light.correct_answers.set([self.answers[0]])
+        heavy.correct_answers.set([self.answers[0]])
+
+        attempt = ExamAttempt.objects.create(user=self.user)
+        for question, answer in ((light, 1), (heavy, 0)):
+            AnswerAttempt.objects.create(
+                attempt=attempt,
+                question=question,
+                answer_ids=[self.answers[answer].id],
+            )
+
+        self.assertEqual(attempt.calculate_grade(), 75)
+
+    def test_grade_query_count(self):
+        """Check that grading costs the same number of queries."""
+
+        attempt = self.make_attempt(self.make_questions(200))
+
+        with self.assertNumQueries(3):
+            attempt.calculate_grade()
+
+        with self.assertNumQueries(2):
+            attempt.calculate_grade()
+
+    def test_scores(self):
+        """Check that many attempts are graded at once."""
+
+        questions = self.make_questions(10)
+        attempts = [self.make_attempt(questions) for _ in range(3)]
+
+        answer_attempts = AnswerAttempt.objects.filter(attempt__in=attempts)
+        with self.assertNumQueries(2):
+            scores = answer_attempts.scores()
+
+        correct_answers = answer_attempts.correct_answers()
+        with self.assertNumQueries(1):
+            self.assertEqual(answer_attempts.scores(correct_answers), scores)
+
+        for attempt in attempts:
+            self.assertEqual(scores[attempt.id].answered, 10)
+            self.assertEqual(scores[attempt.id].grade, python_grade(attempt))
@@ -0,0 +1,486 @@
+"""Tests for Exam app services."""
+
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.exam.models import AnswerAttempt, Exam, ExamAttempt, GradeResult
+from apps.exam.services import (
+    finish_expired_attempts,
+    get_attempt,
+    grade_answer,
+    provision_attempt,
+    record_answers,
+    save_answer,
+)
+from apps.question.cache import answer_keys
+from apps.question.models import Question
+from apps.user.models import User
+
+
+class ProvisionAttemptTestCase(TestCase):
+    """Test cases for attempt provisioning."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def setUp(self):
+
+        self.exams = list(Exam.objects.filter(subject=1))
+        self.question_ids = sorted(
+            Question.objects.filter(exam__in=self.exams).values_list(
+                "id", flat=True
+            )
+        )
+        self.user = User.objects.get(id=4)
+
+    def test_provision_attempt(self):
+        """Check that attempt is created with its exams and questions."""
+
+        attempt = provision_attempt(
+            self.user, ExamAttempt.EXAM_MODE, self.exams, 50
+        )
+
+        self.assertEqual(attempt.mode, ExamAttempt.EXAM_MODE)
+        self.assertEqual(attempt.question_count, len(self.question_ids))
+        self.assertEqual(list(attempt.exams.all()), self.exams)
+        self.assertEqual(
+            sorted(attempt.questions.values_list("id", flat=True)),
+            self.question_ids,
+        )
+        self.assertFalse(attempt.virtual_questions)
+        self.assertEqual(sorted(attempt.question_ids()), self.question_ids)
+
+    def test_provision_attempt_query_count(self):
+        """Check that provisioning doesn't depend on question count."""
+
+        with self.assertNumQueries(8):
+            provision_attempt(
+                self.user, ExamAttempt.PRACTICE_MODE, self.exams, 50
+            )
+
+    def test_provision_attempt_same_token(self):
+        """Check that a repeated start token reuses the attempt."""
+
+        start_token = uuid.uuid4()
+        attempts = [
+            provision_attempt(
+                self.user,
+                ExamAttempt.PRACTICE_MODE,
+                self.exams,
+                50,
+                start_token,
+            )
+            for _ in range(2)
+        ]
+
+        self.assertEqual(attempts[0], attempts[1])
+        self.assertEqual(
+            ExamAttempt.objects.filter(start_token=start_token).count(), 1
+        )
+
+    def test_provision_attempt_integrity_error(self):
+        """Check that errors other than a repeated token are raised."""
+
+        error = IntegrityError("NOT NULL constraint failed")
+        with mock.patch.object(
+            ExamAttempt.objects, "create", side_effect=error
+        ), self.assertRaises(IntegrityError) as raised:
+            provision_attempt(
+                self.user,
+                ExamAttempt.PRACTICE_MODE,
+                self.exams,
+                50,
+                uuid.uuid4(),
+            )
+
+        self.assertIs(raised.exception, error)
+
+    @override_settings(EXAM_VIRTUAL_QUESTION_SETS=True)
+    def test_provision_attempt_virtual_questions(self):
+        """Check that virtual question sets don't write question rows."""
+
+        attempt = provision_attempt(
+            self.user, ExamAttempt.EXAM_MODE, self.exams, 1
+        )
+
+        self.assertTrue(attempt.virtual_questions)
+        self.assertFalse(attempt.questions.exists())
+        question_ids = attempt.question_ids()
+        self.assertEqual(len(question_ids), 1)
+        self.assertIn(question_ids[0], self.question_ids)
+        self.assertEqual(
+            list(attempt.get_questions().values_list("id", flat=True)),
+            question_ids,
+        )
+
+    @override_settings(EXAM_VIRTUAL_QUESTION_SETS=True)
+    def test_virtual_questions_pool_version(self):
+        """Check that new questions don't change a virtual question set."""
+
+        attempt = provision_attempt(
+            self.user, ExamAttempt.EXAM_MODE, self.exams, 50
+        )
+        Question.objects.create(
+            text="New question", exam=self.exams[0], category_id=1
+        )
+
+        self.assertEqual(sorted(attempt.question_ids()), self.question_ids)
+
+
+class RecordAnswersTestCase(TestCase):
+    """Test cases for batched answer submission."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def setUp(self):
+
+        cache.clear()
+        self.attempt = provision_attempt(
+            User.objects.get(id=4),
+            ExamAttempt.PRACTICE_MODE,
+            Exam.objects.filter(id__in=(1, 2)),
+            3,
+        )
+        self.submissions = [
+            {"question_id": 1, "answer_ids": [1], "key": "a"},
+            {"question_id": 3, "answer_ids": [1, 4], "key": "b"},
+        ]
+
+    def picked(self):
+        return {
+            answer_attempt.question_id: answer_attempt.answer_ids
+            for answer_attempt in AnswerAttempt.objects.filter(
+                attempt=self.attempt
+            )
+        }
+
+    def test_record_answers(self):
+        """Check that answers of many questions are saved at once."""
+
+        result = record_answers(self.attempt, self.submissions)
+
+        self.assertEqual(result, {"saved": 2, "replayed": 0})
+        self.assertEqual(self.picked(), {1: [1], 3: [1, 4]})
+
+    def test_record_answers_replay(self):
+        """Check that replayed submissions are skipped with one query."""
+
+        record_answers(self.attempt, self.submissions)
+
+        with self.assertNumQueries(1):
+            result = record_answers(self.attempt, self.submissions)
+
+        self.assertEqual(result, {"saved": 0, "replayed": 2})
+        self.assertEqual(self.picked(), {1: [1], 3: [1, 4]})
+
+    def test_record_answers_update(self):
+        """Check that answers are replaced without duplicating rows."""
+
+        record_answers(self.attempt, self.submissions)
+        record_answers(
+            self.attempt,
+            [
+                {"question_id": 1, "answer_ids": [1], "key": "c"},
+                {"question_id": 3, "answer_ids": [2], "key": "d"},
+            ],
+        )
+
+        self.assertEqual(self.picked(), {1: [1], 3: [2]})
+        self.assertEqual(
+            AnswerAttempt.objects.filter(attempt=self.attempt).count(), 2
+        )
+
+    def test_record_answers_invalid(self):
+        """Check that foreign questions and answers are rejected."""
+
+        invalid_submissions = (
+            [{"question_id": 4, "answer_ids": [1]}],
+            [{"question_id": 1, "answer_ids": [4]}],
+        )
+        for submissions in invalid_submissions:
+            with self.assertRaises(ValidationError):
+                record_answers(self.attempt, submissions)
+
+        self.assertEqual(self.picked(), {})
+
+    def test_record_answers_out_of_order(self):
+        """Check that the cursor skips questions answered out of order."""
+
+        first, second, third = self.attempt.question_order
+        record_answers(
+            self.attempt,
+            [
+                {"question_id": second, "answer_ids": [1]},
+                {"question_id": first, "answer_ids": [1]},
+            ],
+        )
+
+        self.assertEqual(self.attempt.next_question_id(), third)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.next_question_id(), third)
+
+    def test_save_answer_out_of_order(self):
+        """Check that answering skipped questions moves the cursor past."""
+
+        first, second, third = self.attempt.question_order
+        save_answer(self.attempt, second, [1])
+        self.assertEqual(self.attempt.next_question_id(), first)
+
+        save_answer(self.attempt, first, [1])
+        self.assertEqual(self.attempt.next_question_id(), third)
+
+        save_answer(self.attempt, third, [1])
+        self.assertIsNone(self.attempt.next_question_id())
+
+    def test_save_answer_stuck_cursor(self):
+        """Check that re-answering the delivered question unsticks it."""
+
+        first, second, third = self.attempt.question_order
+        save_answer(self.attempt, first, [1])
+        save_answer(self.attempt, second, [1])
+        ExamAttempt.objects.filter(id=self.attempt.id).update(
+            question_cursor=0
+        )
+        self.attempt.refresh_from_db()
+
+        save_answer(self.attempt, first, [1])
+
+        self.assertEqual(self.attempt.next_question_id(), third)
+
+    def test_record_answers_score(self):
+        """Check that score counters follow answer changes."""
+
+        record_answers(
+            self.attempt,
+            [
+                {"question_id": 1, "answer_ids": [1]},
+                {"question_id": 3, "answer_ids": [1]},
+            ],
+        )
+        self.assertEqual(self.attempt.score, GradeResult(2, 1, 2, 1))
+
+        record_answers(
+            self.attempt, [{"question_id": 3, "answer_ids": [1, 4]}]
+        )
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.score, GradeResult(2, 2, 2, 2))
+        self.assertEqual(
+            self.attempt.score,
+            AnswerAttempt.objects.filter(attempt=self.attempt).score(),
+        )
+
+    def test_save_answer(self):
+        """Check that a single answer is saved and scored."""
+
+        self.assertTrue(save_answer(self.attempt, 1, [2]))
+        self.assertEqual(self.attempt.score, GradeResult(1, 0, 1, 0))
+
+        self.assertFalse(save_answer(self.attempt, 1, [1]))
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.score, GradeResult(1, 1, 1, 1))
+        self.assertTrue(
+            AnswerAttempt.objects.get(attempt=self.attempt).is_correct
+        )
+        self.assertFalse(self.attempt.all_questions_answered)
+
+    def test_save_answer_interleaved(self):
+        """Check that a write between reading and updating isn't lost."""
+
+        save_answer(self.attempt, 1, [2])
+        competing = ExamAttempt.objects.get(id=self.attempt.id)
+        interleaved = []
+
+        def grade(question_id, answer_ids):
+            if not interleaved:
+                interleaved.append(question_id)
+                save_answer(competing, question_id, [1])
+            return grade_answer(question_id, answer_ids)
+
+        with mock.patch("apps.exam.services.grade_answer", grade):
+            save_answer(self.attempt, 1, [1, 2])
+
+        self.attempt.refresh_from_db()
+        self.assertEqual(
+            self.attempt.score,
+            AnswerAttempt.objects.filter(attempt=self.attempt).score(),
+        )
+        self.assertEqual(self.picked(), {1: [1, 2]})
+
+    def test_save_answer_invalid(self):
+        """Check that foreign questions and answers are rejected."""
+
+        with self.assertRaises(ValidationError):
+            save_answer(self.attempt, 1, [4])
+        with self.assertRaises(ValidationError):
+            save_answer(self.attempt, 1, [])
+        with self.assertRaises(ValidationError):
+            save_answer(self.attempt, 100, [1])
+        with self.assertRaises(ValidationError):
+            save_answer(self.attempt, 4, [1])
+
+        self.assertEqual(self.picked(), {})
+
+    def test_save_answer_query_count(self):
+        """Check that saving an answer costs a constant number of queries."""
+
+        first = self.attempt.next_question_id()
+        last = self.attempt.question_order[-1]
+        save_answer(self.attempt, first, [1])
+        answer_keys.option_ids(last)
+
+        with self.assertNumQueries(5):
+            save_answer(self.attempt, last, [1, 2])
+        with self.assertNumQueries(5):
+            save_answer(self.attempt, last, [1])
+
+        self.assertEqual(self.picked(), {first: [1], last: [1]})
+
+    def test_unique_answer_attempt(self):
+        """Check that a question is answered once per attempt."""
+
+        save_answer(self.attempt, 1, [1])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            AnswerAttempt.objects.create(
+                attempt=self.attempt, question_id=1, answer_ids=[2]
+            )
+
+
+class FinishExpiredAttemptsTestCase(TestCase):
+    """Test cases for expired attempt sweeping."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def setUp(self):
+
+        cache.clear()
+        user = User.objects.get(id=4)
+        exams = Exam.objects.filter(id__in=(1, 2))
+        self.expired = provision_attempt(user, ExamAttempt.EXAM_MODE, exams, 3)
+        self.running = provision_attempt(user, ExamAttempt.EXAM_MODE, exams, 3)
+        self.practice = provision_attempt(
+            user, ExamAttempt.PRACTICE_MODE, exams, 3
+        )
+        save_answer(self.expired, 1, [1])
+        save_answer(self.expired, 3, [2])
+        ExamAttempt.objects.filter(
+            id__in=(self.expired.id, self.practice.id)
+        ).update(ends_at=timezone.now() - timedelta(minutes=1))
+
+    def test_finish_expired_attempts(self):
+        """Check that only expired exam mode attempts are finished."""
+
+        self.assertEqual(finish_expired_attempts(), 1)
+        self.assertEqual(finish_expired_attempts(), 0)
+
+        self.expired.refresh_from_db()
+        self.assertTrue(self.expired.is_finished)
+        self.assertEqual(self.expired.grade, 50)
+        self.assertEqual(self.expired.passing_grade, 75)
+        self.assertEqual(
+            set(
+                ExamAttempt.objects.filter(
+                    status=ExamAttempt.STATUS_IN_PROGRESS
+                ).values_list("id", flat=True)
+            ),
+            {self.running.id, self.practice.id},
+        )
+
+    def test_finish_expired_attempts_query_count(self):
+        """Check that a batch is finished with a constant query count."""
+
+        with self.assertNumQueries(6):
+            finish_expired_attempts()
+
+
+class AttemptStateTestCase(TestCase):
+    """Test cases for the attempt state cache."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "exam_attempt.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def setUp(self):
+
+        cache.clear()
+        self.attempt = ExamAttempt.objects.get(id=1)
+
+    def test_get_attempt(self):
+        """Check that attempts are loaded once until they change."""
+
+        with self.assertNumQueries(1):
+            get_attempt(self.attempt.id, self.attempt.user_id)
+        with self.assertNumQueries(0):
+            attempt = get_attempt(self.attempt.id, self.attempt.user_id)
+        self.assertEqual(attempt.version, self.attempt.version)
+
+        self.attempt.add_to_score(answered=1)
+        with self.assertNumQueries(1):
+            attempt = get_attempt(self.attempt.id, self.attempt.user_id)
+        self.assertEqual(attempt.answered_count, self.attempt.answered_count)
+
+    def test_get_attempt_other_user(self):
+        """Check that attempts of other users aren't returned."""
+
+        get_attempt(self.attempt.id, self.attempt.user_id)
+
+        with self.assertRaises(ExamAttempt.DoesNotExist):
+            get_attempt(self.attempt.id, 5)
+        with self.assertRaises(ExamAttempt.DoesNotExist):
+            get_attempt(10, self.attempt.user_id)
+
+    def test_get_attempt_saved(self):
+        """Check that saving an attempt drops its cached state."""
+
+        get_attempt(self.attempt.id, self.attempt.user_id)
+        self.attempt.duration_minutes = 30
+        self.attempt.save()
+
+        attempt = get_attempt(self.attempt.id, self.attempt.user_id)
+        self.assertEqual(attempt.duration_minutes, 30)
+
+        self.attempt.delete()
+        with self.assertRaises(ExamAttempt.DoesNotExist):
+            get_attempt(self.attempt.id, self.attempt.user_id)
+
+    def test_get_attempt_finished(self):
+        """Check that finishing an attempt drops its cached state."""
+
+        get_attempt(self.attempt.id, self.attempt.user_id)
+        self.attempt.finish()
+
+        attempt = get_attempt(self.attempt.id, self.attempt.user_id)
+        self.assertTrue(attempt.is_finished)
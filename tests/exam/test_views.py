@@ -1,5 +1,8 @@
 """Tests for Exam app views."""
 
+import uuid
+
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -9,6 +12,7 @@ from apps.exam.serializers import (
     ExamSerializer,
     SubjectSerializer,
 )
+from apps.exam.services import save_answer
 from apps.question.models import Answer, Question
 from apps.user.models import User
 
@@ -30,6 +34,7 @@ class ExamViewTestCase(TestCase):
 
     def setUp(self):
 
+        cache.clear()
         self.answer = Answer.objects.get(id=1)
         self.exam_attempt = ExamAttempt.objects.get(id=1)
         self.subject_attempt = ExamAttempt.objects.get(id=2)
@@ -371,6 +376,31 @@ class ExamViewTestCase(TestCase):
             ),
         )
 
+    def test_exam_intro_post_same_start_token(self):
+        """Check that a double-clicked start creates a single attempt."""
+
+        self.client.login(username=self.user.username, password=self.password)
+        start_token = uuid.uuid4()
+        url = reverse(
+            "exam_intro",
+            kwargs={
+                "exam_id": self.exam.id,
+                "exam_mode": ExamAttempt.EXAM_MODE,
+            },
+        )
+
+        responses = [
+            self.client.post(url, data={"start_token": start_token})
+            for _ in range(2)
+        ]
+
+        exam_attempt = ExamAttempt.objects.get(start_token=start_token)
+        for response in responses:
+            self.assertRedirects(
+                response,
+                reverse("exam_page", kwargs={"attempt_id": exam_attempt.id}),
+            )
+
     def test_exam_page_get(self):
         """Check that method renders correctly."""
 
@@ -415,11 +445,7 @@ class ExamViewTestCase(TestCase):
         """Check that finish page for exam attempt renders correctly."""
 
         self.client.login(username=self.user.username, password=self.password)
-        answer_attempt = AnswerAttempt.objects.create(
-            attempt=self.exam_attempt, question=self.question
-        )
-        answer_attempt.answers.add(self.answer)
-        answer_attempt.save()
+        save_answer(self.exam_attempt, self.question.id, [self.answer.id])
 
         response = self.client.get(
             reverse("exam_finish", kwargs={"attempt_id": self.exam_attempt.id})
@@ -427,15 +453,35 @@ class ExamViewTestCase(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTemplateUsed("exam/finish.html")
 
+    def test_exam_attempt_finish_get_again(self):
+        """Check that finished attempts are served from the stored result."""
+
+        self.client.login(username=self.user.username, password=self.password)
+        save_answer(self.exam_attempt, self.question.id, [self.answer.id])
+        url = reverse(
+            "exam_finish", kwargs={"attempt_id": self.exam_attempt.id}
+        )
+        response = self.client.get(url)
+
+        self.exam.passing_grade = 100
+        self.exam.name = "Renamed"
+        self.exam.save()
+        save_answer(self.exam_attempt, self.question.id, [2])
+
+        with self.assertNumQueries(3):
+            second_response = self.client.get(url)
+
+        self.assertEqual(
+            second_response.context["status"], response.context["status"]
+        )
+        self.assertEqual(second_response.context["grade"], 100)
+        self.assertEqual(second_response.context["passing_grade"], 75)
+
     def test_exam_attempt_practice_mode_finish_get_context(self):
         """Check that method returns correct context."""
 
         self.client.login(username=self.user.username, password=self.password)
-        answer_attempt = AnswerAttempt.objects.create(
-            attempt=self.exam_attempt, question=self.question
-        )
-        answer_attempt.answers.add(self.answer)
-        answer_attempt.save()
+        save_answer(self.exam_attempt, self.question.id, [self.answer.id])
 
         response = self.client.get(
             reverse("exam_finish", kwargs={"attempt_id": self.exam_attempt.id})
@@ -453,11 +499,7 @@ class ExamViewTestCase(TestCase):
         """Check that method returns correct context."""
 
         self.client.login(username=self.user.username, password=self.password)
-        answer_attempt = AnswerAttempt.objects.create(
-            attempt=self.subject_attempt, question=self.question
-        )
-        answer_attempt.answers.add(self.answer)
-        answer_attempt.save()
+        save_answer(self.subject_attempt, self.question.id, [self.answer.id])
 
         response = self.client.get(
             reverse(
@@ -472,6 +514,165 @@ class ExamViewTestCase(TestCase):
             f"Your grade is {self.subject_attempt.grade}%.",
         )
 
+    def test_exam_page_bootstrap(self):
+        """Check that the page embeds the initial state of the attempt."""
+
+        cache.clear()
+        self.client.login(username=self.user.username, password=self.password)
+        url = reverse("exam_page", kwargs={"attempt_id": self.exam_attempt.id})
+
+        with self.assertNumQueries(10):
+            response = self.client.get(url)
+        bootstrap = response.context["bootstrap"]
+        self.assertEqual(bootstrap["attempt"]["id"], self.exam_attempt.id)
+        self.assertEqual(bootstrap["attempt"]["questions"], [1])
+        self.assertEqual(bootstrap["question"]["id"], self.question.id)
+        self.assertContains(response, 'id="exam-bootstrap"')
+
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+        self.assertEqual(response.context["bootstrap"], bootstrap)
+
+        save_answer(self.exam_attempt, self.question.id, [self.answer.id])
+        bootstrap = self.client.get(url).context["bootstrap"]
+        self.assertEqual(bootstrap["attempt"]["answered_questions"], [1])
+        self.assertIsNone(bootstrap["question"])
+
+    def test_exam_page_bootstrap_deadline_extended(self):
+        """Check that a reload after extending the deadline embeds it."""
+
+        self.client.login(username=self.user.username, password=self.password)
+        url = reverse("exam_page", kwargs={"attempt_id": self.exam_attempt.id})
+        attempt = self.client.get(url).context["bootstrap"]["attempt"]
+        duration_minutes = attempt["duration_minutes"]
+        ends_at = attempt["ends_at"]
+
+        self.exam_attempt.duration_minutes += 30
+        self.exam_attempt.save()
+
+        attempt = self.client.get(url).context["bootstrap"]["attempt"]
+        self.assertEqual(attempt["duration_minutes"], duration_minutes + 30)
+        self.assertNotEqual(attempt["ends_at"], ends_at)
+        self.assertAlmostEqual(
+            attempt["time_left_seconds"],
+            self.exam_attempt.time_left_seconds,
+            delta=1,
+        )
+
+    def test_exam_page_bootstrap_other_user(self):
+        """Check that attempts of other users aren't embedded."""
+
+        user = User.objects.get(id=5)
+        self.client.login(username=user.username, password=self.password)
+        response = self.client.get(
+            reverse("exam_page", kwargs={"attempt_id": self.exam_attempt.id})
+        )
+        self.assertIsNone(response.context["bootstrap"])
+
+    def test_get_attempt_snapshot(self):
+        """Check the compact attempt representation and its ETag."""
+
+        self.client.login(username=self.user.username, password=self.password)
+        self.exam_attempt.toggle_flag(self.question.id)
+        url = reverse(
+            "attempt_snapshot", kwargs={"attempt_id": self.exam_attempt.id}
+        )
+
+        with self.assertNumQueries(8):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["questions"], [1])
+        self.assertEqual(response.data["answered_questions"], [])
+        self.assertEqual(response.data["exams"], [1])
+        self.assertEqual(response.data["flagged_questions"], [1])
+
+        etag = response["ETag"]
+        with self.assertNumQueries(3):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        save_answer(self.exam_attempt, self.question.id, [self.answer.id])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["answered_questions"], [1])
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_get_attempt_snapshot_saved(self):
+        """Check that saving the attempt changes its snapshot ETag."""
+
+        self.client.login(username=self.user.username, password=self.password)
+        url = reverse(
+            "attempt_snapshot", kwargs={"attempt_id": self.exam_attempt.id}
+        )
+        response = self.client.get(url, {"fields": "ends_at"})
+        ends_at = response.data["ends_at"]
+
+        self.exam_attempt.duration_minutes += 30
+        self.exam_attempt.save(update_fields=["duration_minutes"])
+
+        response = self.client.get(
+            url, {"fields": "ends_at"}, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.data["ends_at"], ends_at)
+
+    def test_get_attempt_snapshot_fields(self):
+        """Check sparse field selection."""
+
+        self.client.login(username=self.user.username, password=self.password)
+        url = reverse(
+            "attempt_snapshot", kwargs={"attempt_id": self.exam_attempt.id}
+        )
+
+        with self.assertNumQueries(4):
+            response = self.client.get(url, {"fields": "mode,ends_at"})
+        self.assertEqual(set(response.data), {"mode", "ends_at"})
+
+        etag = response["ETag"]
+        response = self.client.get(
+            url, {"fields": "ends_at,mode"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(
+            url, {"fields": "mode"}, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(url, {"fields": "mode,secret"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_attempt_snapshot_other_user(self):
+        """Check that attempts of other users aren't shown."""
+
+        user = User.objects.get(id=5)
+        self.client.login(username=user.username, password=self.password)
+        response = self.client.get(
+            reverse(
+                "attempt_snapshot",
+                kwargs={"attempt_id": self.exam_attempt.id},
+            )
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_attempt_cached(self):
+        """Check that an unchanged attempt is served from the cache."""
+
+        self.client.login(username=self.user.username, password=self.password)
+        url = reverse(
+            "get_attempt", kwargs={"attempt_id": self.exam_attempt.id}
+        )
+        data = self.client.get(url).data
+
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data, data)
+
+        save_answer(self.exam_attempt, self.question.id, [self.answer.id])
+        response = self.client.get(url)
+        self.assertEqual(response.data["answer_attempts"], [{"question": 1}])
+
     def test_get_attempt_unauthenticated(self):
         """Check access denied for unauthenticated user."""
 
@@ -493,10 +694,11 @@ class ExamViewTestCase(TestCase):
         """Check that method returns correct exam attempt."""
 
         self.client.login(username=self.user.username, password=self.password)
-        answer_attempt = AnswerAttempt.objects.create(
-            attempt=self.exam_attempt, question=self.question
+        AnswerAttempt.objects.create(
+            attempt=self.exam_attempt,
+            question=self.question,
+            answer_ids=[self.answer.id],
         )
-        answer_attempt.answers.set([self.answer])
 
         response = self.client.get(
             reverse("get_attempt", kwargs={"attempt_id": self.exam_attempt.id})
@@ -0,0 +1,153 @@
+"""Tests for Question app async views."""
+
+import json
+from urllib.parse import urlencode
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase
+
+from apps.exam.models import AnswerAttempt, ExamAttempt
+from apps.question.async_views import (
+    AsyncQuestionAnswerView,
+    AsyncQuestionView,
+)
+from apps.question.models import Answer, Question
+from apps.question.payloads import question_payload
+from apps.user.models import User
+
+
+class AsyncQuestionViewTestCase(TestCase):
+    """Test cases for async question views."""
+
+    factory = AsyncRequestFactory()
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "exam_attempt.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+        "user.json",
+    ]
+
+    def setUp(self):
+
+        cache.clear()
+        self.attempt = ExamAttempt.objects.get(id=1)
+        self.answer = Answer.objects.get(id=1)
+        self.question = Question.objects.get(id=1)
+        self.user = User.objects.get(id=4)
+
+    def call(self, view, request, user=None, **kwargs):
+        request.user = user or self.user
+        return async_to_sync(view.as_view())(request, **kwargs)
+
+    def test_get_question(self):
+        """Check that the next question is sent."""
+
+        response = self.call(
+            AsyncQuestionView,
+            self.factory.get("/"),
+            attempt_id=self.attempt.id,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            question_payload(self.question.id, self.attempt.id),
+        )
+
+    def test_get_question_other_user(self):
+        """Check that attempts of other users aren't served."""
+
+        response = self.call(
+            AsyncQuestionView,
+            self.factory.get("/"),
+            user=User.objects.get(id=5),
+            attempt_id=self.attempt.id,
+        )
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(
+            json.loads(response.content), {"detail": "Not found."}
+        )
+
+        response = self.call(
+            AsyncQuestionView,
+            self.factory.get("/"),
+            user=AnonymousUser(),
+            attempt_id=self.attempt.id,
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_post_answer(self):
+        """Check that answers are saved."""
+
+        data = {"question_id": self.question.id, "answers": [self.answer.id]}
+        request = self.factory.post(
+            "/", json.dumps(data), content_type="application/json"
+        )
+        response = self.call(
+            AsyncQuestionView, request, attempt_id=self.attempt.id
+        )
+        self.assertEqual(response.status_code, 201)
+
+        answer_attempt = AnswerAttempt.objects.get(
+            attempt=self.attempt, question=self.question
+        )
+        self.assertEqual(answer_attempt.answer_ids, [self.answer.id])
+
+        response = self.call(
+            AsyncQuestionView,
+            self.factory.post(
+                "/",
+                urlencode(data, doseq=True),
+                content_type="application/x-www-form-urlencoded",
+            ),
+            attempt_id=self.attempt.id,
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.call(
+            AsyncQuestionView,
+            self.factory.post("/", "{", content_type="application/json"),
+            attempt_id=self.attempt.id,
+        )
+        self.assertEqual(response.status_code, 400)
+
+        response = self.call(
+            AsyncQuestionView,
+            self.factory.post(
+                "/",
+                {"question_id": 4, "answers": [1]},
+                content_type="application/json",
+            ),
+            attempt_id=self.attempt.id,
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_answered_question(self):
+        """Check that picked answers of a question are sent."""
+
+        AnswerAttempt.objects.create(
+            attempt=self.attempt,
+            question=self.question,
+            answer_ids=[self.answer.id],
+        )
+
+        response = self.call(
+            AsyncQuestionAnswerView,
+            self.factory.get("/"),
+            attempt_id=self.attempt.id,
+            question_id=self.question.id,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            json.loads(response.content),
+            {
+                "answer_ids": [self.answer.id],
+                "question": question_payload(
+                    self.question.id, self.attempt.id
+                ),
+            },
+        )
@@ -0,0 +1,105 @@
+"""Tests for Question app answer key cache."""
+
+from django.test import TestCase
+
+from apps.question.cache import AnswerKeyCache, answer_keys
+from apps.question.models import Answer, Question
+
+
+class AnswerKeyCacheTestCase(TestCase):
+    """Test cases for answer key cache."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+    ]
+
+    def setUp(self):
+
+        answer_keys.clear()
+        self.question = Question.objects.get(id=3)
+        self.answer = Answer.objects.get(id=2)
+
+    def test_get(self):
+        """Check that exam answer key is built with a single query."""
+
+        with self.assertNumQueries(1):
+            key = answer_keys.get(self.question.exam_id)
+
+        self.assertEqual(
+            key,
+            {2: frozenset({1}), 3: frozenset({1, 4})},
+        )
+
+        with self.assertNumQueries(0):
+            answer_keys.get(self.question.exam_id)
+
+    def test_correct_answer_ids(self):
+        """Check lookup of correct answers for a single question."""
+
+        with self.assertNumQueries(2):
+            self.assertEqual(
+                answer_keys.correct_answer_ids(self.question.id),
+                frozenset({1, 4}),
+            )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                answer_keys.correct_answer_texts(self.question.id),
+                ("Correct!", "Correctomundo!"),
+            )
+
+    def test_option_ids(self):
+        """Check lookup of every answer a question offers."""
+
+        self.assertEqual(
+            answer_keys.option_ids(self.question.id), frozenset({1, 2, 4})
+        )
+
+    def test_no_question(self):
+        """Check that unknown questions raise DoesNotExist."""
+
+        with self.assertRaises(Question.DoesNotExist):
+            answer_keys.correct_answer_ids(100)
+
+    def test_invalidate_on_correct_answers_change(self):
+        """Check that changing correct answers invalidates the key."""
+
+        answer_keys.get(self.question.exam_id)
+        self.question.correct_answers.add(self.answer)
+
+        self.assertEqual(
+            answer_keys.correct_answer_ids(self.question.id),
+            frozenset({1, 2, 4}),
+        )
+
+        self.question.correct_answers.remove(self.answer)
+
+        self.assertEqual(
+            answer_keys.correct_answer_ids(self.question.id),
+            frozenset({1, 4}),
+        )
+
+    def test_invalidate_on_question_move(self):
+        """Check that moving a question updates both exam keys."""
+
+        answer_keys.get(1)
+        answer_keys.get(2)
+        self.question.exam_id = 1
+        self.question.save()
+
+        self.assertIn(self.question.id, answer_keys.get(1))
+        self.assertNotIn(self.question.id, answer_keys.get(2))
+
+    def test_lru_eviction(self):
+        """Check that least recently used exams are evicted."""
+
+        keys = AnswerKeyCache(maxsize=1)
+        keys.get(1)
+        keys.get(2)
+
+        with self.assertNumQueries(1):
+            keys.get(1)
@@ -2,7 +2,12 @@
 
 from django.test import TestCase
 
-from apps.question.models import Answer, Question, QuestionCategory
+from apps.question.models import (
+    Answer,
+    Question,
+    QuestionCategory,
+    QuestionOption,
+)
 
 
 class QuestionModelTestCase(TestCase):
@@ -32,6 +37,54 @@ class QuestionModelTestCase(TestCase):
 
         self.assertEqual(str(question), "<Question>: Question 1, id# 1:")
 
+    def test_question_options(self):
+        """Check that options keep their order and correctness."""
+
+        question = Question.objects.get(id=3)
+
+        self.assertEqual(
+            [
+                (option.answer_id, option.is_correct)
+                for option in question.options.all()
+            ],
+            [(1, True), (4, True), (2, False)],
+        )
+        self.assertEqual(
+            str(question.options.first()), "<Option>: 1 of question# 3"
+        )
+        self.assertEqual(set(question.correct_answer_ids()), {1, 4})
+
+    def test_option_answers(self):
+        """Check compatibility accessors of correct and wrong answers."""
+
+        question = Question.objects.get(id=3)
+
+        question.wrong_answers.add(Answer.objects.get(id=3), 4)
+        self.assertEqual(
+            [answer.id for answer in question.correct_answers.all()], [1]
+        )
+        self.assertEqual(
+            [answer.id for answer in question.wrong_answers.all()], [4, 2, 3]
+        )
+        self.assertEqual(
+            QuestionOption.objects.get(question=question, answer=3).position,
+            3,
+        )
+
+        question.correct_answers.set([2])
+        self.assertEqual(
+            [answer.id for answer in question.correct_answers.all()], [2]
+        )
+        self.assertEqual(
+            [answer.id for answer in question.wrong_answers.all()], [4, 3]
+        )
+
+        question.wrong_answers.remove(4)
+        question.correct_answers.clear()
+        self.assertEqual(
+            [option.answer_id for option in question.options.all()], [3]
+        )
+
     def test_question_category(self):
         """Unit test for question category model."""
 
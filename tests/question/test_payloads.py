@@ -0,0 +1,127 @@
+"""Tests for Question app payload cache."""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from apps.question.models import Answer, Question
+from apps.question.payloads import (
+    get_payloads,
+    payloads_etag,
+    question_payload,
+    shuffle_answers,
+)
+from apps.question.serializers import QuestionSerializer
+
+
+class QuestionPayloadTestCase(TestCase):
+    """Test cases for question payload cache."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+    ]
+
+    def setUp(self):
+
+        cache.clear()
+        self.question = Question.objects.get(id=3)
+        self.answer = Answer.objects.get(id=2)
+
+    def test_get_payloads(self):
+        """Check that payloads are built once with a constant query count."""
+
+        question_ids = list(Question.objects.values_list("id", flat=True))
+        with self.assertNumQueries(2):
+            payloads = get_payloads(question_ids)
+
+        self.assertEqual(
+            payloads[self.question.id],
+            QuestionSerializer(self.question).data,
+        )
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_payloads(question_ids), payloads)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+            }
+        }
+    )
+    def test_evicted_versions(self):
+        """Check that versions evicted right after minting are used."""
+
+        question_ids = [1, self.question.id]
+
+        self.assertEqual(len(payloads_etag(question_ids, 1)), 32)
+        self.assertNotEqual(
+            payloads_etag(question_ids, 1), payloads_etag(question_ids, 1)
+        )
+        self.assertEqual(
+            get_payloads(question_ids)[self.question.id],
+            QuestionSerializer(self.question).data,
+        )
+
+    def test_question_payload(self):
+        """Check that answers are shuffled the same way for an attempt."""
+
+        payload = question_payload(self.question.id, 1)
+
+        self.assertEqual(payload, question_payload(self.question.id, 1))
+        self.assertEqual(
+            sorted(answer["id"] for answer in payload["answers"]),
+            sorted(
+                answer["id"]
+                for answer in QuestionSerializer(self.question).data["answers"]
+            ),
+        )
+        self.assertEqual(
+            shuffle_answers(QuestionSerializer(self.question).data, 1),
+            payload,
+        )
+
+    def test_no_question(self):
+        """Check that unknown questions raise DoesNotExist."""
+
+        with self.assertRaises(Question.DoesNotExist):
+            question_payload(100, 1)
+
+    def test_invalidate_on_question_change(self):
+        """Check that saving a question invalidates its payload."""
+
+        question_payload(self.question.id, 1)
+        self.question.text = "Changed"
+        self.question.save()
+
+        self.assertEqual(
+            question_payload(self.question.id, 1)["text"], "Changed"
+        )
+
+    def test_invalidate_on_answers_change(self):
+        """Check that changing answers invalidates payloads."""
+
+        question_payload(self.question.id, 1)
+        self.question.wrong_answers.add(self.answer)
+
+        self.assertIn(
+            self.answer.id,
+            [
+                answer["id"]
+                for answer in question_payload(self.question.id, 1)["answers"]
+            ],
+        )
+
+        self.answer.text = "Changed"
+        self.answer.save()
+
+        self.assertIn(
+            "Changed",
+            [
+                answer["text"]
+                for answer in question_payload(self.question.id, 1)["answers"]
+            ],
+        )
@@ -0,0 +1,92 @@
+"""Tests for Question app sampling."""
+
+from django.test import TestCase
+
+from apps.question.models import Question
+from apps.question.sampling import allocate, sample_questions
+
+
+class SamplingTestCase(TestCase):
+    """Test cases for question sampling."""
+
+    fixtures = [
+        "answer.json",
+        "exam.json",
+        "question.json",
+        "question_category.json",
+        "subject.json",
+    ]
+
+    def setUp(self):
+
+        Question.objects.bulk_create(
+            Question(
+                text=f"Question {i}",
+                exam_id=1 if i % 4 else 3,
+                category_id=1 if i % 2 else 2,
+            )
+            for i in range(200)
+        )
+        self.pool = Question.objects.filter(exam__in=(1, 3))
+
+    def test_allocate(self):
+        """Check proportional allocation by largest remainder."""
+
+        self.assertEqual(allocate({1: 2, 2: 1}, 10), {1: 2, 2: 1})
+        self.assertEqual(allocate({1: 30, 2: 10}, 10), {1: 8, 2: 2})
+        self.assertEqual(allocate({1: 5, 2: 5, 3: 5}, 4), {1: 2, 2: 1, 3: 1})
+        self.assertEqual(allocate({}, 10), {})
+
+    def test_sample_questions(self):
+        """Check that sample has requested size and comes from the pool."""
+
+        sample = sample_questions([1, 3], 50, seed=1)
+
+        self.assertEqual(len(sample), 50)
+        self.assertEqual(len(set(sample)), 50)
+        self.assertEqual(self.pool.filter(id__in=sample).count(), 50)
+
+    def test_sample_questions_seed(self):
+        """Check that the same seed gives the same sample and order."""
+
+        self.assertEqual(
+            sample_questions([1, 3], 50, seed=1),
+            sample_questions([1, 3], 50, seed=1),
+        )
+        self.assertNotEqual(
+            sample_questions([1, 3], 50, seed=1),
+            sample_questions([1, 3], 50, seed=2),
+        )
+
+    def test_sample_questions_small_pool(self):
+        """Check that the whole pool is taken when it's too small."""
+
+        sample = sample_questions([2], 50, seed=1)
+
+        self.assertEqual(sorted(sample), [2, 3])
+
+    def test_sample_questions_proportional(self):
+        """Check that exams get questions proportionally to pool size."""
+
+        sample = Question.objects.filter(
+            id__in=sample_questions([1, 3], 40, seed=1)
+        )
+
+        self.assertEqual(sample.filter(exam=1).count(), 30)
+        self.assertEqual(sample.filter(exam=3).count(), 10)
+
+    def test_sample_questions_category_quotas(self):
+        """Check that category quotas are respected."""
+
+        sample = Question.objects.filter(
+            id__in=sample_questions([1, 3], 40, seed=1, category_quotas={2: 5})
+        )
+
+        self.assertEqual(sample.count(), 40)
+        self.assertEqual(sample.filter(category=2).count(), 5)
+
+    def test_sample_questions_query_count(self):
+        """Check that sampling costs one query per stratum."""
+
+        with self.assertNumQueries(3):
+            sample_questions([1, 3], 50, seed=1)
@@ -1,14 +1,16 @@
 """Tests for Question app views."""
 
 import json
-from unittest import mock
 
+from django.core.cache import cache
 from django.test import Client, TestCase
 from django.urls import reverse
 
 from apps.exam.models import AnswerAttempt, Exam, ExamAttempt
 from apps.question.models import Answer, Question
+from apps.question.payloads import shuffle_answers
 from apps.question.serializers import QuestionSerializer
+from apps.question.verification import answer_set_hash
 from apps.user.models import User
 
 
@@ -29,6 +31,7 @@ class QuestionViewTestCase(TestCase):
 
     def setUp(self):
 
+        cache.clear()
         self.attempt = ExamAttempt.objects.get(id=1)
         self.exam = Exam.objects.get(id=1)
         self.question = Question.objects.get(id=1)
@@ -58,14 +61,110 @@ class QuestionViewTestCase(TestCase):
         self.client.login(
             username=self.user.username, password=self.user_password
         )
-        with mock.patch("random.shuffle", return_value=lambda x: x):
-            response = self.client.get(
-                reverse("question_api", kwargs={"attempt_id": self.attempt.id})
-            ).render()
+        response = self.client.get(
+            reverse("question_api", kwargs={"attempt_id": self.attempt.id})
+        ).render()
+
+        data = json.loads(response.content)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            shuffle_answers(
+                QuestionSerializer(self.question).data, self.attempt.id
+            ),
+            data,
+        )
+
+    def test_api_get_question_cursor(self):
+        """Check that questions are delivered in attempt order."""
+
+        self.attempt.questions.add(Question.objects.get(id=2))
+        self.attempt.question_order = [2, 1]
+        self.attempt.save()
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        url = reverse("question_api", kwargs={"attempt_id": self.attempt.id})
 
-            data = json.loads(response.content)
-            self.assertEqual(response.status_code, 200)
-            self.assertEqual(QuestionSerializer(self.question).data, data)
+        for question_id in (2, 1):
+            response = self.client.get(url)
+            self.assertEqual(response.data["id"], question_id)
+            self.client.post(
+                url, data={"answers": [1], "question_id": question_id}
+            )
+
+        response = self.client.get(url)
+        self.assertIsNone(response.data)
+
+    def test_api_get_question_deleted(self):
+        """Check that questions deleted during the attempt are skipped."""
+
+        self.attempt.questions.add(Question.objects.get(id=2))
+        self.attempt.question_order = [2, 1]
+        self.attempt.save()
+        Question.objects.get(id=2).delete()
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        url = reverse("question_api", kwargs={"attempt_id": self.attempt.id})
+
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["id"], 1)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.question_cursor, 1)
+
+    def test_api_get_question_bundle(self):
+        """Check that all attempt questions are sent in one response."""
+
+        self.attempt.questions.add(Question.objects.get(id=2))
+        self.attempt.question_order = [2, 1]
+        self.attempt.save()
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        url = reverse(
+            "question_bundle_api", kwargs={"attempt_id": self.attempt.id}
+        )
+
+        with self.assertNumQueries(5):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data["questions"],
+            [
+                shuffle_answers(
+                    QuestionSerializer(Question.objects.get(id=id)).data,
+                    self.attempt.id,
+                )
+                for id in (2, 1)
+            ],
+        )
+
+        etag = response["ETag"]
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        question = Question.objects.get(id=1)
+        question.text = "Changed"
+        question.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["questions"][1]["text"], "Changed")
+
+    def test_api_get_question_bundle_exam_mode(self):
+        """Check that bundles aren't sent for attempts in exam mode."""
+
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        response = self.client.get(
+            reverse("question_bundle_api", kwargs={"attempt_id": 2})
+        )
+        self.assertEqual(response.status_code, 404)
 
     def test_api_get_question_no_more_questions(self):
         """
@@ -118,6 +217,7 @@ class QuestionViewTestCase(TestCase):
         correct_answer = Answer.objects.get(id=1)
         attempt = ExamAttempt.objects.create(user=self.user)
         attempt.exams.set([self.exam])
+        attempt.questions.set([self.question])
 
         self.client.login(
             username=self.user.username, password=self.user_password
@@ -133,13 +233,48 @@ class QuestionViewTestCase(TestCase):
 
         self.assertEqual(response.status_code, 201)
         answer_attempt = AnswerAttempt.objects.get(attempt=attempt.id)
-        self.assertEqual(answer_attempt.answers.first().id, correct_answer.id)
+        self.assertEqual(answer_attempt.answer_ids, [correct_answer.id])
+
+    def test_api_post_question_foreign_answer(self):
+        """Check that answers the question doesn't offer are rejected."""
+
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        response = self.client.post(
+            reverse("question_api", kwargs={"attempt_id": self.attempt.id}),
+            data={"answers": [4], "question_id": self.question.id},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(
+            AnswerAttempt.objects.filter(attempt=self.attempt).exists()
+        )
+
+    def test_api_post_question_foreign_question(self):
+        """Check that questions of other attempts are rejected."""
+
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        response = self.client.post(
+            reverse("question_api", kwargs={"attempt_id": self.attempt.id}),
+            data={"answers": [1], "question_id": 4},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(
+            AnswerAttempt.objects.filter(attempt=self.attempt).exists()
+        )
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.answered_count, 0)
 
     def test_api_post_update_answers(self):
         """Check that answer id in db changes when we change our answers."""
 
         attempt = ExamAttempt.objects.create(user=self.user)
         attempt.exams.set([self.exam])
+        attempt.questions.set([self.question])
         correct_answer = Answer.objects.get(id=1)
         wrong_answer = Answer.objects.get(id=2)
 
@@ -164,7 +299,7 @@ class QuestionViewTestCase(TestCase):
         )
         answer_attempt = AnswerAttempt.objects.get(attempt=attempt.id)
         self.assertIsNotNone(answer_attempt)
-        self.assertEqual(answer_attempt.answers.first().id, wrong_answer.id)
+        self.assertEqual(answer_attempt.answer_ids, [wrong_answer.id])
 
     def test_get_attempt_question_answers_anonymous(self):
         """Check that method raise status code 404 for anonymous user."""
@@ -219,36 +354,213 @@ class QuestionViewTestCase(TestCase):
 
         self.assertEqual(response.status_code, 404)
 
+    def test_api_post_answer_batch(self):
+        """Check that answers are saved in a batch and replays are free."""
+
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        url = reverse(
+            "answer_batch_api", kwargs={"attempt_id": self.attempt.id}
+        )
+        data = {"answers": [{"question_id": 1, "answer_ids": [1], "key": "a"}]}
+
+        response = self.client.post(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {"saved": 1, "replayed": 0})
+
+        response = self.client.post(url, data, content_type="application/json")
+        self.assertEqual(response.data, {"saved": 0, "replayed": 1})
+        answer_attempt = AnswerAttempt.objects.get(attempt=self.attempt)
+        self.assertEqual(answer_attempt.answer_ids, [1])
+
+    def test_api_post_answer_batch_invalid(self):
+        """Check that invalid batches are rejected."""
+
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        url = reverse(
+            "answer_batch_api", kwargs={"attempt_id": self.attempt.id}
+        )
+        invalid_data = (
+            {},
+            {"answers": [{"question_id": 1, "answer_ids": []}]},
+            {"answers": [{"question_id": 2, "answer_ids": [1]}]},
+            [{"question_id": 1, "answer_ids": [1]}],
+        )
+
+        for data in invalid_data:
+            response = self.client.post(
+                url, data, content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_api_post_answer_batch_time_is_up(self):
+        """Check that exam attempts don't take answers after time is up."""
+
+        attempt = ExamAttempt.objects.get(id=2)
+        attempt.duration_minutes = 0
+        attempt.save()
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+
+        response = self.client.post(
+            reverse("answer_batch_api", kwargs={"attempt_id": attempt.id}),
+            {"answers": [{"question_id": 1, "answer_ids": [1]}]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_api_get_verification_bundle(self):
+        """Check that practice attempts get hashes of correct answers."""
+
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        response = self.client.get(
+            reverse(
+                "verification_bundle_api",
+                kwargs={"attempt_id": self.attempt.id},
+            )
+        )
+
+        self.assertEqual(response.status_code, 200)
+        salt = response.data["salt"]
+        self.assertTrue(response.data["signature"])
+        self.assertEqual(
+            response.data["questions"],
+            [
+                {
+                    "id": self.question.id,
+                    "hash": answer_set_hash(salt, self.question.id, [1]),
+                    "correct_answers": ["Correct!"],
+                }
+            ],
+        )
+        self.assertNotEqual(
+            answer_set_hash(salt, self.question.id, [2]),
+            response.data["questions"][0]["hash"],
+        )
+
+    def test_api_verification_exam_mode(self):
+        """Check that exam attempts never get answers to check."""
+
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        responses = (
+            self.client.get(
+                reverse("verification_bundle_api", kwargs={"attempt_id": 2})
+            ),
+            self.client.post(
+                reverse("check_answers_api", kwargs={"attempt_id": 2}),
+                {"answers": [{"question_id": 1, "answer_ids": [1]}]},
+                content_type="application/json",
+            ),
+        )
+        for response in responses:
+            self.assertEqual(response.status_code, 404)
+
+    def test_api_post_check_answers(self):
+        """Check that answers are checked in a batch."""
+
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        url = reverse(
+            "check_answers_api", kwargs={"attempt_id": self.attempt.id}
+        )
+
+        response = self.client.post(
+            url,
+            {
+                "answers": [
+                    {"question_id": 1, "answer_ids": [1]},
+                    {"question_id": 1, "answer_ids": [2]},
+                ]
+            },
+            content_type="application/json",
+        )
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"question_id": 1, "result": "correct"},
+                {
+                    "question_id": 1,
+                    "result": "wrong",
+                    "correct_answers": ["Correct!"],
+                },
+            ],
+        )
+
+        response = self.client.post(
+            url,
+            {"answers": [{"question_id": 2, "answer_ids": [1]}]},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 404)
+
+        response = self.client.post(
+            url,
+            [{"question_id": 1, "answer_ids": [1]}],
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_api_post_check_answers_deleted_question(self):
+        """Check that answers to a deleted question of attempt give 404."""
+
+        self.attempt.questions.add(Question.objects.get(id=2))
+        self.attempt.question_order = [2, 1]
+        self.attempt.save()
+        Question.objects.get(id=2).delete()
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+
+        response = self.client.post(
+            reverse(
+                "check_answers_api", kwargs={"attempt_id": self.attempt.id}
+            ),
+            {"answers": [{"question_id": 2, "answer_ids": [1]}]},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 404)
+
     def test_get_api_attempt_question_answers(self):
         """Check that method send correct data to frontend."""
 
         correct_answer = Answer.objects.get(id=1)
-        answer_attempt = AnswerAttempt.objects.create(
-            attempt=self.attempt, question=self.question
+        AnswerAttempt.objects.create(
+            attempt=self.attempt,
+            question=self.question,
+            answer_ids=[correct_answer.id],
         )
-        answer_attempt.answers.add(correct_answer)
 
         self.client.login(
             username=self.user.username, password=self.user_password
         )
-        with mock.patch("random.shuffle", return_value=lambda x: x):
-
-            response = self.client.get(
-                reverse(
-                    "question_answers_api",
-                    kwargs={
-                        "attempt_id": self.attempt.id,
-                        "question_id": self.question.id,
-                    },
-                )
+        response = self.client.get(
+            reverse(
+                "question_answers_api",
+                kwargs={
+                    "attempt_id": self.attempt.id,
+                    "question_id": self.question.id,
+                },
             )
+        )
 
-            self.assertEqual(response.status_code, 200)
-            self.assertEqual(response.data["answer_ids"], [correct_answer.id])
-            self.assertEqual(
-                response.data["question"],
-                QuestionSerializer(self.question).data,
-            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["answer_ids"], [correct_answer.id])
+        self.assertEqual(
+            response.data["question"],
+            shuffle_answers(
+                QuestionSerializer(self.question).data, self.attempt.id
+            ),
+        )
 
     def test_get_question_flag_no_flags(self):
         """
@@ -271,7 +583,7 @@ class QuestionViewTestCase(TestCase):
         self.client.login(
             username=self.user.username, password=self.user_password
         )
-        self.attempt.flagged_questions.add(self.question)
+        self.attempt.toggle_flag(self.question.id)
 
         response = self.client.get(
             reverse("get_attempt", kwargs={"attempt_id": self.attempt.id})
@@ -298,8 +610,11 @@ class QuestionViewTestCase(TestCase):
             )
         )
         self.assertEqual(
-            response.data["flagged_questions"], [self.question.id]
+            response.data,
+            {"question_id": self.question.id, "flagged": True, "version": 1},
         )
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.flagged_question_ids, [self.question.id])
 
     def test_post_question_flag_remove(self):
         """Check that method removes flag from list of flagged questions."""
@@ -307,7 +622,7 @@ class QuestionViewTestCase(TestCase):
         self.client.login(
             username=self.user.username, password=self.user_password
         )
-        self.attempt.flagged_questions.add(self.question)
+        self.attempt.toggle_flag(self.question.id)
 
         response = self.client.post(
             reverse(
@@ -318,7 +633,32 @@ class QuestionViewTestCase(TestCase):
                 },
             )
         )
-        self.assertEqual(response.data["flagged_questions"], [])
+        self.assertEqual(
+            response.data,
+            {"question_id": self.question.id, "flagged": False, "version": 2},
+        )
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.flagged_question_ids, [])
+
+    def test_post_question_flag_not_in_attempt(self):
+        """Check that only questions of the attempt can be flagged."""
+
+        self.client.login(
+            username=self.user.username, password=self.user_password
+        )
+        question = Question.objects.exclude(id=self.question.id).first()
+
+        with self.assertNumQueries(4):
+            response = self.client.post(
+                reverse(
+                    "question_toggle_flag",
+                    kwargs={
+                        "attempt_id": self.attempt.id,
+                        "question_id": question.id,
+                    },
+                )
+            )
+        self.assertEqual(response.status_code, 404)
 
     def test_post_check_answer_wrong(self):
 
@@ -341,6 +681,7 @@ class QuestionViewTestCase(TestCase):
         )
 
         self.assertEqual(response.data["result"], "wrong")
+        self.assertEqual(response.data["correct_answers"], ["Correct!"])
 
     def test_post_check_answer_correct(self):
 
@@ -160,22 +160,43 @@ class UserViewTestCase(TestCase):
         user = User.objects.get(id=self.user_id)
         self.client.login(username=user.email, password=self.user_password)
 
+        ExamAttempt.objects.get(id=2).exams.set([2])
+
         response = self.client.get(reverse("profile"))
+        self.assertEqual(response.context["exams_count"], 1)
+        self.assertEqual(response.context["exam_ids"], [2])
+
+    def test_profile_history(self):
+        """Check that exam history is read from attempt summaries."""
+
+        user = User.objects.get(id=self.user_id)
+        self.client.login(username=user.email, password=self.user_password)
+        ExamAttempt.objects.get(id=1).finish()
+        ExamAttempt.objects.get(id=2).finish()
+
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("profile"))
+
         self.assertEqual(
-            response.context["exams_count"],
-            ExamAttempt.objects.filter(user=user, mode=ExamAttempt.EXAM_MODE)
-            .values("exams")
-            .distinct()
-            .count(),
+            [attempt.attempt_id for attempt in response.context["page_obj"]],
+            [2],
         )
+        self.assertContains(response, "English Grammar, Exam 2")
+
+    def test_progress_charts_get(self):
+        """Check that charts are paged by exams of all attempts of user."""
+
+        user = User.objects.get(id=self.user_id)
+        self.client.login(username=user.email, password=self.user_password)
+        ExamAttempt.objects.get(id=2).exams.set([2])
+
+        response = self.client.get(reverse("progress-charts"))
+
+        self.assertEqual(response.status_code, 200)
         self.assertEqual(
-            response.context["exam_ids"],
-            list(
-                ExamAttempt.objects.filter(
-                    user=user, mode=ExamAttempt.EXAM_MODE
-                ).values_list("exams", flat=True)
-            ),
+            list(response.context["page_obj"].object_list), [1, 2]
         )
+        self.assertContains(response, 'data-exam-ids="[1, 2]"')
 
     def test_profile_chart_get(self):
         """Check that method sends data to frontend."""
@@ -9,5 +9,10 @@ axios.defaults.xsrfHeaderName = "x-csrftoken";
 const rootElementId = "#exam";
 const rootElement = document.querySelector(rootElementId);
 
-const app = createApp(App, { ...rootElement.dataset });
+const bootstrapElement = document.getElementById("exam-bootstrap");
+const bootstrap = bootstrapElement
+  ? JSON.parse(bootstrapElement.textContent)
+  : null;
+
+const app = createApp(App, { ...rootElement.dataset, bootstrap });
 app.mount(rootElementId);